@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""对比旧的BeautifulSoup解析方式和单次扫描的提取方式
+用法：python benchmarks/bench_extract.py [保存的丁香园网页路径]
+"""
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bs4 import BeautifulSoup                   # noqa: E402
+from pycovid.extract import extract_scripts     # noqa: E402
+
+SCRIPT_IDS = ['getAreaStat', 'getListByCountryTypeService2true', 'getTimelineService1']
+DEFAULT_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pneumonia.html')
+
+
+def soup_path(html):
+    """PyCovid原来的解析方式：每个数据集都重新解析一次完整的网页"""
+    data = []
+    for script_id in SCRIPT_IDS:
+        soup = BeautifulSoup(html, "html.parser").find('script', id=script_id)
+        data.append(json.loads(str(soup)
+                               .strip(f'<script id="{script_id}">try {{ window.{script_id} = ')
+                               .strip('}catch(e){}</script>')))
+    return data
+
+
+def extract_path(html):
+    """单次扫描网页，取出全部数据后再解析json"""
+    scripts = extract_scripts(html)
+    return [json.loads(scripts[script_id]) for script_id in SCRIPT_IDS]
+
+
+def peak_memory(func, html):
+    tracemalloc.start()
+    func(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PAGE
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    if soup_path(html) != extract_path(html):
+        raise SystemExit('两种方式得到的数据不一致')
+    print(f'网页：{path} ({len(html.encode("utf-8")) / 1024:.1f} KiB)')
+    for name, func, number in (('BeautifulSoup', soup_path, 5), ('extract_scripts', extract_path, 50)):
+        seconds = min(timeit.repeat(lambda: func(html), number=number, repeat=3)) / number
+        print(f'{name:<16} {seconds * 1000:8.2f} ms/次  峰值内存 {peak_memory(func, html) / 1024 / 1024:6.2f} MiB')
+
+
+if __name__ == '__main__':
+    main()
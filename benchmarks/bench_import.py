@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""使用python -X importtime检查导入pycovid.covid和pycovid.covid_en的耗时
+导入时不应该加载网络和解析网页相关的库，超过时间上限或者加载了这些库时返回1，可以在CI中使用
+用法：python benchmarks/bench_import.py [--max-ms 50] [--runs 7]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ENTRY_POINTS = ('pycovid', 'pycovid.covid', 'pycovid.covid_en')
+# 只在下载网页或者检查系统语言时才需要的模块
+FORBIDDEN = ('requests', 'urllib3', 'bs4', 'locale', 'aiohttp', 'numpy', 'orjson', 'sqlite3')
+
+
+def import_time(module):
+    """在新的解释器中导入一次，返回(模块的累计耗时(微秒), {模块: 累计耗时})"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times[module], times
+
+
+def loaded_modules(module):
+    """导入以后加载的禁止模块"""
+    code = f'import sys, json, {module}; print(json.dumps([m for m in {FORBIDDEN!r} if m in sys.modules]))'
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查导入pycovid的耗时')
+    parser.add_argument('--max-ms', type=float, default=50.0, help='导入耗时的上限(毫秒，中位数)，默认为%(default)s')
+    parser.add_argument('--runs', type=int, default=7, help='每个模块导入的次数，默认为%(default)s')
+    args = parser.parse_args()
+
+    failed = False
+    for module in ENTRY_POINTS:
+        runs = [import_time(module) for _ in range(args.runs)]
+        median = statistics.median(total for total, _ in runs) / 1000
+        _, times = runs[-1]
+        slowest = sorted(((cumulative, name) for name, cumulative in times.items()
+                          if name.startswith('pycovid') and name != module), reverse=True)[:5]
+        forbidden = loaded_modules(module)
+        status = 'OK'
+        if median > args.max_ms or forbidden:
+            status = 'FAIL'
+            failed = True
+        print(f'{module:<20}{median:8.2f} ms  {status}')
+        for cumulative, name in slowest:
+            print(f'    {name:<28}{cumulative / 1000:8.2f} ms')
+        if forbidden:
+            print(f'    导入时加载了：{", ".join(forbidden)}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""对比遍历查询和索引查询单个省份、城市、国家的速度
+用法：python benchmarks/bench_index.py [保存的丁香园网页路径]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pycovid.covid import PyCovid, COUNTRIES_NAME     # noqa: E402
+
+DEFAULT_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pneumonia.html')
+
+
+def linear_province(c_data, name):
+    """原来的查询方式：遍历全部省份"""
+    for province in c_data:
+        if name in [province['provinceShortName'], province['provinceName']]:
+            return province
+
+
+def linear_city(c_data, province_name, city_name):
+    for province in c_data:
+        if province_name in [province['provinceShortName'], province['provinceName']]:
+            for city in province['cities']:
+                if city['cityName'] == city_name:
+                    return city
+
+
+def linear_country(w_data, name):
+    """原来的查询方式：遍历全部国家，每个国家再遍历一次中英文对照表"""
+    for country in w_data:
+        name_en = ''
+        for zh_cn, en_us in COUNTRIES_NAME.items():
+            if zh_cn == country['provinceName']:
+                name_en = en_us
+                break
+        if name in [country['provinceName'], name_en]:
+            return country
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PAGE
+    covid = PyCovid.from_file(path, ignore_region=True, use_it_anyway=True)
+    c_data, w_data = covid.c_data, covid.w_data
+    province = c_data[-1]['provinceName']
+    city = next(city['cityName'] for p in reversed(c_data) for city in p['cities'])
+    city_province = next(p['provinceName'] for p in reversed(c_data) if p['cities'])
+    country = COUNTRIES_NAME[w_data[-2]['provinceName']]
+    build = min(timeit.repeat(lambda: PyCovid.from_file(path, ignore_region=True, use_it_anyway=True)
+                              ._country_index, number=1, repeat=5))
+    print(f'读取网页、解析w_data并建立国家索引 {build * 1000:.2f} ms')
+    cases = (
+        ('省份', lambda: linear_province(c_data, province), lambda: covid._province_index[province]),
+        ('城市', lambda: linear_city(c_data, city_province, city),
+         lambda: covid._city_index[covid._province_index[city_province]['provinceShortName']][city]),
+        ('国家', lambda: linear_country(w_data, country), lambda: covid._country_index[country]),
+    )
+    for name, linear, indexed in cases:
+        assert linear() is indexed()
+        t_linear = min(timeit.repeat(linear, number=200, repeat=3)) / 200
+        t_index = min(timeit.repeat(indexed, number=20000, repeat=3)) / 20000
+        print(f'{name}  遍历 {t_linear * 1e6:10.2f} µs  索引 {t_index * 1e6:8.3f} µs  {t_linear / t_index:8.0f}x')
+    t_old = min(timeit.repeat(lambda: [linear_country(w_data, country)], number=20, repeat=3)) / 20
+    t_new = min(timeit.repeat(lambda: covid.world_covid(name=country), number=2000, repeat=3)) / 2000
+    print(f'world_covid(name={country!r})  原来仅查找就需要 {t_old * 1e6:.2f} µs  现在整个调用 {t_new * 1e6:.2f} µs')
+
+
+if __name__ == '__main__':
+    main()
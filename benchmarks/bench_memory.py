@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""对比保存多个快照的查询结果时，dict和__slots__类型(pycovid.records)占用的内存
+用法：python benchmarks/bench_memory.py [保存的丁香园网页路径] [快照数量]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pycovid.covid import PyCovid                   # noqa: E402
+from pycovid.names import SPECIAL_REGIONS           # noqa: E402
+
+DEFAULT_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pneumonia.html')
+
+
+def snapshot_results(covid, row_type):
+    """仪表盘保存的一个快照：全部国家、全部省份和每个省份的城市"""
+    provinces = [province['provinceShortName'] for province in covid.c_data
+                 if province['provinceShortName'] not in SPECIAL_REGIONS and province['cities']]
+    return {
+        'world': covid.world_covid(row_type=row_type),
+        'cn': covid.cn_covid(row_type=row_type),
+        'cities': {name: covid.province_covid(name, include_province_name=False, row_type=row_type)
+                   for name in provinces},
+        'news': covid.news_timeline(row_type='record' if row_type == 'record' else 'dict'),
+    }
+
+
+def measure(covid, row_type, count):
+    """保存count个快照的查询结果增加的内存，原始数据中的字符串和整数是共用的，只统计容器的开销"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [snapshot_results(covid, row_type) for _ in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    rows = sum(len(result['world']) + len(result['cn']) + sum(map(len, result['cities'].values()))
+               + len(result['news']) for result in kept)
+    del kept
+    return used, rows
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PAGE
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    covid = PyCovid.from_file(path, ignore_region=True, use_it_anyway=True)
+    snapshot_results(covid, 'dict')    # 预先解析数据和编译字段选择
+    print(f'{count}个快照')
+    baseline = None
+    for row_type in ('dict', 'record', 'namedtuple', 'tuple'):
+        used, rows = measure(covid, row_type, count)
+        baseline = baseline or used
+        print(f'{row_type:<12}{used / 1024 / 1024:8.2f} MiB    {used / rows:6.1f}字节/行    {used / baseline:6.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""使用pycovid.synthetic生成的模拟网页，测试数据量增加时解析和查询的耗时和峰值内存
+每次只增加一种数据(城市、国家或中高风险地区)，其他数据使用--shape的规模，默认的行数和benchmarks/data/pneumonia.html相同，每项的耗时应该接近线性增长
+用法：python benchmarks/bench_scaling.py [--dimension danger_areas] [--sizes 1000,10000,100000] [--shape fixture] [--seed 0]
+"""
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_suite import OPTIONS, measure, peak_memory      # noqa: E402
+from pycovid.covid import PyCovid                         # noqa: E402
+from pycovid.synthetic import SHAPES, generate_page       # noqa: E402
+
+DEFAULT_SIZES = {'cities': '1000,10000,50000', 'countries': '500,5000,20000',
+                 'danger_areas': '1000,10000,100000'}
+
+
+def cases(page):
+    """[(名称, func, setup)]"""
+    covid = PyCovid.from_bytes(page, **OPTIONS)
+    province = max(covid.c_data, key=lambda p: len(p['cities']))['provinceShortName']
+
+    def parse(_):
+        parsed = PyCovid.from_bytes(page, **OPTIONS)
+        return parsed.c_data, parsed.w_data
+
+    return [
+        ('parse', parse, None),
+        ('province_covid', lambda _: covid.province_covid(province), None),
+        ('world_covid', lambda _: covid.world_covid(), None),
+        ('danger_areas', lambda _: covid.danger_areas(), None),
+        ('danger_areas.cold', lambda fresh: fresh.danger_areas(), lambda: PyCovid.from_bytes(page, **OPTIONS)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测试数据量增加时的耗时和内存')
+    parser.add_argument('--dimension', choices=tuple(DEFAULT_SIZES), default='danger_areas',
+                        help='增加的数据，默认为%(default)s')
+    parser.add_argument('--sizes', help='用逗号分隔的数量，默认为' + '；'.join(f'{k}: {v}' for k, v in DEFAULT_SIZES.items()))
+    parser.add_argument('--shape', choices=tuple(SHAPES), default='fixture',
+                        help='其他数据使用的预设规模(pycovid.synthetic.SHAPES)，默认为%(default)s')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子，默认为%(default)s')
+    parser.add_argument('--budget', type=float, default=0.5, help='每一项的计时时间(秒)，默认为%(default)s')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in (args.sizes or DEFAULT_SIZES[args.dimension]).split(',')]
+    print(f'{args.dimension:<12}{"":<20}{"p50 ms":>10}{"µs/项":>10}{"peak MiB":>10}')
+    for size in sizes:
+        page = generate_page(args.shape, seed=args.seed, **{args.dimension: size})
+        print(f'{size:<12}{"page":<20}{len(page) / 1024 / 1024:>30.2f}')
+        for name, func, setup in cases(page):
+            p50 = statistics.median(measure(func, setup, args.budget, min_samples=3, max_samples=200))
+            peak = peak_memory(func, setup)
+            print(f'{"":<12}{name:<20}{p50 * 1000:10.3f}{p50 / size * 1e6:10.3f}{peak / 1024 / 1024:10.2f}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""对比不同序列化方式转换查询结果的速度
+用法：python benchmarks/bench_serialize.py [保存的丁香园网页路径]
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pycovid.covid import PyCovid                   # noqa: E402
+from pycovid.serializer import Serializer           # noqa: E402
+
+DEFAULT_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'pneumonia.html')
+
+
+def bench(func, number=50):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PAGE
+    covid = PyCovid.from_file(path, ignore_region=True, use_it_anyway=True)
+    shapes = {
+        'world_covid()': covid.world_covid(),
+        'cn_covid()': covid.cn_covid(),
+        'danger_areas()': covid.danger_areas(),
+        'news_timeline()': covid.news_timeline(),
+    }
+    serializers = {
+        'json indent=4 (原来的方式)': lambda data: json.dumps(data, indent=4, ensure_ascii=False),
+        'json 紧凑格式': Serializer(indent=None, backend='json').dumps,
+        'auto indent=4': Serializer().dumps,
+        'auto 紧凑格式': Serializer(indent=None).dumps,
+        'auto 紧凑格式 bytes': Serializer(indent=None, as_bytes=True).dumps,
+    }
+    if Serializer(indent=None).backend != 'orjson':
+        print('没有安装orjson，auto和json相同')
+    for shape, data in shapes.items():
+        print(f'{shape}: {len(data)}条')
+        baseline = None
+        for name, dumps in serializers.items():
+            elapsed = bench(lambda: dumps(data))
+            baseline = baseline or elapsed
+            output = dumps(data)
+            size = len(output if isinstance(output, bytes) else output.encode('utf-8'))
+            print(f'    {name:<24}{elapsed:8.3f} ms    {size:>8}字节    {baseline / elapsed:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""不访问网络的基准测试：分别测试下载、提取、解析每个阶段和每个查询方法
+使用benchmarks/data中保存的网页，以及把省份、城市、国家、中高风险地区放大10倍、100倍的网页
+下载阶段使用本机的http服务器，每一项报告延迟的分位数、吞吐量和峰值内存，并和保存的基准结果比较
+用法：
+    python benchmarks/bench_suite.py                       # 和benchmarks/data/baseline.json比较
+    python benchmarks/bench_suite.py --save baseline.json  # 保存新的基准结果
+    python benchmarks/bench_suite.py --scales 1 --only method.world
+变慢超过--tolerance的项目会被标记为REGRESSION，这时返回1，在速度不稳定的机器(例如共享的CI)上可以调大--tolerance
+基准结果中保存了一个固定工作量的耗时，比较时先按它换算到当前机器的速度
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pycovid import covid_en                        # noqa: E402
+from pycovid.covid import PyCovid                   # noqa: E402
+from pycovid.extract import extract_scripts         # noqa: E402
+from pycovid.names import IGNORE_COUNTRIES          # noqa: E402
+from pycovid.snapshot import JSON_ALIASES           # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_PAGE = os.path.join(DATA_DIR, 'pneumonia.html')
+DEFAULT_BASELINE = os.path.join(DATA_DIR, 'baseline.json')
+OPTIONS = {'ignore_region': True, 'use_it_anyway': True}
+PROVINCES_ID = JSON_ALIASES['c_data']
+COUNTRIES_ID = JSON_ALIASES['w_data']
+
+
+def _renamed(item, suffix, *fields):
+    item = dict(item)
+    for field in fields:
+        item[field] = f'{item[field]}{suffix}'
+    return item
+
+
+def scale_scripts(scripts, factor):
+    """把省份和国家复制factor份，城市和中高风险地区随省份一起复制，复制的名称后面加上编号"""
+    provinces = json.loads(scripts[PROVINCES_ID])
+    countries = json.loads(scripts[COUNTRIES_ID])
+    scaled_provinces, scaled_countries = [], []
+    for k in range(factor):
+        suffix = str(k) if k else ''
+        for province in provinces:
+            copy = _renamed(province, suffix, 'provinceName', 'provinceShortName')
+            copy['dangerAreas'] = [_renamed(area, suffix, 'provinceShortName')
+                                   for area in province.get('dangerAreas', [])]
+            scaled_provinces.append(copy)
+        scaled_countries.extend(_renamed(country, suffix, 'provinceName') for country in countries)
+    return {PROVINCES_ID: json.dumps(scaled_provinces, ensure_ascii=False, separators=(',', ':')),
+            COUNTRIES_ID: json.dumps(scaled_countries, ensure_ascii=False, separators=(',', ':'))}
+
+
+def scale_page(page, factor):
+    """放大网页中的数据，其他部分保持不变，格式和丁香园的网页相同"""
+    if factor == 1:
+        return page
+    scripts = extract_scripts(page)
+    for script_id, text in scale_scripts(scripts, factor).items():
+        prefix = f'window.{script_id} = '.encode('utf-8')
+        page = page.replace(prefix + scripts[script_id], prefix + text.encode('utf-8'), 1)
+    return page
+
+
+class _PageServer:
+    """在本机提供网页，用来测试下载阶段"""
+
+    def __init__(self, page):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def measure(func, setup=None, budget=0.3, min_samples=5, max_samples=2000):
+    """多次调用func，每次单独计时，setup()的返回值作为func的参数，不计入时间
+    :return: 每次调用的秒数列表
+    """
+    arg = setup() if setup else None
+    func(arg)                                   # 预热，建立缓存的索引
+    samples, spent = [], 0.0
+    while len(samples) < max_samples and (spent < budget or len(samples) < min_samples):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg)
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        spent += elapsed
+    return samples
+
+
+def peak_memory(func, setup=None):
+    """一次调用的峰值内存(字节)"""
+    arg = setup() if setup else None
+    gc.collect()
+    tracemalloc.start()
+    func(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def calibrate(page):
+    """固定的工作量(解析一次网页中的国家数据)的耗时(毫秒)，用来抵消不同机器和不同时间的速度差异"""
+    text = extract_scripts(page)[COUNTRIES_ID]
+    return statistics.median(measure(lambda _: json.loads(text), budget=0.5, min_samples=20)) * 1000
+
+
+def cases(page, fetch=True):
+    """[(名称, func, setup, 处理的字节数)]，字节数为None时只报告每秒调用次数"""
+    scripts = extract_scripts(page)
+    warm = PyCovid.from_bytes(page, **OPTIONS)
+    warm_en = covid_en.PyCovid.from_bytes(page, use_it_anyway=True)
+    province = warm.c_data[-1]['provinceShortName']
+    city_province = next(p for p in warm.c_data if p['cities'])
+    country = [c['provinceName'] for c in warm.w_data if c['provinceName'] not in IGNORE_COUNTRIES][-1]
+
+    def fresh():
+        return PyCovid._from_scripts(scripts, **OPTIONS)
+
+    result = []
+    if fetch:
+        from pycovid.fetch import Fetcher
+        fetcher = Fetcher(conditional=False)
+        server = _PageServer(page)
+        result.append(('stage.fetch', lambda _: fetcher.fetch(server.url), None, len(page)))
+    result += [
+        ('stage.extract', lambda _: extract_scripts(page), None, len(page)),
+        ('stage.from_bytes', lambda _: PyCovid.from_bytes(page, **OPTIONS), None, len(page)),
+    ]
+    for name, script_id in (('c_data', PROVINCES_ID), ('w_data', COUNTRIES_ID), ('n_data', JSON_ALIASES['n_data'])):
+        result.append((f'stage.decode.{name}', lambda covid, name=name: getattr(covid, name), fresh,
+                       len(scripts[script_id])))
+    result += [
+        ('method.cn_covid', lambda _: warm.cn_covid(), None, None),
+        ('method.cn_covid.province', lambda _: warm.cn_covid(province_name=province), None, None),
+        ('method.cn_covid.json', lambda _: warm.cn_covid(return_to_json=True), None, None),
+        ('method.province_covid', lambda _: warm.province_covid(city_province['provinceShortName']), None, None),
+        ('method.world_covid', lambda _: warm.world_covid(), None, None),
+        ('method.world_covid.name', lambda _: warm.world_covid(name=country), None, None),
+        ('method.world_covid.json', lambda _: warm.world_covid(return_to_json=True), None, None),
+        ('method.world_covid.en', lambda _: warm_en.world_covid(), None, None),
+        ('method.danger_areas', lambda _: warm.danger_areas(), None, None),
+        ('method.find_danger_areas', lambda _: warm.find_danger_areas(province=province), None, None),
+        ('method.news_timeline', lambda _: warm.news_timeline(), None, None),
+        ('method.aggregate.top', lambda _: warm.aggregate.top(10, where={'confirmed': (1000, None)}), None, None),
+        ('cold.aggregate.top', lambda covid: covid.aggregate.top(10), fresh, None),
+        ('cold.world_covid.name', lambda covid: covid.world_covid(name=country), fresh, None),
+        ('cold.province_covid', lambda covid: covid.province_covid(city_province['provinceShortName']), fresh, None),
+    ]
+    return result, (server.close if fetch else None)
+
+
+def run(base_page, scales, budget, only=None, fetch=True):
+    """运行全部项目，返回{'倍数x/名称': 结果}"""
+    results = {}
+    for factor in scales:
+        page = scale_page(base_page, factor)
+        print(f'\n== {factor}x  ({len(page) / 1024 / 1024:.2f} MiB)')
+        print(f'{"":<28}{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}{"ops/s":>10}{"MB/s":>9}{"peak KiB":>11}')
+        items, close = cases(page, fetch)
+        try:
+            for name, func, setup, size in items:
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                samples = measure(func, setup, budget)
+                p50 = statistics.median(samples)
+                row = {
+                    'p50_ms': p50 * 1000,
+                    'p90_ms': percentile(samples, 90) * 1000,
+                    'p99_ms': percentile(samples, 99) * 1000,
+                    'ops': 1 / p50 if p50 else 0.0,
+                    'mb_s': size / p50 / 1e6 if size and p50 else None,
+                    'peak_kib': peak_memory(func, setup) / 1024,
+                    'samples': len(samples),
+                }
+                results[f'{factor}x/{name}'] = row
+                mb_s = f'{row["mb_s"]:9.1f}' if row['mb_s'] is not None else f'{"":9}'
+                print(f'{name:<28}{row["p50_ms"]:10.3f}{row["p90_ms"]:10.3f}{row["p99_ms"]:10.3f}'
+                      f'{row["ops"]:10.0f}{mb_s}{row["peak_kib"]:11.0f}')
+        finally:
+            if close:
+                close()
+    return results
+
+
+def compare(results, calibration, baseline, tolerance):
+    """按p50比较，返回变慢超过tolerance的项目，基准结果先按calibrate()的比例换算到这台机器"""
+    regressions = []
+    speed = calibration / baseline['meta']['calibration_ms']
+    print(f'\n== 和基准结果比较 ({baseline["meta"]["created"]}, Python {baseline["meta"]["python"]}，'
+          f'速度换算系数 {speed:.2f})')
+    for key, row in results.items():
+        old = baseline['results'].get(key)
+        if old is None or not old['p50_ms']:
+            continue
+        change = row['p50_ms'] / (old['p50_ms'] * speed) - 1
+        status = ''
+        if change > tolerance:
+            status = 'REGRESSION'
+            regressions.append(key)
+        print(f'{key:<36}{old["p50_ms"]:10.3f} -> {row["p50_ms"]:10.3f} ms  {change:+7.1%}  {status}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='pycovid的基准测试')
+    parser.add_argument('--page', default=DEFAULT_PAGE, help='丁香园格式的网页，默认为手工构造的样例%(default)s')
+    parser.add_argument('--scales', default='1,10,100', help='数据放大的倍数，用逗号分隔，默认为%(default)s')
+    parser.add_argument('--budget', type=float, default=0.3, help='每一项的计时时间(秒)，默认为%(default)s')
+    parser.add_argument('--only', action='append', help='只运行名称包含这个字符串的项目，可以使用多次')
+    parser.add_argument('--no-fetch', action='store_true', help='不测试下载阶段')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='用来比较的基准结果，默认为%(default)s')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='p50允许变慢的比例，默认为%(default)s')
+    parser.add_argument('--save', help='把结果保存为新的基准结果')
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    with open(args.page, 'rb') as f:
+        page = f.read()
+    calibration = calibrate(page)
+    results = run(page, scales, args.budget, args.only, not args.no_fetch)
+    calibration = (calibration + calibrate(page)) / 2      # 运行以后再校准一次，取平均值
+    if args.save:
+        meta = {'created': datetime.datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(), 'platform': platform.platform(),
+                'calibration_ms': calibration}
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f'\n基准结果已保存到{args.save}')
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, calibration, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""获取丁香园的疫情数据
+常用的类可以直接从pycovid导入，第一次使用时才会导入对应的模块，例如：
+    from pycovid import PyCovid
+requests只有在下载网页时才会导入，只读取本地快照的程序不需要导入网络相关的库
+"""
+import importlib                    # 延迟导入子模块
+
+# 名称: (模块, 模块中的名称)
+_LAZY = {
+    'PyCovid': ('pycovid.covid', 'PyCovid'),
+    'CovidException': ('pycovid.covid', 'CovidException'),
+    'PyCovidEn': ('pycovid.covid_en', 'PyCovid'),
+    'AsyncPyCovid': ('pycovid.aio', 'AsyncPyCovid'),
+    'Fetcher': ('pycovid.fetch', 'Fetcher'),
+    'SnapshotCache': ('pycovid.cache', 'SnapshotCache'),
+    'SnapshotStore': ('pycovid.store', 'SnapshotStore'),
+    'SnapshotDiffer': ('pycovid.diff', 'SnapshotDiffer'),
+    'Poller': ('pycovid.poll', 'Poller'),
+    'Serializer': ('pycovid.serializer', 'Serializer'),
+    'Metrics': ('pycovid.metrics', 'Metrics'),
+    'NewsArchive': ('pycovid.archive', 'NewsArchive'),
+    'extract_scripts': ('pycovid.extract', 'extract_scripts'),
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    try:
+        module, attribute = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    value = getattr(importlib.import_module(module), attribute)
+    globals()[name] = value     # 下次直接读取，不再经过__getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
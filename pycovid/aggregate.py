@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import heapq                        # 不排序全部数据获取前n名
+from functools import cached_property    # 每个快照只计算一次
+from pycovid.columnar import COUNT_COLUMNS, INCR_COLUMNS    # 原始数据的字段名
+from pycovid.names import COUNTRIES_NAME, IGNORE_CITIES, IGNORE_COUNTRIES, city_display_name    # 名称对照表
+
+SCOPES = ('world', 'provinces', 'cities')
+SUM_FIELDS = tuple(COUNT_COLUMNS) + tuple(INCR_COLUMNS)
+RATE_FIELDS = ('deathRate', 'cureRate')
+MAX_RESULTS = 256                   # 每个快照最多缓存的查询结果数，超出时删除最久没有使用的结果
+
+
+def _rates(row):
+    """死亡率和治愈率，累计确诊为0时为0.0"""
+    confirmed = row['confirmed']
+    row['deathRate'] = row['dead'] / confirmed if confirmed else 0.0
+    row['cureRate'] = row['cured'] / confirmed if confirmed else 0.0
+    return row
+
+
+def _counts(raw, incr=False):
+    row = {name: raw[key] for name, key in COUNT_COLUMNS.items()}
+    if incr:
+        incr_vo = raw.get('incrVo') or {}
+        row.update((name, incr_vo.get(key) or 0) for name, key in INCR_COLUMNS.items())
+    return row
+
+
+def _matcher(where):
+    """把筛选条件转换为函数
+    :param where: None、函数或者字典{字段名: 值或(最小值, 最大值)}，最小值和最大值可以为None，范围包含两端，
+                  范围也可以写成列表[最小值, 最大值]
+    """
+    if where is None or callable(where):
+        return where
+    conditions = []
+    for field, condition in where.items():
+        if isinstance(condition, (tuple, list)):
+            if len(condition) != 2:
+                raise ValueError(f'{field}的范围需要是(最小值, 最大值)')
+            low, high = condition
+            conditions.append(lambda row, f=field, low=low, high=high:
+                              (low is None or row[f] >= low) and (high is None or row[f] <= high))
+        else:
+            conditions.append(lambda row, f=field, value=condition: row[f] == value)
+    return lambda row: all(condition(row) for condition in conditions)
+
+
+def _cache_key(where):
+    """可以缓存的筛选条件，函数或者不能hash的值作为条件时不缓存"""
+    if where is None:
+        return ()
+    if callable(where):
+        return None
+    key = tuple(sorted((field, tuple(value) if isinstance(value, list) else value) for field, value in where.items()))
+    return key if _hashable(key) else None
+
+
+def _hashable(key):
+    try:
+        hash(key)
+    except TypeError:
+        return False
+    return True
+
+
+class Aggregator:
+    """基于一个快照的排名和汇总，相同参数的查询结果会被缓存，最多缓存MAX_RESULTS个，超出时删除最久没有使用的结果
+    结果中的列表和字典是缓存中的对象，请不要直接修改
+    每一行包含名称字段、currentConfirmed、confirmed、cured、dead、deathRate、cureRate，
+    国家还包含confirmedIncr、curedIncr、deadIncr(缺失时为0)和continent
+    用法：
+        covid.aggregate.top(10, by='confirmed')
+        covid.aggregate.group_by('continent')
+    """
+
+    def __init__(self, covid):
+        """
+        :param covid: PyCovid，covid_en中的PyCovid只能使用scope='world'
+        """
+        self._covid = covid
+        self._results = {}
+
+    @cached_property
+    def _world(self):
+        return [_rates({'countryNameEn': COUNTRIES_NAME.get(country['provinceName'], ''),
+                        'countryNameCn': country['provinceName'],
+                        'continent': country.get('continents', ''),
+                        **_counts(country, incr=True)})
+                for country in self._covid.w_data if country['provinceName'] not in IGNORE_COUNTRIES]
+
+    @cached_property
+    def _provinces(self):
+        return [_rates({'provinceName': province['provinceShortName'], **_counts(province)})
+                for province in self._covid_c_data()]
+
+    @cached_property
+    def _cities(self):
+        return [_rates({'provinceName': province['provinceShortName'],
+                        'cityName': city_display_name(city['cityName']), **_counts(city)})
+                for province in self._covid_c_data()
+                for city in province['cities'] if city['cityName'] not in IGNORE_CITIES]
+
+    def _covid_c_data(self):
+        if not hasattr(type(self._covid), 'c_data'):
+            raise ValueError("这个PyCovid只有全球数据，只能使用scope='world'")
+        return self._covid.c_data
+
+    def _memoize(self, key, compute):
+        if key[-1] is None:     # 筛选条件是函数或者不能hash
+            return compute()
+        result = self._results.pop(key, None)
+        if result is None:
+            result = compute()
+            if len(self._results) >= MAX_RESULTS:
+                del self._results[next(iter(self._results))]
+        self._results[key] = result     # 移到最后，表示最近使用过
+        return result
+
+    def rows(self, scope='world', province=None, where=None):
+        """获取某个范围的全部行
+        :param scope: 'world'、'provinces'或'cities'
+        :param province: scope='cities'时只获取这个省份的城市，省份的简称或全称
+        :param where: 筛选条件，函数或者字典{字段名: 值或(最小值, 最大值)}，例如{'confirmed': (1000, None)}
+        """
+        if scope not in SCOPES:
+            raise ValueError(f'scope只能是{"、".join(SCOPES)}')
+        if province is not None and scope != 'cities':
+            raise ValueError("参数province只能和scope='cities'一起使用")
+
+        if province is not None:
+            self._covid_c_data()    # covid_en中的PyCovid没有省份索引
+            found = self._covid._province_index.get(province)
+            if found is None:
+                raise ValueError(f'没有找到{province}的数据。')
+            province = found['provinceShortName']
+
+        def compute():
+            data = getattr(self, '_' + scope)
+            if province is not None:
+                data = [row for row in data if row['provinceName'] == province]
+            match = _matcher(where)
+            return data if match is None else [row for row in data if match(row)]
+
+        if province is None and where is None:
+            return compute()
+        return self._memoize(('rows', scope, province, _cache_key(where)), compute)
+
+    def top(self, n=10, by='confirmed', scope='world', province=None, where=None, smallest=False):
+        """获取某个字段最大(或最小)的n行，使用堆，不会排序全部数据，值相同时保持原来的顺序
+        :param n: 行数
+        :param by: 字段名，例如'confirmed'、'deathRate'
+        :param smallest: 是否获取最小的n行，默认获取最大的n行
+        其他参数和rows()相同
+        """
+        def compute():
+            data = self.rows(scope, province, where)
+            select = heapq.nsmallest if smallest else heapq.nlargest
+            return select(n, data, key=lambda row: row[by])
+
+        return self._memoize(('top', n, by, scope, province, smallest, _cache_key(where)), compute)
+
+    def totals(self, scope='world', province=None, where=None):
+        """汇总某个范围的人数，死亡率和治愈率按汇总以后的人数计算
+        :return: 字典，包含count(行数)和各个人数字段的和
+        """
+        def compute():
+            return self._sum(self.rows(scope, province, where))
+
+        return self._memoize(('totals', scope, province, _cache_key(where)), compute)
+
+    def group_by(self, key, scope='world', province=None, where=None):
+        """按某个字段分组汇总，例如按大洲(continent)汇总国家，按省份(provinceName)汇总城市
+        :param key: 分组的字段名，或者参数为一行、返回分组名的函数
+        :return: 字典，{分组名: totals()格式的汇总}，按分组第一次出现的顺序排列
+        """
+        def compute():
+            groups = {}
+            get = key if callable(key) else (lambda row: row[key])
+            for row in self.rows(scope, province, where):
+                groups.setdefault(get(row), []).append(row)
+            return {name: self._sum(rows) for name, rows in groups.items()}
+
+        cache_key = _cache_key(where) if not callable(key) else None
+        return self._memoize(('group_by', key, scope, province, cache_key), compute)
+
+    def per_capita(self, population, by='confirmed', per=100000, scope='world', name_field=None):
+        """按人口计算每per人中的人数，没有人口数据的行会被忽略
+        :param population: 字典，{名称: 人口}，名称和name_field字段相同
+        :param by: 字段名
+        :param per: 每多少人，默认为100000
+        :param name_field: 和population对应的名称字段，默认国家使用countryNameCn，省份和城市使用provinceName/cityName
+        :return: 列表，每一项是原来的行加上'{by}PerCapita'字段，按这个字段从大到小排列
+        """
+        if name_field is None:
+            name_field = {'world': 'countryNameCn', 'provinces': 'provinceName', 'cities': 'cityName'}[scope]
+        field = by + 'PerCapita'
+
+        def compute():
+            data = [dict(row, **{field: row[by] / population[row[name_field]] * per})
+                    for row in self.rows(scope) if population.get(row[name_field])]
+            data.sort(key=lambda row: row[field], reverse=True)
+            return data
+
+        # 人口数据按内容缓存，修改population以后会重新计算
+        population_key = frozenset(population.items())
+        if not _hashable(population_key):
+            population_key = None
+        return self._memoize(('per_capita', by, per, scope, name_field, population_key), compute)
+
+    @staticmethod
+    def _sum(rows):
+        fields = [field for field in SUM_FIELDS if rows and field in rows[0]]
+        total = {'count': len(rows)}
+        total.update((field, sum(row[field] for row in rows)) for field in fields)
+        for field in COUNT_COLUMNS:
+            total.setdefault(field, 0)
+        return _rates(total)
+
+    def clear(self):
+        """清空缓存的查询结果"""
+        self._results.clear()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import asyncio                      # 异步网络请求
+import json                         # 在线程池或进程池中解析数据
+import weakref                      # 每个事件循环一个下载器
+from pycovid.covid import PyCovid, CovidException    # 查询方法和PyCovid相同
+from pycovid.extract import extract_scripts    # 提取网页中的数据
+from pycovid.fetch import Page      # 下载到的网页
+from pycovid.metrics import stage   # 计时
+from pycovid.snapshot import DATASETS    # 创建时解析的数据
+
+
+class AsyncFetcher:
+    """基于aiohttp的异步下载器，复用连接池，支持超时、重试和条件请求(304)"""
+
+    def __init__(self, timeout=(5, 30), retries=3, backoff=0.5, pool_size=10, conditional=True, session=None):
+        """
+        :param timeout: 超时时间，可以是秒数或者(连接超时, 读取超时)，默认为(5, 30)
+        :param retries: 连接失败或服务器返回5xx时的重试次数，默认为3
+        :param backoff: 重试的退避系数，第n次重试前等待backoff * 2 ** (n - 1)秒，默认为0.5
+        :param pool_size: 连接池的大小，默认为10
+        :param conditional: 是否发送If-None-Match/If-Modified-Since，默认发送
+        :param session: 自定义的aiohttp.ClientSession，默认在第一次请求时创建
+        """
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError('AsyncPyCovid需要aiohttp，请运行pip install aiohttp')
+        self._aiohttp = aiohttp
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.conditional = conditional
+        self.session = session
+        self._pages = {}
+
+    async def fetch(self, url):
+        """下载网页，如果网页没有变化，返回和上一次下载的Page共用数据的Page
+        :param url: 网页地址
+        :return: Page，网页没有变化时not_modified为True
+        """
+        if self.session is None:
+            connector = self._aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = self._aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        page = self._pages.get(url)
+        headers = {}
+        if page is not None and self.conditional:
+            if page.etag:
+                headers['If-None-Match'] = page.etag
+            if page.last_modified:
+                headers['If-Modified-Since'] = page.last_modified
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status >= 500 and attempt < self.retries:
+                        continue
+                    if response.status == 304 and page is not None:
+                        return page.revalidated()
+                    response.raise_for_status()
+                    content = await response.read()
+                    page = Page(url, content, etag=response.headers.get('ETag'),
+                                last_modified=response.headers.get('Last-Modified'))
+                    break
+            except (self._aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+        if self.conditional and (page.etag or page.last_modified):
+            self._pages[url] = page
+        return page
+
+    async def close(self):
+        """关闭连接池"""
+        self._pages.clear()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+_fetchers = weakref.WeakKeyDictionary()
+
+
+def get_async_fetcher():
+    """获取当前事件循环共用的异步下载器，第一次调用时创建，不再使用时请调用close_async_fetcher()"""
+    loop = asyncio.get_running_loop()
+    fetcher = _fetchers.get(loop)
+    if fetcher is None:
+        fetcher = _fetchers[loop] = AsyncFetcher()
+    return fetcher
+
+
+async def close_async_fetcher():
+    """关闭当前事件循环共用的异步下载器的连接池，事件循环结束前调用，之后再使用时会重新创建"""
+    fetcher = _fetchers.pop(asyncio.get_running_loop(), None)
+    if fetcher is not None:
+        await fetcher.close()
+
+
+def _decode_page(content, scripts=None):
+    """提取并解析全部数据，只使用参数和返回值，可以在进程池中运行
+    :param content: 网页源码
+    :param scripts: 已经提取的数据，没有时从content中提取
+    :return: (scripts, {'c_data': ..., 'w_data': ..., 'n_data': ...})
+    """
+    if scripts is None:
+        scripts = extract_scripts(content)
+    data = {}
+    for name, script_id in DATASETS.items():
+        try:
+            text = scripts[script_id]
+        except KeyError:
+            raise CovidException(f'网页中没有找到{script_id}的数据。')
+        with stage(f'decode.{script_id}', len(text)):
+            data[name] = json.loads(text)
+    return scripts, data
+
+
+class AsyncPyCovid(PyCovid):
+    """PyCovid的异步版本，下载网页时不会阻塞事件循环，提取和解析数据在线程池中进行
+    用法：covid = await AsyncPyCovid.create(use_it_anyway=True)
+    创建以后的查询方法和PyCovid完全相同，例如covid.cn_covid()
+    """
+
+    def __init__(self, *args, **kwargs):
+        raise CovidException('请使用await AsyncPyCovid.create()创建AsyncPyCovid')
+
+    @classmethod
+    async def create(cls, ignore_region=False, use_it_anyway=False, fetcher=None, executor=None):
+        """下载并解析网页
+        :param ignore_region: 和PyCovid相同
+        :param use_it_anyway: 和PyCovid相同
+        :param fetcher: 异步下载器，默认使用当前事件循环共用的AsyncFetcher(请在事件循环结束前调用close_async_fetcher())
+        :param executor: 提取和解析数据使用的线程池或进程池，默认使用事件循环的默认线程池
+                         使用进程池时只有网页源码和解析结果会在进程之间传递
+        :return: AsyncPyCovid
+        """
+        covid = cls.__new__(cls)
+        covid._setup(ignore_region=ignore_region, use_it_anyway=use_it_anyway)
+        try:
+            with stage('fetch') as timer:
+                covid.page = await (fetcher or get_async_fetcher()).fetch(covid.url)
+                timer.nbytes = 0 if covid.page.not_modified else len(covid.page.content)
+        except Exception:
+            raise CovidException('网络连接失败，请检查网络连接。')
+        covid.response = None
+        # 网页没有变化时(304)不会重新提取数据
+        scripts, data = await asyncio.get_running_loop().run_in_executor(
+            executor, _decode_page, covid.page.content, covid.page.__dict__.get('scripts'))
+        covid.page.__dict__.setdefault('scripts', scripts)
+        covid.scripts = scripts
+        covid.__dict__.update(data)     # 之后的查询都不需要再解析
+        return covid
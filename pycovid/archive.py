@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import hashlib                      # 内容哈希
+import json                         # 保存新闻
+import mmap                         # 映射索引文件
+import os                           # 文件路径
+import struct                       # 固定长度的索引项
+import threading                    # 多线程写入
+import zlib                         # 压缩新闻
+from bisect import bisect_left, bisect_right    # 按发布时间查找
+from pycovid.newsindex import pub_timestamp, to_timestamp    # 发布时间
+
+# 索引项：数据文件中的偏移、压缩后的长度、发布时间(毫秒)、去重用的哈希
+_ENTRY = struct.Struct('<QIq16s')
+# zlib的预设字典，由新闻中常见的字段名和文字组成，单条新闻很短，使用预设字典以后大约只有单独压缩的一半
+# 已经写入的新闻需要同一个字典才能解压，请不要修改
+_ZDICT = ('（自治区、直辖市）和新疆生产建设兵团报告新增确诊病例例。其中境外输入病例例（含例由无症状感染者转为确诊病例；'
+          '本土病例例（，新增死亡病例例，新增疑似病例例。当日新增治愈出院病例例，解除医学观察的密切接触者人，重症病例较前一日'
+          '国家卫健委 | 昨日新增本土 例0—24时，日'
+          '"provinceId":"","createTime":"modifyTime":"dataInfoState":0,"adoptType":1}'
+          '"infoSource":"央视新闻app","sourceUrl":"https://content-static.cctvnews.cctv.com/snow-book/index.html'
+          '?item_id=&toc_style_id=feeds_default"'
+          '{"id":"pubDate":16"pubDateStr":"小时前","title":"","summary":"').encode('utf-8')
+
+
+# 参与去重的字段，pubDateStr("1小时前")和modifyTime每次刷新都会变化，不参与去重
+DIGEST_FIELDS = ('title', 'summary', 'infoSource')
+
+
+def news_digest(news):
+    """去重用的哈希，由sourceUrl、标题、摘要、来源和发布时间计算，同一个链接的内容变化时会保存新的版本"""
+    content = [news.get('sourceUrl') or ''] + [news.get(field) or '' for field in DIGEST_FIELDS]
+    content.append(pub_timestamp(news))
+    text = json.dumps(content, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def _compress(news, level):
+    compressor = zlib.compressobj(level, zdict=_ZDICT)
+    text = json.dumps(news, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return compressor.compress(text) + compressor.flush()
+
+
+def _decompress(record):
+    decompressor = zlib.decompressobj(zdict=_ZDICT)
+    return json.loads(decompressor.decompress(record) + decompressor.flush())
+
+
+class NewsArchive:
+    """只追加的新闻归档，每条新闻只保存一次，可以保存多年的新闻而不需要全部读入内存
+    目录中有两个文件：
+        news.dat 使用预设字典压缩的新闻，只追加
+        news.idx 固定长度的索引项，读取时映射到内存，按位置或发布时间分页时只读取需要的新闻
+    用法：
+        archive = NewsArchive('archive')
+        archive.update(covid.n_data)        # 每次刷新以后加入新的新闻
+        covid.news_timeline(archive=archive)
+    """
+
+    def __init__(self, directory, compress_level=6, read_only=False):
+        """
+        :param directory: 保存归档的目录，不存在时自动创建
+        :param compress_level: zlib的压缩级别，默认为6
+        :param read_only: 只读打开，不创建目录和文件，归档不存在时抛出FileNotFoundError
+        """
+        self.directory = directory
+        self.compress_level = compress_level
+        self.read_only = read_only
+        self._data_path = os.path.join(directory, 'news.dat')
+        self._index_path = os.path.join(directory, 'news.idx')
+        self._lock = threading.Lock()
+        self._map = None
+        self._mapped = 0            # 映射的索引项数量
+        self._order = None          # 按发布时间排序的索引，数量变化时重新计算
+        if read_only:
+            for path in (self._data_path, self._index_path):
+                if not os.path.isfile(path):
+                    raise FileNotFoundError(f'没有找到新闻归档：{path}')
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self._recover()
+        self._digests = {entry[3] for entry in self._entries()}
+
+    def _recover(self):
+        """写入中断时，去掉不完整的索引项和没有索引的数据"""
+        for path in (self._data_path, self._index_path):
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+        index_size = os.path.getsize(self._index_path)
+        complete = index_size - index_size % _ENTRY.size
+        if complete != index_size:
+            with open(self._index_path, 'r+b') as f:
+                f.truncate(complete)
+        data_end = 0
+        if complete:
+            with open(self._index_path, 'rb') as f:
+                f.seek(complete - _ENTRY.size)
+                offset, length, _, _ = _ENTRY.unpack(f.read(_ENTRY.size))
+                data_end = offset + length
+        if os.path.getsize(self._data_path) > data_end:
+            with open(self._data_path, 'r+b') as f:
+                f.truncate(data_end)
+
+    def __len__(self):
+        return os.path.getsize(self._index_path) // _ENTRY.size
+
+    def __contains__(self, news):
+        return news_digest(news) in self._digests
+
+    def _view(self):
+        """索引文件的内存映射，新闻数量变化时重新映射"""
+        count = len(self)
+        if count != self._mapped:
+            self.close()
+            if count:
+                with open(self._index_path, 'rb') as f:
+                    self._map = mmap.mmap(f.fileno(), count * _ENTRY.size, access=mmap.ACCESS_READ)
+            self._mapped = count
+        return self._map
+
+    def _entries(self):
+        view = self._view()
+        return _ENTRY.iter_unpack(view) if view is not None else iter(())
+
+    def _entry(self, position):
+        return _ENTRY.unpack_from(self._view(), position * _ENTRY.size)
+
+    def add(self, news):
+        """加入一条新闻
+        :return: 是否是新的新闻
+        """
+        return self.update([news]) == 1
+
+    def update(self, items):
+        """加入多条新闻，已经保存过的新闻会被忽略
+        同一批新闻按发布时间从旧到新写入，丁香园的时间轴是从新到旧排列的
+        :return: 新加入的条数
+        """
+        if self.read_only:
+            raise ValueError('新闻归档是只读打开的')
+        with self._lock:
+            pending = []
+            for news in items:
+                digest = news_digest(news)
+                if digest not in self._digests:
+                    self._digests.add(digest)
+                    pending.append((pub_timestamp(news), digest, news))
+            if not pending:
+                return 0
+            pending.sort(key=lambda item: item[0])
+            entries = []
+            with open(self._data_path, 'ab') as data:
+                offset = data.tell()
+                for pub_date, digest, news in pending:
+                    record = _compress(news, self.compress_level)
+                    data.write(record)
+                    entries.append(_ENTRY.pack(offset, len(record), pub_date, digest))
+                    offset += len(record)
+                data.flush()
+                os.fsync(data.fileno())
+            # 数据写入以后再写索引，中断时多余的数据会在下次打开时去掉
+            with open(self._index_path, 'ab') as index:
+                index.write(b''.join(entries))
+            self._order = None
+            return len(pending)
+
+    def __getitem__(self, position):
+        """按写入顺序读取一条新闻，支持负数下标"""
+        count = len(self)
+        if position < 0:
+            position += count
+        if not 0 <= position < count:
+            raise IndexError('news archive index out of range')
+        return self._read([position])[0]
+
+    def _read(self, positions):
+        news = []
+        with open(self._data_path, 'rb') as data:
+            for position in positions:
+                offset, length, _, _ = self._entry(position)
+                data.seek(offset)
+                news.append(_decompress(data.read(length)))
+        return news
+
+    def _sorted(self):
+        """按发布时间排序的(发布时间列表, 位置列表)，只读取索引，不读取新闻"""
+        count = len(self)
+        if self._order is None or len(self._order[1]) != count:
+            pairs = sorted((pub_date, position) for position, (_, _, pub_date, _) in enumerate(self._entries()))
+            self._order = ([pub_date for pub_date, _ in pairs], [position for _, position in pairs])
+        return self._order
+
+    def _select(self, start, end):
+        times, order = self._sorted()
+        left = bisect_left(times, to_timestamp(start)) if start is not None else 0
+        right = bisect_right(times, to_timestamp(end)) if end is not None else len(times)
+        return order[left:right]
+
+    def page(self, offset=0, limit=20, newest_first=True, start=None, end=None):
+        """按发布时间分页读取，只解压需要的新闻
+        :param offset: 跳过的条数
+        :param limit: 读取的条数，None表示全部读取
+        :param newest_first: 是否从新到旧排列，默认为True
+        :param start: 最早的发布时间(包含)，格式和pycovid.newsindex.to_timestamp()相同
+        :param end: 最晚的发布时间(包含)
+        :return: 新闻列表
+        """
+        order = self._select(start, end)
+        if newest_first:
+            order = order[::-1]
+        stop = None if limit is None else offset + limit
+        return self._read(order[offset:stop])
+
+    def iter_news(self, newest_first=True, start=None, end=None, chunk_size=256):
+        """逐条读取新闻，每次只解压chunk_size条，参数和page()相同"""
+        order = self._select(start, end)
+        if newest_first:
+            order = order[::-1]
+        for i in range(0, len(order), chunk_size):
+            yield from self._read(order[i:i + chunk_size])
+
+    def __iter__(self):
+        """从新到旧逐条读取全部新闻"""
+        return self.iter_news()
+
+    def close(self):
+        """关闭索引文件的内存映射"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._mapped = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
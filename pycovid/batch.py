@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""批量处理保存的丁香园网页，在多个进程中提取数据并执行查询
+用法：python -m pycovid.batch archive/ --queries cn_covid,world_covid --workers 8 --output result.jsonl
+"""
+import argparse                     # 命令行参数
+import glob                         # 按通配符查找网页
+import os                           # 遍历目录
+import sys                          # 输出进度
+import time                         # 统计速度
+from collections import deque       # 按顺序返回的任务
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait    # 多进程
+
+DEFAULT_QUERIES = ('cn_covid', 'world_covid')
+PAGE_SUFFIXES = ('.html', '.htm')
+
+
+def find_pages(sources):
+    """查找需要处理的网页
+    :param sources: 目录、通配符或文件路径，可以是一个字符串或者列表；目录中的.html和.htm文件按文件名排序
+    :return: 网页路径的列表
+    """
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        source = os.fspath(source)
+        if os.path.isdir(source):
+            paths.extend(sorted(os.path.join(source, name) for name in os.listdir(source)
+                                if name.lower().endswith(PAGE_SUFFIXES)))
+        elif glob.has_magic(source):
+            paths.extend(sorted(glob.glob(source, recursive=True)))
+        else:
+            paths.append(source)
+    return paths
+
+
+def _queries(queries):
+    """把查询统一转换为{方法名: 参数}"""
+    if isinstance(queries, str):
+        queries = [name.strip() for name in queries.split(',') if name.strip()]
+    if isinstance(queries, dict):
+        return dict(queries)
+    return {name: {} for name in queries}
+
+
+def _covid_class(language):
+    if language == 'en':
+        from pycovid.covid_en import PyCovid
+        return PyCovid, {'use_it_anyway': True}
+    from pycovid.covid import PyCovid
+    return PyCovid, {'ignore_region': True, 'use_it_anyway': True}
+
+
+def process_page(path, queries=DEFAULT_QUERIES, language='cn'):
+    """处理一个网页，在子进程中执行
+    :param path: 网页路径
+    :param queries: 查询方法名的列表，或者{方法名: 参数}
+    :param language: 'cn'使用pycovid.covid.PyCovid，'en'使用pycovid.covid_en.PyCovid
+    :return: 字典，包含path和results({方法名: 结果})，失败时包含path和error
+    """
+    covid_class, kwargs = _covid_class(language)
+    try:
+        covid = covid_class.from_file(path, **kwargs)
+        results = {name: getattr(covid, name)(**params) for name, params in _queries(queries).items()}
+    except Exception as e:
+        return {'path': path, 'error': f'{type(e).__name__}: {e}'}
+    return {'path': path, 'results': results}
+
+
+def _process_chunk(paths, queries, language):
+    return [process_page(path, queries, language) for path in paths]
+
+
+class BatchProgress:
+    """批量处理的进度"""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        """每秒处理的网页数"""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f'{self.done}/{self.total} 失败{self.errors} {self.elapsed:.1f}s {self.rate:.1f}页/秒'
+
+
+def iter_batches(paths, queries=DEFAULT_QUERIES, workers=None, chunk_size=8, ordered=True, language='cn',
+                 progress=None):
+    """在进程池中处理网页，每完成一组就返回这一组的结果
+    同时提交的任务数量有上限，处理几万个网页时也不会一次创建全部任务
+    :param paths: 网页路径的列表，可以先用find_pages()查找
+    :param queries: 查询方法名的列表，或者{方法名: 参数}，默认为cn_covid和world_covid
+    :param workers: 进程数，默认为CPU核数，设置为0时在当前进程中处理
+    :param chunk_size: 每个任务处理的网页数，默认为8
+    :param ordered: 是否按paths的顺序返回，默认按顺序，设置为False时先完成的先返回
+    :param language: 'cn'或'en'，和process_page()相同
+    :param progress: 每完成一组调用progress(BatchProgress)
+    :return: 生成器，每次返回一组process_page()的结果
+    """
+    paths = list(paths)
+    queries = _queries(queries)
+    stats = BatchProgress(len(paths))
+    chunks = (paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size))
+
+    def finished(results):
+        stats.done += len(results)
+        stats.errors += sum('error' in result for result in results)
+        if progress is not None:
+            progress(stats)
+        return results
+
+    if workers == 0:
+        for chunk in chunks:
+            yield finished(_process_chunk(chunk, queries, language))
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def collect():
+            if ordered:
+                return [pending.popleft().result()]
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+            return [future.result() for future in done]
+
+        for chunk in chunks:
+            pending.append(executor.submit(_process_chunk, chunk, queries, language))
+            while len(pending) >= workers * 2:
+                for results in collect():
+                    yield finished(results)
+        while pending:
+            for results in collect():
+                yield finished(results)
+
+
+def run_batch(paths, queries=DEFAULT_QUERIES, workers=None, chunk_size=8, ordered=True, language='cn',
+              progress=None):
+    """和iter_batches()相同，但逐个返回每个网页的结果"""
+    for results in iter_batches(paths, queries, workers, chunk_size, ordered, language, progress):
+        yield from results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pycovid.batch', description='批量处理保存的丁香园网页')
+    parser.add_argument('sources', nargs='+', help='网页所在的目录、通配符或文件路径')
+    parser.add_argument('-q', '--queries', default=','.join(DEFAULT_QUERIES),
+                        help='用逗号分隔的查询方法，默认为%(default)s')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='进程数，默认为CPU核数，0表示不使用子进程')
+    parser.add_argument('-c', '--chunk-size', type=int, default=8, help='每个任务处理的网页数，默认为%(default)s')
+    parser.add_argument('-u', '--unordered', action='store_true', help='先完成的先输出，不按网页顺序')
+    parser.add_argument('-l', '--language', choices=('cn', 'en'), default='cn', help='使用的PyCovid，默认为cn')
+    parser.add_argument('-o', '--output', default='-', help='输出的JSON Lines文件，默认输出到标准输出')
+    parser.add_argument('--quiet', action='store_true', help='不输出进度')
+    args = parser.parse_args(argv)
+
+    from pycovid.stream import write_jsonl
+    paths = find_pages(args.sources)
+    progress = None if args.quiet else (lambda stats: print(f'\r{stats}', end='', file=sys.stderr, flush=True))
+    results = run_batch(paths, args.queries, args.workers, args.chunk_size, not args.unordered, args.language,
+                        progress)
+    if args.output == '-':
+        write_jsonl(results, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            write_jsonl(results, fp)
+    if not args.quiet:
+        print(file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
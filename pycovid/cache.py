@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import hashlib                      # 缓存文件名
+import os                           # 本地缓存文件
+import re                           # 识别缓存文件名
+import tempfile                     # 原子写入缓存文件
+import threading                    # 多线程共享同一个缓存
+import time                         # 缓存过期时间
+from concurrent.futures import Future    # 等待正在进行的下载
+from pycovid.fetch import Page, get_fetcher    # 下载网页
+
+# 缓存文件名是网址的sha1，目录中的其他文件不属于缓存
+_CACHE_FILE = re.compile(r'[0-9a-f]{40}\.html')
+
+
+class SnapshotCache:
+    """进程共用的网页缓存，按网址保存，在有效期内所有PyCovid共用同一次下载
+    SnapshotCache有fetch(url)方法，可以直接作为下载器使用：
+        pycovid.fetch.set_fetcher(SnapshotCache(ttl=300))
+    """
+
+    def __init__(self, ttl=300, directory=None, fetcher=None):
+        """
+        :param ttl: 缓存的有效期(秒)，默认为300
+        :param directory: 本地缓存目录，设置后新启动的进程可以直接使用有效期内的缓存，默认不保存到本地
+        :param fetcher: 缓存过期后使用的下载器，默认使用进程共用的Fetcher
+        """
+        self.ttl = ttl
+        self.directory = directory
+        self.fetcher = fetcher
+        self._entries = {}      # 网址: (下载时间, Page)
+        self._pending = {}      # 网址: 正在进行的下载
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def fetch(self, url):
+        """获取网页，缓存有效时直接返回，多个线程同时请求同一个网址时只下载一次
+        :param url: 网页地址
+        :return: Page
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                return entry[1]
+            future = self._pending.get(url)
+            leader = future is None
+            if leader:
+                future = self._pending[url] = Future()
+        if not leader:
+            return future.result()
+        try:
+            fetched_at, page = self._load(url)
+            if page is None:
+                page = (self.fetcher or get_fetcher()).fetch(url)
+                fetched_at = time.time()
+                self._save(url, page)
+        except BaseException as e:
+            with self._lock:
+                del self._pending[url]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[url] = (fetched_at, page)
+            del self._pending[url]
+        future.set_result(page)
+        return page
+
+    def invalidate(self, url=None):
+        """删除缓存，下次请求时重新下载
+        :param url: 网页地址，默认删除全部，只删除缓存自己保存的文件
+        """
+        with self._lock:
+            urls = list(self._entries) if url is None else [url]
+            for u in urls:
+                self._entries.pop(u, None)
+        if self.directory is None:
+            return
+        if url is None:
+            paths = [os.path.join(self.directory, f) for f in os.listdir(self.directory)
+                     if _CACHE_FILE.fullmatch(f)]
+        else:
+            paths = [self._path(url)]
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.html')
+
+    def _load(self, url):
+        """读取本地缓存，过期或不存在时返回(None, None)"""
+        if self.directory is None:
+            return None, None
+        path = self._path(url)
+        try:
+            fetched_at = os.path.getmtime(path)
+            if time.time() - fetched_at >= self.ttl:
+                return None, None
+            with open(path, 'rb') as f:
+                return fetched_at, Page(url, f.read())
+        except FileNotFoundError:
+            return None, None
+
+    def _save(self, url, page):
+        """保存到本地缓存，先写入临时文件再替换，其他进程不会读到写了一半的文件"""
+        if self.directory is None:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(page.content)
+            os.replace(tmp, self._path(url))
+        except BaseException:
+            os.remove(tmp)
+            raise
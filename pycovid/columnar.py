@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import heapq                        # 不排序全部数据获取前n名
+from array import array             # 没有安装numpy时使用的整数列
+
+# 输出的字段名: 原始数据的字段名
+COUNT_COLUMNS = {
+    'currentConfirmed': 'currentConfirmedCount',
+    'confirmed': 'confirmedCount',
+    'cured': 'curedCount',
+    'dead': 'deadCount',
+}
+INCR_COLUMNS = {
+    'confirmedIncr': 'confirmedIncr',
+    'curedIncr': 'curedIncr',
+    'deadIncr': 'deadIncr',
+}
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class Table:
+    """按列保存的数据表，名称列为list，人数列为numpy.int64数组或array('q')
+    排序、筛选、取前n名都只处理下标，不会为每一行创建字典
+    """
+
+    def __init__(self, columns, numpy=None):
+        """
+        :param columns: 字典，{列名: 列数据}，所有列的长度必须相同
+        :param numpy: numpy模块，使用array('q')时为None
+        """
+        self._columns = dict(columns)
+        self._numpy = numpy
+        lengths = {len(column) for column in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('所有列的长度必须相同')
+        self._length = lengths.pop() if lengths else 0
+
+    @property
+    def columns(self):
+        """全部列名"""
+        return tuple(self._columns)
+
+    @property
+    def backend(self):
+        return 'numpy' if self._numpy is not None else 'array'
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        """获取一列数据"""
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __repr__(self):
+        return f'<Table {self._length} rows: {", ".join(self._columns)} ({self.backend})>'
+
+    def select(self, *names):
+        """只保留指定的列，列数据不会被复制"""
+        return Table({name: self._columns[name] for name in names}, self._numpy)
+
+    def rename(self, mapping):
+        """修改列名
+        :param mapping: 字典，{原列名: 新列名}
+        """
+        return Table({mapping.get(name, name): column for name, column in self._columns.items()}, self._numpy)
+
+    def take(self, indices):
+        """按下标取出若干行，返回新的Table"""
+        np = self._numpy
+        if np is not None:
+            indices = np.asarray(indices, dtype=np.intp)
+            return Table({name: column[indices] if isinstance(column, np.ndarray) else [column[i] for i in indices]
+                          for name, column in self._columns.items()}, np)
+        columns = {}
+        for name, column in self._columns.items():
+            taken = [column[i] for i in indices]
+            columns[name] = array('q', taken) if isinstance(column, array) else taken
+        return Table(columns)
+
+    def sort(self, by, reverse=False):
+        """按某一列排序
+        :param by: 列名
+        :param reverse: 是否从大到小排序，默认从小到大
+        """
+        column = self._columns[by]
+        np = self._numpy
+        if np is not None and isinstance(column, np.ndarray):
+            # 倒序时相同的值也保持原来的顺序
+            return self.take(np.argsort(-column if reverse else column, kind='stable'))
+        return self.take(sorted(range(self._length), key=column.__getitem__, reverse=reverse))
+
+    def filter(self, mask):
+        """按布尔序列筛选行，使用numpy时可以写作table.filter(table['confirmed'] > 1000)
+        :param mask: 和表长度相同的布尔序列
+        """
+        np = self._numpy
+        if np is not None:
+            return self.take(np.flatnonzero(np.asarray(mask, dtype=bool)))
+        return self.take([i for i, keep in enumerate(mask) if keep])
+
+    def where(self, by, min=None, max=None):
+        """筛选某一列的值在[min, max]之间的行
+        :param by: 列名
+        :param min: 最小值(包含)，默认不限制
+        :param max: 最大值(包含)，默认不限制
+        """
+        column = self._columns[by]
+        np = self._numpy
+        if np is not None and isinstance(column, np.ndarray):
+            mask = np.ones(self._length, dtype=bool)
+            if min is not None:
+                mask &= column >= min
+            if max is not None:
+                mask &= column <= max
+            return self.filter(mask)
+        return self.take([i for i, value in enumerate(column)
+                          if (min is None or value >= min) and (max is None or value <= max)])
+
+    def top(self, n, by):
+        """获取某一列最大的n行，从大到小排列，不会排序全部数据
+        :param n: 行数
+        :param by: 列名
+        """
+        column = self._columns[by]
+        n = max(0, min(n, self._length))
+        np = self._numpy
+        if np is not None and isinstance(column, np.ndarray):
+            if n == 0:
+                return self.take([])
+            # 第n大的值，值相同时保留靠前的行，和heapq.nlargest的结果一致
+            kth = -np.partition(-column, n - 1)[n - 1]
+            greater = np.flatnonzero(column > kth)
+            rows = np.concatenate((greater, np.flatnonzero(column == kth)[:n - len(greater)]))
+            return self.take(rows[np.lexsort((rows, -column[rows]))])
+        return self.take(heapq.nlargest(n, range(self._length), key=column.__getitem__))
+
+    def to_dicts(self):
+        """转换为字典列表，格式和world_covid()、cn_covid()相同"""
+        names = list(self._columns)
+        columns = [column.tolist() if hasattr(column, 'tolist') else column for column in self._columns.values()]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def _int_column(values, np):
+    if np is not None:
+        return np.fromiter(values, dtype=np.int64)
+    return array('q', values)
+
+
+def _build(rows, names, counts, np):
+    columns = {name: [get(row) for row in rows] for name, get in names.items()}
+    for name, get in counts.items():
+        columns[name] = _int_column((get(row) for row in rows), np)
+    return Table(columns, np)
+
+
+def _backend(backend):
+    if backend == 'array':
+        return None
+    np = _numpy()
+    if np is None and backend == 'numpy':
+        raise ImportError('没有安装numpy，请运行pip install numpy，或者设置backend="array"')
+    return np
+
+
+def province_table(c_data, backend='auto'):
+    """把PyCovid().c_data转换为按列保存的数据表
+    :param c_data: 各省份的原始数据
+    :param backend: 'numpy'、'array'或'auto'，默认在安装了numpy时使用numpy
+    """
+    counts = {name: (lambda row, key=key: row[key]) for name, key in COUNT_COLUMNS.items()}
+    return _build(c_data, {'provinceName': lambda row: row['provinceShortName']}, counts, _backend(backend))
+
+
+def city_table(province, backend='auto', ignore_cities=(), city_name=None):
+    """把某个省份的城市数据转换为按列保存的数据表
+    :param province: c_data中的一个省份
+    :param backend: 'numpy'、'array'或'auto'，默认在安装了numpy时使用numpy
+    :param ignore_cities: 不是城市的地区
+    :param city_name: 转换城市名的函数，例如pycovid.names.city_display_name
+    """
+    rows = [city for city in province['cities'] if city['cityName'] not in ignore_cities]
+    counts = {name: (lambda row, key=key: row[key]) for name, key in COUNT_COLUMNS.items()}
+    city_name = city_name or (lambda name: name)
+    return _build(rows, {'cityName': lambda row: city_name(row['cityName'])}, counts, _backend(backend))
+
+
+def world_table(w_data, names_en=None, backend='auto', ignore_countries=()):
+    """把PyCovid().w_data转换为按列保存的数据表，新增人数来自incrVo，缺失时为0
+    :param w_data: 各国家的原始数据
+    :param names_en: 国家的中文名到英文名的对照表
+    :param backend: 'numpy'、'array'或'auto'，默认在安装了numpy时使用numpy
+    :param ignore_countries: 不是国家的地区
+    """
+    names_en = names_en or {}
+    rows = [country for country in w_data if country['provinceName'] not in ignore_countries]
+    counts = {name: (lambda row, key=key: row[key]) for name, key in COUNT_COLUMNS.items()}
+    for name, key in INCR_COLUMNS.items():
+        counts[name] = lambda row, key=key: (row.get('incrVo') or {}).get(key) or 0
+    names = {
+        'countryNameEn': lambda row: names_en.get(row['provinceName'], ''),
+        'countryNameCn': lambda row: row['provinceName'],
+    }
+    return _build(rows, names, counts, _backend(backend))
@@ -1,96 +1,178 @@
 #!/usr/bin/env python
 # encoding='utf-8'
 import json                         # 数据预处理
-import requests                     # 网络请求
-from bs4 import BeautifulSoup       # HTML解析
-import locale                       # 获取系统语言
+from functools import cached_property    # 延迟解析数据
+from pycovid.aggregate import Aggregator        # 排名和汇总
+from pycovid.columnar import province_table, world_table    # 按列保存的数据表
+from pycovid.danger import DangerAreaIndex        # 中高风险地区的索引
+from pycovid.fetch import get_fetcher          # 共用的连接池
+from pycovid.metrics import register, stage    # 计时
+from pycovid.index import index_provinces, index_cities, index_countries    # 按名称查询
+from pycovid.names import (COUNTRIES_NAME, IGNORE_COUNTRIES, IGNORE_CITIES, SPECIAL_REGIONS,    # 名称对照表
+                           country_name_zh)
+from pycovid.projection import (CITY_FIELDS, COUNTRY_FIELDS, PROVINCE_FIELDS, ROW_TYPES, count_names,    # 字段选择
+                                projection)
+from pycovid.records import City, Country, DangerArea, NewsItem, Province    # 节省内存的数据类型
+from pycovid.serializer import get_serializer    # 转换为json
+from pycovid.snapshot import SnapshotLoader    # 从本地数据创建
+
+
+def _system_language():
+    """获取系统语言，locale在需要检查时才导入"""
+    import locale
+    return locale.getdefaultlocale()[0]
 
 
 class CovidException(Exception):
     def __init__(self, *args):
         self.args = args
 
-class PyCovid:
-    """获取国内外的疫情数据"""
+class PyCovid(SnapshotLoader):
+    """获取国内外的疫情数据
+    如果不想访问网络，可以使用PyCovid.from_html()、from_bytes()、from_file()或from_json_dir()从本地数据创建
+    """
 
-    def __init__(self, ignore_region=False, use_it_anyway=False):
+    def __init__(self, ignore_region=False, use_it_anyway=False, fetcher=None):
         """从网站获取原始html代码，并分别对国内外的数据进行处理，只保留json格式的数据
         :param ignore_region: 是否忽略系统语言检测，默认不忽略，如果你的系统语言不是中文，而且你想获取国内的数据，可以设置为True以忽略异常
         :param use_it_anyway: 本程序已停止支持，如果想继续使用，可以设置为True
+        :param fetcher: 下载器，默认使用整个进程共用的Fetcher，可以通过pycovid.fetch.set_fetcher()替换，也可以使用pycovid.cache.SnapshotCache
         如需调用原始数据，请自行添加参数获取
         如果您想获取国内疫情信息的原始数据，请使用PyCovid().c_data
         如果您想获取国外疫情信息的原始数据，请使用PyCovid().w_data
         如果您想获取国内疫情相关的新闻信息，请使用PyCovid().n_data
         """
+        self._setup(ignore_region=ignore_region, use_it_anyway=use_it_anyway)
+        try:
+            with stage('fetch') as timer:
+                self.page = (fetcher or get_fetcher()).fetch(self.url)
+                timer.nbytes = 0 if self.page.not_modified else len(self.page.content)
+        except Exception:
+            raise CovidException('网络连接失败，请检查网络连接。')
+        self.response = self.page.response
+        if self.response is not None:
+            self.response.encoding = 'utf8'
+        # 只扫描一次网页源码，c_data、w_data、n_data在第一次使用时才会解析
+        # 网页没有变化时(304)不会重新提取数据
+        self.scripts = self.page.scripts
+
+    def _setup(self, ignore_region=False, use_it_anyway=False):
+        """检查参数和系统语言，本地创建时也需要检查"""
         if not use_it_anyway:
             raise CovidException('此程序已经停止维护，请使用pyeumonia来获取数据，如果你想继续使用本程序，请将参数use_it_anyway设置为True')
         self.ignore_region = ignore_region
         # 如果系统语言不是中文，则抛出异常并提示用户使用其他方法进行调用(如果ignore_region为True，则不抛出异常)
-        if locale.getdefaultlocale()[0] != 'zh_CN' and not self.ignore_region:
+        if not self.ignore_region and _system_language() != 'zh_CN':
             raise CovidException("""Your system language is not Chinese, please run: "from pycovid.covid_en import PyCovid" instead.
 If you want to ignore system language, please run: "from pycovid.covid import PyCovid(ignore_region=True)
 """)
         self.url = "https://ncov.dxy.cn/ncovh5/view/pneumonia"
+
+    @cached_property
+    def c_data(self):
+        """国内疫情信息的原始数据"""
+        return self._load_script('getAreaStat')
+
+    @cached_property
+    def w_data(self):
+        """国外疫情信息的原始数据"""
+        return self._load_script('getListByCountryTypeService2true')
+
+    @cached_property
+    def n_data(self):
+        """国内疫情相关的新闻信息"""
+        return self._load_script('getTimelineService1')
+
+    @cached_property
+    def _province_index(self):
+        """按省份简称和全称建立的索引"""
+        return index_provinces(self.c_data)
+
+    @cached_property
+    def _city_index(self):
+        """每个省份的城市索引"""
+        return index_cities(self.c_data, IGNORE_CITIES)
+
+    @cached_property
+    def _country_index(self):
+        """按国家中文名和英文名建立的索引"""
+        return index_countries(self.w_data, COUNTRIES_NAME, IGNORE_COUNTRIES)
+
+    @cached_property
+    def _province_table(self):
+        """按列保存的各省份数据"""
+        return province_table(self.c_data)
+
+    @cached_property
+    def _world_table(self):
+        """按列保存的各国家数据"""
+        return world_table(self.w_data, COUNTRIES_NAME, ignore_countries=IGNORE_COUNTRIES)
+
+    @cached_property
+    def _danger_index(self):
+        """中高风险地区的索引，地区名称只处理一次"""
+        return DangerAreaIndex(self.c_data)
+
+    @cached_property
+    def aggregate(self):
+        """排名和汇总，例如covid.aggregate.top(10)，结果在这个快照中会被缓存"""
+        return Aggregator(self)
+
+    def _load_script(self, script_id):
+        """解析网页中指定id的数据"""
         try:
-            self.response = requests.get(self.url)
-        except Exception:
-            raise CovidException('网络连接失败，请检查网络连接。')
-        self.response.encoding = 'utf8'
-        self.c_soup = BeautifulSoup(self.response.text, "html.parser")
-        self.c_soup = self.c_soup.find('script', id='getAreaStat')
-        self.c_data = json.loads(str(self.c_soup)
-                                 .strip('<script id="getAreaStat">try { window.getAreaStat = ')
-                                 .strip('}catch(e){}</script>')
-                                 )
-        self.w_soup = BeautifulSoup(self.response.text, "html.parser")
-        self.w_soup = self.w_soup.find('script', id='getListByCountryTypeService2true')
-        self.w_data = json.loads(str(self.w_soup)
-                                 .strip(
-            '<script id="getListByCountryTypeService2true">try { window.getListByCountryTypeService2true = ')
-                                 .strip('}catch(e){}</script>')
-                                 )
-        self.n_soup = BeautifulSoup(self.response.text, "html.parser")
-        self.n_soup = self.n_soup.find('script', id='getTimelineService1')
-        self.n_data = json.loads(str(self.n_soup)
-                                 .strip('<script id="getTimelineService1">try { window.getTimelineService1 = ')
-                                 .strip('}catch(e){}</script>')
-                                 )
-
-    def cn_covid(self, current=True, confirmed=True, cured=True, dead=True, province_name=None, return_to_json=False):
+            text = self.scripts[script_id]
+        except KeyError:
+            raise CovidException(f'网页中没有找到{script_id}的数据。')
+        with stage(f'decode.{script_id}', len(text)):
+            return json.loads(text)
+
+    def cn_covid(self, current=True, confirmed=True, cured=True, dead=True, province_name=None, return_to_json=False,
+                 return_to_table=False, row_type='dict'):
         """获取国内疫情数据
         :param current: 是否获取现存确诊人数，默认获取
         :param confirmed: 是否获取累计确诊人数，默认获取
         :param cured: 是否获取累计治愈人数，默认获取
         :param dead: 是否获取累计死亡人数，默认获取
         :param province_name: 是否获取指定省份的数据，默认获取全国数据，如果想获取北京的数据，参数为：'北京'或'北京市'
-        :param return_to_json: 是否返回json格式的数据，默认返回字典格式数据
+        :param return_to_json: 是否返回json格式的数据，默认返回字典格式数据，json的格式由pycovid.serializer.set_serializer()设置
+        :param return_to_table: 是否返回按列保存的数据表(pycovid.columnar.Table)，适合排序、筛选等批量计算，默认不返回
+        :param row_type: 每一行的类型，'dict'、'tuple'、'namedtuple'或'record'(pycovid.records中使用__slots__的类型)，默认为dict，字段的顺序和dict相同
         :return: 字典，包含国内各个省份的疫情数据
         """
         if not current and not confirmed and not cured and not dead:
             raise CovidException('参数current、confirmed、cured、dead中至少需要获取一个数据')
-        data = []
-        for province in self.c_data:  # 获取每个省份的现存确诊、累计确诊、累计治愈、累计死亡人数
-            p_data = {
-                'provinceName': province['provinceShortName']
-            }
-            if current:
-                p_data['currentConfirmed'] = province['currentConfirmedCount']
-            if confirmed:
-                p_data['confirmed'] = province['confirmedCount']
-            if cured:
-                p_data['cured'] = province['curedCount']
-            if dead:
-                p_data['dead'] = province['deadCount']
-            data.append(p_data)
-            if province_name in [province['provinceShortName'], province['provinceName']]:
-                data = p_data
-                break
+        self._check_row_type(row_type, ROW_TYPES)
+        if return_to_table:
+            table = self._province_table
+            if province_name is not None and province_name in self._province_index:
+                short_name = self._province_index[province_name]['provinceShortName']
+                table = table.take([table['provinceName'].index(short_name)])
+            flags = {'currentConfirmed': current, 'confirmed': confirmed, 'cured': cured, 'dead': dead}
+            return table.select('provinceName', *[column for column, flag in flags.items() if flag])
+        if province_name is not None and province_name in self._province_index:
+            data = self._province_data(current, confirmed, cured, dead, row_type)(self._province_index[province_name])
+        else:
+            data = list(self.iter_cn_covid(current, confirmed, cured, dead, row_type))
         if return_to_json:
-            return json.dumps(data, indent=4, ensure_ascii=False)
+            return get_serializer().dumps(data)
         return data
 
+    def iter_cn_covid(self, current=True, confirmed=True, cured=True, dead=True, row_type='dict'):
+        """逐个返回各个省份的疫情数据，不会一次生成全部数据，参数和cn_covid()相同"""
+        if not current and not confirmed and not cured and not dead:
+            raise CovidException('参数current、confirmed、cured、dead中至少需要获取一个数据')
+        self._check_row_type(row_type, ROW_TYPES)
+        return map(self._province_data(current, confirmed, cured, dead, row_type), self.c_data)
+
+    @staticmethod
+    def _province_data(current, confirmed, cured, dead, row_type='dict'):
+        """编译获取省份的现存确诊、累计确诊、累计治愈、累计死亡人数的函数，相同的参数只编译一次"""
+        return projection(PROVINCE_FIELDS, ['provinceName', *count_names(current, confirmed, cured, dead)], row_type,
+                          'ProvinceRow', Province)
+
     def province_covid(self, province='北京', include_province_name=True, current=True, confirmed=True, cured=True,
-                       dead=True, city_name=None, return_to_json=False):
+                       dead=True, city_name=None, return_to_json=False, row_type='dict'):
         """获取某个省份的数据
         :param province: 想要获取的疫情数据，默认为北京
         :param include_province_name: 返回值是否包含省份名，默认不包含
@@ -99,74 +181,20 @@ If you want to ignore system language, please run: "from pycovid.covid import Py
         :param cured: 是否获取累计治愈人数，默认获取
         :param dead: 是否获取累计死亡人数，默认获取
         :param city_name: 是否获取指定城市的数据，默认获取全国数据，如果想获取广州的数据，参数为：'广州'
-        :param return_to_json: 是否返回json格式的数据，默认返回字典格式数据
+        :param return_to_json: 是否返回json格式的数据，默认返回字典格式数据，json的格式由pycovid.serializer.set_serializer()设置
+        :param row_type: 每一行的类型，'dict'、'tuple'、'namedtuple'或'record'(pycovid.records中使用__slots__的类型)，默认为dict，字段的顺序和dict相同
         :return: 字典，包含该省份各个城市的疫情数据
         """
         if not current and not confirmed and not cured and not dead:
             raise CovidException('参数current、confirmed、cured、dead中至少需要获取一个数据')
+        self._check_row_type(row_type, ROW_TYPES)
         data = []
-        if province is None:
-            raise CovidException('参数province不能为空')
-        # 这些地区不是城市，所以忽略。
-        ignore_cities = ['待明确地区', '境外输入', '外地来沪', '境外来沪', '境外输入人员', '外地来津', '外地来京', '省十里丰监狱', '省级（湖北输入）']
-        for province_data in self.c_data:
-            # 假如用户想查询北京的数据，无论用户输入北京还是北京市，都可以获取到北京的数据
-            if province == province_data['provinceShortName'] or province == province_data['provinceName']:
-                if province_data['provinceShortName'] in ['香港', '澳门', '台湾']:
-                    raise CovidException(f'如果想获取港澳台的数据，请使用cn_covid()并设置province_name参数。')
-                for city in province_data['cities']:
-                    cityname = city['cityName']
-                    if city['cityName'] in ignore_cities:
-                        continue
-                    if city['cityName'] == '大兴安岭':
-                        cityname = '大兴安岭地区'
-                    city_names = [
-                        "锡林郭勒盟",
-                        "阿拉善盟",
-                        "兴安盟",
-                        "甘孜州",
-                        "凉山州",
-                        "阿坝州",
-                        "德宏州",
-                        "红河州",
-                        "大理州",
-                        "文山州",
-                        "楚雄州",
-                        "赣江新区",
-                        "恩施州",
-                        "神农架林区",
-                        "雄安新区",
-                        "喀什地区",
-                        "伊犁州",
-                        "兵团第四师",
-                        "昌吉州",
-                        "兵团第九师",
-                        "巴州（巴音郭楞蒙古自治州）", 
-                        "兵团第十二师",
-                        "兵团第七师",
-                        "阿克苏地区",
-                        "黔南州",
-                        "黔东南州",
-                        "黔西南州",
-                        "海北州",
-                    ]
-                    if cityname not in city_names:
-                        cityname = cityname + '市'
-                    city_data = {
-                        'cityName': cityname
-                    }
-                    if current:
-                        city_data['currentConfirmed'] = city['currentConfirmedCount']
-                    if confirmed:
-                        city_data['confirmed'] = city['confirmedCount']
-                    if cured:
-                        city_data['cured'] = city['curedCount']
-                    if dead:
-                        city_data['dead'] = city['deadCount']
-                    if city_name == city['cityName']:
-                        return city_data
-                    data.append(city_data)
-                break
+        province_data = self._find_province(province)
+        if province_data is not None:
+            cities = self._city_index[province_data['provinceShortName']]
+            if city_name is not None and city_name in cities:
+                return self._city_data(current, confirmed, cured, dead, row_type)(cities[city_name])
+            data = list(self.iter_province_covid(province, current, confirmed, cured, dead, row_type))
         if not data:
             raise CovidException(f'没有找到{province}的数据。')
         if include_province_name:
@@ -175,11 +203,38 @@ If you want to ignore system language, please run: "from pycovid.covid import Py
                 'cities': data
             }
         if return_to_json:
-            return json.dumps(data, indent=4, ensure_ascii=False)
+            return get_serializer().dumps(data)
         return data
 
+    def iter_province_covid(self, province='北京', current=True, confirmed=True, cured=True, dead=True, row_type='dict'):
+        """逐个返回某个省份各个城市的疫情数据，不会一次生成全部数据，参数和province_covid()相同"""
+        if not current and not confirmed and not cured and not dead:
+            raise CovidException('参数current、confirmed、cured、dead中至少需要获取一个数据')
+        self._check_row_type(row_type, ROW_TYPES)
+        province_data = self._find_province(province)
+        if province_data is None:
+            raise CovidException(f'没有找到{province}的数据。')
+        project = self._city_data(current, confirmed, cured, dead, row_type)
+        return (project(city) for city in province_data['cities'] if city['cityName'] not in IGNORE_CITIES)
+
+    def _find_province(self, province):
+        """根据省份的简称或全称查找省份，港澳台的数据只能通过cn_covid()获取"""
+        if province is None:
+            raise CovidException('参数province不能为空')
+        # 假如用户想查询北京的数据，无论用户输入北京还是北京市，都可以获取到北京的数据
+        province_data = self._province_index.get(province)
+        if province_data is not None and province_data['provinceShortName'] in SPECIAL_REGIONS:
+            raise CovidException(f'如果想获取港澳台的数据，请使用cn_covid()并设置province_name参数。')
+        return province_data
+
+    @staticmethod
+    def _city_data(current, confirmed, cured, dead, row_type='dict'):
+        """编译获取城市的现存确诊、累计确诊、累计治愈、累计死亡人数的函数，相同的参数只编译一次"""
+        return projection(CITY_FIELDS, ['cityName', *count_names(current, confirmed, cured, dead)], row_type,
+                          'CityRow', City)
+
     def world_covid(self, current=True, confirmed=True, cured=True, dead=True, confirmed_incr=True, cured_incr=True,
-                    dead_incr=True, name=None, return_to_json=False):
+                    dead_incr=True, name=None, return_to_json=False, return_to_table=False, row_type='dict'):
         """获取全球疫情数据
         :param current: 是否获取现存确诊人数，默认获取
         :param confirmed: 是否获取累计确诊人数，默认获取
@@ -188,392 +243,181 @@ If you want to ignore system language, please run: "from pycovid.covid import Py
         :param confirmed_incr: 是否获取新增确诊人数，默认获取
         :param cured_incr: 是否获取新增治愈人数，默认获取
         :param dead_incr: 是否获取新增死亡人数，默认获取
-        :param name: 是否获取指定国家的数据，默认获取全国数据，如果想获取日本的数据，参数为：'日本'或'Japan'
-        :param return_to_json: 是否返回json格式的数据，默认返回字典格式数据
+        :param name: 是否获取指定国家的数据，默认获取全国数据，如果想获取日本的数据，参数为：'日本'或'Japan'(不区分大小写)
+        :param return_to_json: 是否返回json格式的数据，默认返回字典格式数据，json的格式由pycovid.serializer.set_serializer()设置
+        :param return_to_table: 是否返回按列保存的数据表(pycovid.columnar.Table)，适合排序、筛选等批量计算，默认不返回
+        :param row_type: 每一行的类型，'dict'、'tuple'、'namedtuple'或'record'(pycovid.records中使用__slots__的类型)，默认为dict，字段的顺序和dict相同
         :return: 字典，包含全球各个国家的疫情数据
         """
         if not current and not confirmed and not cured and not dead and not confirmed_incr and not cured_incr and not dead_incr:
             raise CovidException('参数current、confirmed、cured、dead、confirmed_incr、cured_incr、dead_incr中至少需要获取一个数据')
-        countries_name = {
-            "法国": "France",
-            "德国": "Germany",
-            "韩国": "Korea",
-            "英国": "United Kingdom",
-            "西班牙": "Spain",
-            "意大利": "Italy",
-            "巴西": "Brazil",
-            "土耳其": "Turkey",
-            "荷兰": "Netherlands",
-            "俄罗斯": "Russia",
-            "日本": "Japan",
-            "比利时": "Belgium",
-            "中国": "China",
-            "奥地利": "Austria",
-            "瑞士": "Switzerland",
-            "希腊": "Greece",
-            "伊朗": "Iran",
-            "丹麦": "Denmark",
-            "墨西哥": "Mexico",
-            "瑞典": "Sweden",
-            "斯洛伐克": "Slovakia",
-            "智利": "Chile",
-            "塞尔维亚": "Serbia",
-            "伊拉克": "Iraq",
-            "美国": "United States",
-            "爱尔兰": "Ireland",
-            "乌克兰": "Ukraine",
-            "哈萨克斯坦": "Kazakhstan",
-            "秘鲁": "Peru",
-            "格鲁吉亚": "Georgia",
-            "斯洛文尼亚": "Slovenia",
-            "罗马尼亚": "Romanian",
-            "约旦": "Jordan",
-            "黎巴嫩": "Lebanon",
-            "葡萄牙": "Portugal",
-            "波多黎各": "Puerto Rico",
-            "危地马拉": "Guatemala",
-            "立陶宛": "Lithuania",
-            "蒙古": "Mongolia",
-            "阿塞拜疆": "Azerbaijan",
-            "澳大利亚": "Australia",
-            "克罗地亚": "Croatia",
-            "多米尼加": "dominica",
-            "玻利维亚": "Bolivia",
-            "巴拿马": "Panama",
-            "孟加拉国": "Bangladesh",
-            "捷克": "Czech Republic",
-            "塞浦路斯": "Cyprus",
-            "留尼旺": "Reunion",
-            "印度": "India",
-            "加拿大": "Canada",
-            "保加利亚": "Bulgaria",
-            "摩洛哥": "Morocco",
-            "拉脱维亚": "Latvia",
-            "巴勒斯坦": "Palestine",
-            "乌拉圭": "Uruguay",
-            "巴基斯坦": "Pakistan",
-            "沙特阿拉伯": "Saudi Arabia",
-            "以色列": "Israel",
-            "利比亚": "Libya",
-            "毛里求斯": "Mauritius",
-            "亚美尼亚": "Armenia",
-            "阿联酋": "U.A.E",
-            "马提尼克": "Martinique",
-            "巴拉圭": "Paraguay",
-            "埃及": "Egypt",
-            "爱沙尼亚": "Estonia",
-            "新西兰": "New Zealand",
-            "瓜德罗普岛": "Guadeloupe",
-            "委内瑞拉": "Venezuela",
-            "马来西亚": "Malaysia",
-            "博茨瓦纳": "Botswana",
-            "摩尔多瓦": "Moldova",
-            "卡塔尔": "Qatar",
-            "阿根廷": "Argentina",
-            "巴林": "Bahrain",
-            "埃塞俄比亚": "Ethiopia",
-            "阿尔及利亚": "Algeria",
-            "文莱": "Brunei",
-            "特立尼达和多巴哥": "Trinidad and Tobago",
-            "阿曼": "Oman",
-            "缅甸": "Myanmar",
-            "法属圭亚那": "French Guiana",
-            "牙买加": "Jamaica",
-            "黑山": "Montenegro",
-            "哥斯达黎加": "Costa Rica",
-            "古巴": "Cuba",
-            "白俄罗斯": "Belarus",
-            "莫桑比克": "Mozambique",
-            "阿尔巴尼亚": "Albania",
-            "巴巴多斯": "Barbados",
-            "芬兰": "Finland",
-            "肯尼亚": "Kenya",
-            "斯威士兰": "Eswatini",
-            "斯里兰卡": "Sri Lanka",
-            "贝宁": "Benin",
-            "刚果（金）": "Democratic Republic of the Congo",
-            "不丹": "Bhutan",
-            "阿富汗": "Afghanistan",
-            "苏里南": "Suriname",
-            "新喀里多尼亚": "New Caledonia",
-            "哥伦比亚": "Colombia",
-            "伯利兹": "Belize",
-            "尼日利亚": "Nigeria",
-            "圭亚那": "Guyana",
-            "泽西岛": "Jersey",
-            "乌兹别克斯坦": "Uzbekistan",
-            "布隆迪共和国": "Burundi",
-            "加纳": "Ghana",
-            "纳米比亚": "Namibia",
-            "厄瓜多尔": "Ecuador",
-            "库拉索岛": "Curacao",
-            "卢旺达": "Rwanda",
-            "马约特": "Mayotte",
-            "喀麦隆": "Cameroon",
-            "安哥拉": "Angola",
-            "坦桑尼亚": "Tanzania",
-            "萨尔瓦多": "El Salvador",
-            "关岛": "Guam",
-            "马尔代夫": "Maldives",
-            "阿鲁巴": "Aruba",
-            "叙利亚": "Syria",
-            "开曼群岛": "Cayman Islands",
-            "根西岛": "Guernsey",
-            "巴哈马": "Bahamas",
-            "莱索托": "Lesotho",
-            "科特迪瓦": "Côte d’Ivoire",
-            "苏丹": "Sudan",
-            "马拉维": "Malawi",
-            "越南": "Vietnam",
-            "毛里塔尼亚": "Mauritania",
-            "吉尔吉斯斯坦": "Kyrgyzstan",
-            "佛得角": "Cape Verde",
-            "塞舌尔": "Seychelles",
-            "马恩岛": "Isle of Man",
-            "马达加斯加": "Madagascar",
-            "泰国": "Thailand",
-            "海地": "Haiti",
-            "加蓬": "Gabon",
-            "挪威": "Norway",
-            "卢森堡": "Luxembourg",
-            "索马里": "Somalia",
-            "马里": "Mali",
-            "刚果（布）": "Congo (Brazzaville)",
-            "新加坡": "Singapore",
-            "印度尼西亚": "Indonesia",
-            "多米尼克": "Dominica",
-            "赞比亚共和国": "Zambia",
-            "百慕大": "Bermuda",
-            "美属维尔京群岛": "United States Virgin Islands",
-            "多哥": "Togo",
-            "斐济": "Fiji",
-            "尼加拉瓜": "Nicaragua",
-            "塞内加尔": "Senegal",
-            "格林那达": "Grenada",
-            "北马里亚纳群岛联邦": "Commonwealth of the Northern Mariana Islands",
-            "突尼斯": "Tunisia",
-            "摩纳哥": "Monaco",
-            "匈牙利": "Hungary",
-            "圣马丁岛": "Saint Martin",
-            "也门共和国": "Yemen",
-            "格陵兰": "Greenland",
-            "圣文森特和格林纳丁斯": "Saint Vincent and the Grenadines",
-            "冰岛": "Iceland",
-            "波兰": "Poland",
-            "中非共和国": "Central African Republic",
-            "几内亚": "Guinea",
-            "马耳他": "Malta",
-            "安提瓜和巴布达": "Antigua and Barbuda",
-            "布基纳法索": "Burkina Faso",
-            "荷属圣马丁": "St. Maarten, The Netherlands",
-            "南苏丹": "South Sudan",
-            "科威特": "Kuwait",
-            "圣其茨和尼维斯": "Saint-Žić and Nevis",
-            "安道尔": "Andorra",
-            "列支敦士登": "Liechtenstein",
-            "科摩罗": "Comoros",
-            "圣巴泰勒米岛": "Saint Barthelemy Island",
-            "赤道几内亚": "Equatorial Guinea",
-            "东帝汶": "Timor-Leste",
-            "圣马力诺": "San Marino",
-            "英属维尔京群岛": "British Virgin Islands",
-            "巴布亚新几内亚": "Papua New Guinea",
-            "乌干达": "Uganda",
-            "特克斯和凯科斯群岛": "Turks and Caicos Islands",
-            "圣卢西亚": "Saint Lucia",
-            "安圭拉": "Anguilla",
-            "吉布提": "Djibouti",
-            "圣多美和普林西比": "Sao Tome and Principe",
-            "法罗群岛": "Faroe Islands",
-            "塞拉利昂": "Sierra Leone",
-            "洪都拉斯": "Honduras",
-            "厄立特里亚": "Eritrea",
-            "直布罗陀": "Gibraltar",
-            "几内亚比绍": "Guinea-Bissau",
-            "尼日尔": "Niger",
-            "津巴布韦": "Zimbabwe",
-            "圣皮埃尔和密克隆群岛": "Saint Pierre and Miquelon",
-            "波黑": "Bosnia",
-            "乍得": "Chad",
-            "冈比亚": "Gambia",
-            "福克兰群岛": "Falkland Islands",
-            "利比里亚": "Liberia",
-            "北马其顿": "North Macedonia",
-            "蒙特塞拉特": "Montserrat",
-            "尼泊尔": "Nepal",
-            "老挝": "Laos",
-            "法属波利尼西亚": "French Polynesia",
-            "塔吉克斯坦": "Tajikistan",
-            "荷兰加勒比地区": "Netherlands Caribbean",
-            "柬埔寨": "Cambodia",
-            "梵蒂冈": "Vatican City",
-            "菲律宾": "Philippines",
-            "南非": "South Africa"
-        }
-        data = []
-        for country in self.w_data:  # 获取每个国家的现存确诊、累计确诊、累计治愈、累计死亡、新增确诊、新增死亡、新增治愈人数
-            country_name_en_us = ''  # 国家名称英文
-            country_name_zh_cn = country['provinceName']  # 国家名称中文
-            if country_name_zh_cn in ['钻石公主号邮轮']:
-                continue
-            for zh_cn, en_us in countries_name.items():
-                if zh_cn == country_name_zh_cn:
-                    country_name_en_us = en_us
-                    break
-            world_data = {
-                'countryNameEn': country_name_en_us,
-                'countryNameCn': country_name_zh_cn
-            }
-            if current:
-                world_data['currentConfirmed'] = country['currentConfirmedCount']
-            if confirmed:
-                world_data['confirmed'] = country['confirmedCount']
-            if cured:
-                world_data['cured'] = country['curedCount']
-            if dead:
-                world_data['dead'] = country['deadCount']
-            if confirmed_incr:
-                world_data['confirmedIncr'] = country['incrVo']['confirmedIncr']
-            if cured_incr:
-                world_data['curedIncr'] = country['incrVo']['curedIncr']
-            if dead_incr:
-                world_data['deadIncr'] = country['incrVo']['deadIncr']
-            if name in [country_name_zh_cn, country_name_en_us]:
-                data = world_data
-                break
-            data.append(world_data)
+        self._check_row_type(row_type, ROW_TYPES)
+        country = self._find_country(name) if name is not None else None
+        if return_to_table:
+            table = self._world_table
+            if country is not None:
+                table = table.take([table['countryNameCn'].index(country['provinceName'])])
+            flags = {'currentConfirmed': current, 'confirmed': confirmed, 'cured': cured, 'dead': dead,
+                     'confirmedIncr': confirmed_incr, 'curedIncr': cured_incr, 'deadIncr': dead_incr}
+            return table.select('countryNameEn', 'countryNameCn', *[column for column, flag in flags.items() if flag])
+        if country is not None:
+            data = self._country_data(current, confirmed, cured, dead, confirmed_incr, cured_incr, dead_incr,
+                                      row_type)(country)
+        else:
+            data = list(self.iter_world_covid(current, confirmed, cured, dead, confirmed_incr, cured_incr, dead_incr,
+                                              row_type))
         if return_to_json:
-            return json.dumps(data, indent=4, ensure_ascii=False)
+            return get_serializer().dumps(data)
         return data
 
+    def iter_world_covid(self, current=True, confirmed=True, cured=True, dead=True, confirmed_incr=True, cured_incr=True,
+                         dead_incr=True, row_type='dict'):
+        """逐个返回各个国家的疫情数据，不会一次生成全部数据，参数和world_covid()相同"""
+        if not current and not confirmed and not cured and not dead and not confirmed_incr and not cured_incr and not dead_incr:
+            raise CovidException('参数current、confirmed、cured、dead、confirmed_incr、cured_incr、dead_incr中至少需要获取一个数据')
+        self._check_row_type(row_type, ROW_TYPES)
+        project = self._country_data(current, confirmed, cured, dead, confirmed_incr, cured_incr, dead_incr, row_type)
+        return (project(country) for country in self.w_data if country['provinceName'] not in IGNORE_COUNTRIES)
+
+    def _find_country(self, name):
+        """根据国家的中文名或英文名查找国家，英文名不区分大小写"""
+        country = self._country_index.get(name)
+        if country is None:
+            name_zh = country_name_zh(name)
+            if name_zh is not None:
+                country = self._country_index.get(name_zh)
+        return country
+
+    @staticmethod
+    def _country_data(current, confirmed, cured, dead, confirmed_incr, cured_incr, dead_incr, row_type='dict'):
+        """编译获取国家的现存确诊、累计确诊、累计治愈、累计死亡、新增确诊、新增死亡、新增治愈人数的函数，相同的参数只编译一次"""
+        names = count_names(current, confirmed, cured, dead, confirmed_incr, cured_incr, dead_incr)
+        return projection(COUNTRY_FIELDS, ['countryNameEn', 'countryNameCn', *names], row_type, 'CountryRow', Country)
+
     def danger_areas(self, include_cities=True, include_counts=True, include_danger_areas=True, return_to_json=False):
         """获取国内的中高风险地区
         :param include_cities: 是否包含各个城市的风险地区数量，默认为True
         :param include_counts: 是否包含各个省份的风险地区数量，默认为True
         :param include_danger_areas: 是否包含中高风险地区数量，默认为True
-        :param return_to_json: 是否返回json格式，默认返回字典格式
+        :param return_to_json: 是否返回json格式，默认返回字典格式，json的格式由pycovid.serializer.set_serializer()设置
+        每一项是按省份嵌套的字典，没有row_type参数；需要pycovid.records.DangerArea时请使用find_danger_areas(row_type='record')
         """
         if not include_cities and not include_counts and not include_danger_areas:
             raise CovidException('参数include_cities, include_counts, include_danger_areas至少要有一个为True')
-        data = []
         merged_data = {
             'midDangerAreas': [],
             'highDangerAreas': [],
         }
-        for province in self.c_data:
-            '''如果某个省份没有中高风险地区，则忽略该省份的数据'''
-            if province['highDangerCount'] > 0 or province['midDangerCount'] > 0:
-                p_data = {
-                    'provinceName': province['provinceShortName']
-                }
-                if include_danger_areas:
-                    p_data['midDangerAreas'] = []
-                    p_data['highDangerAreas'] = []
-                if include_cities:
-                    p_data['cities'] = []
-                    for city in province['cities']:
-                        """如果某个城市没有中高风险地区，则忽略该城市的数据"""
-                        if city['highDangerCount'] > 0 or city['midDangerCount'] > 0:
-                            cn_data = {
-                                'cityName': city['cityName'],
-                                'highDanger': city['highDangerCount'],
-                                'midDanger': city['midDangerCount']
-                            }
-                            # print(cn_data)
-                            p_data['cities'].append(cn_data)
-                if include_counts:
-                    p_data['highDanger'] = province['highDangerCount']
-                    p_data['midDanger'] = province['midDangerCount']
-                if include_danger_areas:
-                    for area in province['dangerAreas']:
-                        # 去除风险地区的省份名称
-                        danger_lv = 'dangerAreas'
-                        if area['dangerLevel'] == 1:
-                            danger_lv = 'highDangerAreas'
-                        elif area['dangerLevel'] == 2:
-                            danger_lv = 'midDangerAreas'
-                        area_name = area['areaName']
-                        if province['provinceName'] in area_name:
-                            area_name.strip(province['provinceName'])
-                        if province['provinceShortName'] in area_name:
-                            area_name.strip(province['provinceShortName'])
-                        cityname = area['cityName']
-                        if area['cityName'] == '大兴安岭':
-                            cityname = '大兴安岭地区'
-                        city_names = [
-                            "锡林郭勒盟",
-                            "阿拉善盟",
-                            "兴安盟",
-                            "甘孜州",
-                            "凉山州",
-                            "阿坝州",
-                            "德宏州",
-                            "红河州",
-                            "大理州",
-                            "文山州",
-                            "楚雄州",
-                            "赣江新区",
-                            "恩施州",
-                            "神农架林区",
-                            "雄安新区",
-                            "喀什地区",
-                            "伊犁州",
-                            "兵团第四师",
-                            "昌吉州",
-                            "兵团第九师",
-                            "巴州（巴音郭楞蒙古自治州）", 
-                            "兵团第十二师",
-                            "兵团第七师",
-                            "阿克苏地区",
-                            "黔南州",
-                            "黔东南州",
-                            "黔西南州",
-                            "海北州",
-                        ]
-                        if cityname not in city_names:
-                            cityname = cityname + '市'
-                        if area['cityName'] in area_name:
-                            area_name = area_name.strip(area['cityName'])
-                        area_name = cityname + area_name
-                        p_data[danger_lv].append(area_name)
-                        merged_data[danger_lv].append(province['provinceName'] + area_name)
-                data.append(p_data)
+        data = list(self._iter_danger_areas(include_cities, include_counts, include_danger_areas, merged_data))
         if not data:    # 如果国内没有中高风险地区，则返回空列表
             return None
         if not include_cities and not include_counts:
             data = merged_data
         if return_to_json:
-            return json.dumps(data, indent=4, ensure_ascii=False)
+            return get_serializer().dumps(data)
+        return data
+
+    def iter_danger_areas(self, include_cities=True, include_counts=True, include_danger_areas=True):
+        """逐个返回有中高风险地区的省份，不会一次生成全部数据，参数和danger_areas()相同
+        注意：即使include_cities和include_counts都为False，也会逐个返回省份，而不是合并以后的风险地区
+        """
+        if not include_cities and not include_counts and not include_danger_areas:
+            raise CovidException('参数include_cities, include_counts, include_danger_areas至少要有一个为True')
+        return self._iter_danger_areas(include_cities, include_counts, include_danger_areas)
+
+    def _iter_danger_areas(self, include_cities, include_counts, include_danger_areas, merged_data=None):
+        """逐个生成省份的风险地区数据，如果提供了merged_data，会同时把风险地区的全称合并到merged_data中"""
+        return self._danger_index.project(include_cities, include_counts, include_danger_areas, merged_data)
+
+    def find_danger_areas(self, province=None, city=None, level=None, row_type='dict'):
+        """按省份、城市和风险等级查询中高风险地区，地区名称和danger_areas()相同
+        :param province: 省份简称或全称，默认查询全部省份
+        :param city: 城市名，需要同时提供province
+        :param level: 'highDangerAreas'或'midDangerAreas'，默认查询全部等级
+        :param row_type: 'dict'或'record'，'record'时每一项为pycovid.records.DangerArea
+        :return: 列表，每一项包含provinceName、cityName、areaName、dangerLevel
+        """
+        if city is not None and province is None:
+            raise CovidException('按城市查询风险地区时需要提供省份名称')
+        data = self._danger_index.find(province, city, level)
+        if self._check_row_type(row_type) == 'record':
+            data = [DangerArea.from_dict(area) for area in data]
         return data
 
+    @staticmethod
+    def _check_row_type(row_type, row_types=('dict', 'record')):
+        if row_type not in row_types:
+            raise CovidException(f"参数row_type只能是{'、'.join(map(repr, row_types[:-1]))}或{row_types[-1]!r}")
+        return row_type
+
     def news_timeline(self, include_summary=True, include_url=True, include_source=True, include_time=True,
-                      return_to_json=False):
+                      return_to_json=False, row_type='dict', archive=None):
         """获取新闻时间轴
         :param include_summary: 是否包含新闻摘要，默认为True
         :param include_url: 是否包含新闻链接，默认为True
         :param include_source: 是否包含新闻来源，默认为True
         :param include_time: 是否包含新闻发布时间，默认为True
-        :param return_to_json: 是否返回json格式，默认返回字典格式
+        :param return_to_json: 是否返回json格式，默认返回字典格式，json的格式由pycovid.serializer.set_serializer()设置
+        :param row_type: 'dict'或'record'，'record'时每一项为pycovid.records.NewsItem
+        :param archive: 从新闻归档中读取全部保存过的新闻，pycovid.archive.NewsArchive或者归档的目录，默认只读取当前网页中的新闻
         :return: 返回近期的新闻信息
         """
-        data = []
-        for news in self.n_data:
+        data = list(self.iter_news_timeline(include_summary, include_url, include_source, include_time, row_type,
+                                            archive))
+        if not data:
+            print('最近没有相关新闻信息')
+            return None
+        if return_to_json:
+            return get_serializer().dumps(data)
+        return data
+
+    def iter_news_timeline(self, include_summary=True, include_url=True, include_source=True, include_time=True,
+                           row_type='dict', archive=None):
+        """逐个返回新闻，不会一次生成全部数据，参数和news_timeline()相同
+        从归档读取时按发布时间从新到旧排列，每次只解压一部分新闻
+        """
+        as_record = self._check_row_type(row_type) == 'record'
+        if archive is None:
+            return self._iter_news_timeline(self.n_data, include_summary, include_url, include_source, include_time,
+                                            as_record)
+        # 归档中的pubDateStr是保存时的相对时间("2小时前")，发布时间使用pubDate
+        from pycovid.newsindex import pub_time_str
+        return self._iter_news_timeline(self._iter_archive(archive), include_summary, include_url, include_source,
+                                        include_time, as_record, published_time=pub_time_str)
+
+    @staticmethod
+    def _iter_archive(archive):
+        """读取归档中的新闻，传入目录时只读打开，读完以后关闭"""
+        from pycovid.archive import NewsArchive
+        if isinstance(archive, NewsArchive):
+            return archive.iter_news()
+        try:
+            opened = NewsArchive(archive, read_only=True)
+        except FileNotFoundError:
+            raise CovidException(f'没有找到新闻归档{archive}。')
+
+        def items():
+            with opened:
+                yield from opened.iter_news()
+        return items()
+
+    @staticmethod
+    def _iter_news_timeline(items, include_summary, include_url, include_source, include_time, as_record,
+                            published_time=None):
+        """published_time: 获取发布时间的函数，默认使用网页中的pubDateStr"""
+        for news in items:
             news_data = {'title': news['title']}
-            if include_time:
-                news_data['publishedTime'] = news['pubDateStr']
+            if include_time and published_time is not None:
+                news_data['publishedTime'] = published_time(news)
+            elif include_time:
+                news_data['publishedTime'] = news['pubDateStr'] if 'pubDateStr' in news else news['pubTime']
             if include_source:
                 news_data['source'] = news['infoSource']
             if include_url:
                 news_data['url'] = news['sourceUrl']
             if include_summary:
                 news_data['summary'] = news['summary']
-            data.append(news_data)
-        if not data:
-            print('最近没有相关新闻信息')
-            return None
-        if return_to_json:
-            return json.dumps(data, indent=4, ensure_ascii=False)
-        return data
+            yield NewsItem.from_dict(news_data) if as_record else news_data
 
     def print_license(self):
         """打印授权信息"""
@@ -590,7 +434,13 @@ If you want to ignore system language, please run: "from pycovid.covid import Py
         print('更新日志：')
         print('\t\t停止更新，请尽快迁移到pyeumonia。')
 
+
+# 开启pycovid.metrics以后，这些方法的每次调用都会被计时
+register(PyCovid, ('cn_covid', 'province_covid', 'world_covid', 'danger_areas', 'find_danger_areas', 'news_timeline'),
+         'covid')
+
 if __name__ == '__main__':
+    import requests
     # 在导入pycovid.py时检查网络连接
     try:
         status = requests.get('https://ncov.dxy.cn/ncovh5/view/pneumonia', timeout=2).status_code
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+from functools import cached_property    # 查询使用的索引只建立一次
+from pycovid.names import city_display_name    # 风险地区名称前面的城市名
+
+# dangerLevel: danger_areas()返回的字段名，其他等级使用'dangerAreas'
+DANGER_LEVELS = {
+    1: 'highDangerAreas',
+    2: 'midDangerAreas',
+}
+
+
+def area_display_name(area):
+    """风险地区在danger_areas()中显示的名称
+    和原来的处理方式完全相同：areaName中的省份名称不去除，去除城市名称时strip()按字符去除，最后再加上城市名(不是直辖市的加上'市')
+    """
+    area_name = area['areaName']
+    if area['cityName'] in area_name:
+        area_name = area_name.strip(area['cityName'])
+    return city_display_name(area['cityName']) + area_name
+
+
+class DangerProvince:
+    """一个有中高风险地区的省份，名称已经处理好，每个快照只处理一次"""
+
+    __slots__ = ('short_name', 'name', 'high', 'mid', 'cities', 'areas', 'merged')
+
+    def __init__(self, province):
+        self.short_name = province['provinceShortName']
+        self.name = province['provinceName']
+        self.high = province['highDangerCount']
+        self.mid = province['midDangerCount']
+        # 有中高风险地区的城市: (cityName, highDangerCount, midDangerCount)
+        self.cities = tuple((city['cityName'], city['highDangerCount'], city['midDangerCount'])
+                            for city in province['cities']
+                            if city['highDangerCount'] > 0 or city['midDangerCount'] > 0)
+        areas = province.get('dangerAreas')
+        if areas is None:
+            # 原来的实现只有在include_danger_areas=True时才会读取dangerAreas
+            self.areas = self.merged = None
+            return
+        # [(等级对应的字段名, 地区名, 城市名)]，保持原来的顺序
+        self.areas = tuple((DANGER_LEVELS.get(area['dangerLevel'], 'dangerAreas'),
+                            area_display_name(area), area['cityName']) for area in areas)
+        self.merged = tuple(self.name + area_name for _, area_name, _ in self.areas)
+
+
+class DangerAreaIndex:
+    """按省份、城市和风险等级建立的中高风险地区索引
+    danger_areas()的各种参数组合都只是在索引上取出需要的字段，不会再次处理地区名称
+    """
+
+    def __init__(self, c_data):
+        """
+        :param c_data: 各省份的原始数据
+        """
+        self.provinces = [DangerProvince(province) for province in c_data
+                          if province['highDangerCount'] > 0 or province['midDangerCount'] > 0]
+
+    @cached_property
+    def _lookup(self):
+        """查询使用的索引，第一次调用find()时才建立"""
+        by_province, records, by_city, by_level = {}, {}, {}, {}
+        for province in self.provinces:
+            by_province.setdefault(province.short_name, province)
+            by_province.setdefault(province.name, province)
+            for level, area_name, city_name in province.areas or ():
+                record = {'provinceName': province.short_name, 'cityName': city_name, 'areaName': area_name,
+                          'dangerLevel': level}
+                records.setdefault(province.short_name, []).append(record)
+                by_city.setdefault((province.short_name, city_name), []).append(record)
+                by_level.setdefault(level, []).append(record)
+        return by_province, records, by_city, by_level
+
+    def __len__(self):
+        return sum(len(province.areas or ()) for province in self.provinces)
+
+    def province(self, name):
+        """按省份简称或全称查找，没有中高风险地区时返回None"""
+        return self._lookup[0].get(name)
+
+    def find(self, province=None, city=None, level=None):
+        """查询风险地区
+        :param province: 省份简称或全称，默认不限制
+        :param city: 城市名(原始数据中的cityName)，需要同时提供province
+        :param level: 'highDangerAreas'或'midDangerAreas'，默认不限制
+        :return: 列表，每一项包含provinceName、cityName、areaName、dangerLevel
+        """
+        by_province, by_records, by_city, by_level = self._lookup
+        if province is not None:
+            found = by_province.get(province)
+            if found is None:
+                return []
+            if city is not None:
+                records = by_city.get((found.short_name, city), [])
+            else:
+                records = by_records.get(found.short_name, [])
+        elif city is not None:
+            raise ValueError('按城市查询时需要提供province')
+        elif level is not None:
+            return [dict(record) for record in by_level.get(level, [])]
+        else:
+            records = [record for records in by_records.values() for record in records]
+        return [dict(record) for record in records if level is None or record['dangerLevel'] == level]
+
+    def project(self, include_cities, include_counts, include_danger_areas, merged_data=None):
+        """逐个生成danger_areas()中每个省份的数据，结果和原来逐个处理地区名称的方式完全相同"""
+        for province in self.provinces:
+            p_data = {'provinceName': province.short_name}
+            if include_danger_areas:
+                p_data['midDangerAreas'] = []
+                p_data['highDangerAreas'] = []
+            if include_cities:
+                p_data['cities'] = [{'cityName': name, 'highDanger': high, 'midDanger': mid}
+                                    for name, high, mid in province.cities]
+            if include_counts:
+                p_data['highDanger'] = province.high
+                p_data['midDanger'] = province.mid
+            if include_danger_areas:
+                if province.areas is None:
+                    raise KeyError('dangerAreas')
+                for (level, area_name, _), merged_name in zip(province.areas, province.merged):
+                    # 其他等级没有对应的列表，和原来一样抛出KeyError
+                    p_data[level].append(area_name)
+                    if merged_data is not None:
+                        merged_data[level].append(merged_name)
+            yield p_data
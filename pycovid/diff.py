@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+from pycovid.columnar import COUNT_COLUMNS, INCR_COLUMNS    # 输出的字段名
+from pycovid.names import COUNTRIES_NAME, IGNORE_CITIES, IGNORE_COUNTRIES    # 名称对照表
+from pycovid.snapshot import JSON_ALIASES    # 数据集对应的script id
+
+
+def _counters(row):
+    """原始数据中的计数，字段名和查询方法返回的字段名相同"""
+    counters = {name: row[key] for name, key in COUNT_COLUMNS.items()}
+    if 'incrVo' in row:
+        incr_vo = row['incrVo'] or {}
+        counters.update((name, incr_vo.get(key)) for name, key in INCR_COLUMNS.items())
+    return counters
+
+
+def _row_hash(row):
+    return hash(tuple(row[key] for key in COUNT_COLUMNS.values()))
+
+
+def _danger_area_key(area):
+    return area['cityName'], area['areaName'], area['dangerLevel']
+
+
+def _province_prints(c_data):
+    """每个省份的内容哈希，包含省份和城市的计数以及风险地区，哈希相同的省份不需要再比较"""
+    prints = {}
+    for province in c_data:
+        cities = tuple((city['cityName'], _row_hash(city)) for city in province['cities'])
+        areas = tuple(_danger_area_key(area) for area in province.get('dangerAreas') or ())
+        prints.setdefault(province['provinceShortName'], (hash((_row_hash(province), cities, areas)), province))
+    return prints
+
+
+def _country_prints(w_data):
+    prints = {}
+    for country in w_data:
+        if country['provinceName'] in IGNORE_COUNTRIES:
+            continue
+        incr_vo = country.get('incrVo') or {}
+        content = (_row_hash(country), tuple(incr_vo.get(key) for key in INCR_COLUMNS.values()))
+        prints.setdefault(country['provinceName'], (hash(content), country))
+    return prints
+
+
+def _news_prints(n_data):
+    return {str(news.get('id') or news.get('sourceUrl') or news['title']): (None, news) for news in n_data}
+
+
+_DATASETS = (
+    ('c_data', _province_prints),
+    ('w_data', _country_prints),
+    ('n_data', _news_prints),
+)
+
+
+def empty_diff():
+    """没有任何变化时的结果"""
+    return {
+        'provinces': [],
+        'cities': [],
+        'countries': [],
+        'dangerAreas': {'added': [], 'removed': []},
+        'news': [],
+    }
+
+
+def _changed(before, after):
+    return [name for name in after if before.get(name) != after[name]]
+
+
+def _diff_provinces(old, new, result):
+    for short_name in list(old) + [name for name in new if name not in old]:
+        old_print, old_province = old.get(short_name, (None, None))
+        new_print, new_province = new.get(short_name, (None, None))
+        if old_print == new_print:
+            continue
+        before = _counters(old_province) if old_province else None
+        after = _counters(new_province) if new_province else None
+        if before != after:
+            result['provinces'].append({'provinceName': short_name, 'before': before, 'after': after,
+                                        'changed': _changed(before or {}, after or {})})
+        old_cities = {city['cityName']: city for city in (old_province or {}).get('cities', ())}
+        new_cities = {city['cityName']: city for city in (new_province or {}).get('cities', ())}
+        for city_name in list(old_cities) + [name for name in new_cities if name not in old_cities]:
+            if city_name in IGNORE_CITIES:
+                continue
+            before = _counters(old_cities[city_name]) if city_name in old_cities else None
+            after = _counters(new_cities[city_name]) if city_name in new_cities else None
+            if before != after:
+                result['cities'].append({'provinceName': short_name, 'cityName': city_name, 'before': before,
+                                         'after': after, 'changed': _changed(before or {}, after or {})})
+        old_areas = {_danger_area_key(area) for area in (old_province or {}).get('dangerAreas') or ()}
+        new_areas = {_danger_area_key(area) for area in (new_province or {}).get('dangerAreas') or ()}
+        for key, areas in (('added', new_areas - old_areas), ('removed', old_areas - new_areas)):
+            result['dangerAreas'][key].extend(
+                {'provinceName': short_name, 'cityName': city, 'areaName': area, 'dangerLevel': level}
+                for city, area, level in sorted(areas))
+
+
+def _diff_countries(old, new, result):
+    for name_zh in list(old) + [name for name in new if name not in old]:
+        old_print, old_country = old.get(name_zh, (None, None))
+        new_print, new_country = new.get(name_zh, (None, None))
+        if old_print == new_print:
+            continue
+        before = _counters(old_country) if old_country else None
+        after = _counters(new_country) if new_country else None
+        if before != after:
+            result['countries'].append({'countryNameCn': name_zh, 'countryNameEn': COUNTRIES_NAME.get(name_zh, ''),
+                                        'before': before, 'after': after,
+                                        'changed': _changed(before or {}, after or {})})
+
+
+def _diff_news(old, new, result):
+    result['news'].extend(news for key, (_, news) in new.items() if key not in old)
+
+
+_DIFFERS = {'c_data': _diff_provinces, 'w_data': _diff_countries, 'n_data': _diff_news}
+
+
+class SnapshotDiffer:
+    """比较连续的快照，只返回变化的数据
+    原始数据完全相同的数据集不会被解析和比较，内容哈希相同的省份和国家也会被跳过
+    用法：
+        differ = SnapshotDiffer()
+        changes = differ.update(PyCovid(use_it_anyway=True))
+    """
+
+    def __init__(self):
+        self._state = {}    # 数据集: (未解析的数据, 内容哈希)
+
+    def update(self, covid):
+        """和上一次的快照比较，第一次调用时所有数据都是新增的
+        :param covid: PyCovid，covid_en中的PyCovid只比较w_data
+        :return: 字典，包含provinces、cities、countries、dangerAreas、news，每一项只包含变化的数据
+            provinces、cities和countries中的每一项都包含before、after和changed，新增时before为None，删除时after为None
+        """
+        result = empty_diff()
+        for name, prints_of in _DATASETS:
+            if not hasattr(type(covid), name):
+                continue
+            payload = (covid.scripts or {}).get(JSON_ALIASES[name])
+            previous = self._state.get(name)
+            if previous is not None and payload is not None and previous[0] == payload:
+                continue
+            prints = prints_of(getattr(covid, name))
+            _DIFFERS[name](previous[1] if previous else {}, prints, result)
+            self._state[name] = (payload, prints)
+        return result
+
+    def reset(self):
+        """忘记上一次的快照"""
+        self._state.clear()
+
+
+def diff_snapshots(old, new):
+    """比较两个快照
+    :param old: 之前的PyCovid
+    :param new: 现在的PyCovid
+    :return: 和SnapshotDiffer.update()相同
+    """
+    differ = SnapshotDiffer()
+    differ.update(old)
+    return differ.update(new)
+
+
+def has_changes(diff):
+    """是否有任何变化"""
+    return bool(diff['provinces'] or diff['cities'] or diff['countries'] or diff['dangerAreas']['added']
+                or diff['dangerAreas']['removed'] or diff['news'])
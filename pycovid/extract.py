@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import re                           # 单次扫描html
+from pycovid.metrics import stage   # 计时
+
+
+# 丁香园页面中的数据都以 <script id="X">try { window.X = 数据}catch(e){}</script> 的形式存放
+_SCRIPT_PATTERN = r'<script id="([^"]+)">try \{ window\.\1 = (.*?)\}catch\(e\)\{\}</script>'
+_SCRIPT_RE = re.compile(_SCRIPT_PATTERN, re.S)
+_SCRIPT_RE_BYTES = re.compile(_SCRIPT_PATTERN.encode('utf-8'), re.S)
+
+
+def extract_scripts(html, ids=None):
+    """只扫描一次html，取出所有 <script id="...">try { window.X = ... }catch(e){}</script> 中的数据
+    :param html: 网页源码，可以是str、bytes或者mmap
+    :param ids: 只保留这些id的数据，默认保留全部，全部找到后立即停止扫描
+    :return: 字典，键为script的id，值为未解析的json字符串(如果html是bytes，则值为bytes)
+    """
+    with stage('extract', len(html)):
+        return _extract_scripts(html, ids)
+
+
+def _extract_scripts(html, ids):
+    pattern = _SCRIPT_RE if isinstance(html, str) else _SCRIPT_RE_BYTES
+    wanted = None
+    if ids is not None:
+        wanted = {i if isinstance(html, str) else i.encode('utf-8') for i in ids}
+    scripts = {}
+    for match in pattern.finditer(html):
+        script_id = match.group(1)
+        if wanted is not None:
+            if script_id not in wanted:
+                continue
+            wanted.discard(script_id)
+        if not isinstance(script_id, str):
+            script_id = script_id.decode('utf-8')
+        scripts[script_id] = match.group(2)
+        if wanted is not None and not wanted:
+            break
+    return scripts
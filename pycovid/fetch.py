@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import threading                    # 多线程共享同一个连接池
+from functools import cached_property    # 每个网页只提取一次数据
+from pycovid.extract import extract_scripts    # 提取网页中的数据
+
+
+class Page:
+    """下载到的网页，网页没有变化时(304)会返回共用内容和提取结果的Page，不会再次下载和提取数据"""
+
+    def __init__(self, url, content, etag=None, last_modified=None, response=None):
+        self.url = url
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.response = response    # 从缓存文件读取的网页没有response
+        self.not_modified = False   # 这次请求是否返回了304，每次请求返回的Page都是不同的对象
+        self._origin = None         # 304时为之前下载的Page
+
+    def revalidated(self):
+        """服务器返回304时使用的Page，和这个Page共用内容和提取的数据，只有not_modified为True
+        之前得到这个Page的PyCovid不会受到影响
+        """
+        page = Page(self.url, self.content, etag=self.etag, last_modified=self.last_modified, response=self.response)
+        page.not_modified = True
+        page._origin = self
+        if 'scripts' in self.__dict__:
+            page.__dict__['scripts'] = self.__dict__['scripts']
+        return page
+
+    @classmethod
+    def from_response(cls, url, response):
+        return cls(url, response.content, etag=response.headers.get('ETag'),
+                   last_modified=response.headers.get('Last-Modified'), response=response)
+
+    @cached_property
+    def scripts(self):
+        """网页中所有script的数据，第一次使用时才会提取"""
+        if self._origin is not None:
+            return self._origin.scripts
+        return extract_scripts(self.content)
+
+
+class Fetcher:
+    """基于requests.Session的下载器，同一个进程中的PyCovid共用连接池"""
+
+    def __init__(self, timeout=(5, 30), retries=3, backoff=0.5, pool_size=10, conditional=True, session=None):
+        """
+        :param timeout: 超时时间，可以是秒数或者(连接超时, 读取超时)，默认为(5, 30)
+        :param retries: 连接失败或服务器返回5xx时的重试次数，默认为3
+        :param backoff: 重试的退避系数，第n次重试前等待backoff * 2 ** (n - 1)秒，默认为0.5
+        :param pool_size: 连接池的大小，默认为10
+        :param conditional: 是否发送If-None-Match/If-Modified-Since，网页没有变化时服务器返回304，默认发送
+        :param session: 自定义的requests.Session，默认自动创建
+        """
+        self.timeout = timeout
+        self.conditional = conditional
+        if session is None:
+            # requests和urllib3在第一次创建下载器时才导入，只读取本地快照时不需要
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            session = requests.Session()
+            retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(500, 502, 503, 504),
+                          allowed_methods=frozenset(['GET', 'HEAD']))
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url):
+        """下载网页，如果网页没有变化，返回和上一次下载的Page共用数据的Page
+        :param url: 网页地址
+        :return: Page，网页没有变化时not_modified为True
+        """
+        with self._lock:
+            page = self._pages.get(url)
+        headers = {}
+        if page is not None and self.conditional:
+            if page.etag:
+                headers['If-None-Match'] = page.etag
+            if page.last_modified:
+                headers['If-Modified-Since'] = page.last_modified
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and page is not None:
+            return page.revalidated()
+        response.raise_for_status()
+        page = Page.from_response(url, response)
+        if self.conditional and (page.etag or page.last_modified):
+            with self._lock:
+                self._pages[url] = page
+        return page
+
+    def forget(self, url=None):
+        """删除保存的网页，下次请求时重新下载
+        :param url: 网页地址，默认删除全部
+        """
+        with self._lock:
+            if url is None:
+                self._pages.clear()
+            else:
+                self._pages.pop(url, None)
+
+    def close(self):
+        """关闭连接池"""
+        self.forget()
+        self.session.close()
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """获取进程共用的下载器，第一次调用时创建"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = Fetcher()
+        return _fetcher
+
+
+def set_fetcher(fetcher):
+    """替换进程共用的下载器，例如设置不同的超时时间，或者在测试中使用本地服务器
+    :param fetcher: Fetcher或者任何有fetch(url)方法的对象，设置为None时恢复默认
+    """
+    global _fetcher
+    with _fetcher_lock:
+        _fetcher = fetcher
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+
+
+def index_provinces(c_data):
+    """按省份简称和全称建立索引，例如'北京'和'北京市'都指向北京的数据
+    :param c_data: PyCovid().c_data
+    :return: 字典，{省份名: 省份数据}，名称重复时保留第一个
+    """
+    index = {}
+    for province in c_data:
+        index.setdefault(province['provinceShortName'], province)
+        index.setdefault(province['provinceName'], province)
+    return index
+
+
+def index_cities(c_data, ignore_cities=()):
+    """按省份简称建立城市索引
+    :param c_data: PyCovid().c_data
+    :param ignore_cities: 不是城市的地区，例如'境外输入'，不会加入索引
+    :return: 字典，{省份简称: {城市名: 城市数据}}
+    """
+    index = {}
+    for province in c_data:
+        cities = index.setdefault(province['provinceShortName'], {})
+        for city in province['cities']:
+            if city['cityName'] not in ignore_cities:
+                cities.setdefault(city['cityName'], city)
+    return index
+
+
+def index_countries(w_data, names_en=None, ignore_countries=(), include_zh=True):
+    """按国家的中文名和英文名建立索引
+    :param w_data: PyCovid().w_data
+    :param names_en: 中文名到英文名的对照表
+    :param ignore_countries: 不是国家的地区，例如'钻石公主号邮轮'，不会加入索引
+    :param include_zh: 是否按中文名建立索引，默认建立
+    :return: 字典，{国家名: 国家数据}，名称重复时保留第一个
+    """
+    names_en = names_en or {}
+    index = {}
+    for country in w_data:
+        name_zh = country['provinceName']
+        if name_zh in ignore_countries:
+            continue
+        if include_zh:
+            index.setdefault(name_zh, country)
+        name_en = names_en.get(name_zh)
+        if name_en:
+            index.setdefault(name_en, country)
+    return index
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""记录PyCovid每个阶段(下载、提取、解析json)和每次查询的耗时和字节数，默认关闭
+用法：
+    from pycovid import metrics
+    m = metrics.enable(callback=lambda kind, name, seconds, nbytes: print(kind, name, seconds, nbytes))
+    covid = PyCovid(use_it_anyway=True)
+    covid.world_covid()
+    print(m.summary())
+    print(m.to_openmetrics())           # Prometheus/OpenMetrics的文本格式
+    metrics.disable()
+关闭时阶段只多一次全局变量的判断，查询方法只在开启时才被替换为计时的版本，没有额外开销
+"""
+import functools                    # 保留原方法的名称和文档
+import threading                    # 多线程记录
+import time                         # 计时
+from bisect import bisect_left      # 查找直方图的区间
+
+KINDS = ('stage', 'query')
+# 直方图的区间上限(秒)
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+_active = None                      # 开启时为Metrics
+_registered = {}                    # (类, 方法名): 记录的名称
+_originals = {}                     # (类, 方法名): 替换前的方法
+
+
+class _Series:
+    __slots__ = ('count', 'seconds', 'max_seconds', 'nbytes', 'buckets')
+
+    def __init__(self, size):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.nbytes = 0
+        self.buckets = [0] * size
+
+
+class Metrics:
+    """按(类型, 名称)汇总的耗时和字节数，类型为'stage'(构造PyCovid的阶段)或'query'(查询方法)"""
+
+    def __init__(self, callback=None, buckets=BUCKETS):
+        """
+        :param callback: 每次记录时调用callback(kind, name, seconds, nbytes)，nbytes可能为None
+        :param buckets: 直方图的区间上限(秒)，从小到大排列
+        """
+        self.callback = callback
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, seconds, nbytes=None):
+        """记录一次耗时
+        :param kind: 'stage'或'query'
+        :param name: 阶段或方法的名称，例如'fetch'、'decode.getAreaStat'、'covid.world_covid'
+        :param seconds: 耗时(秒)
+        :param nbytes: 处理或返回的字节数，没有时为None
+        """
+        with self._lock:
+            series = self._series.get((kind, name))
+            if series is None:
+                series = self._series[(kind, name)] = _Series(len(self.buckets))
+            series.count += 1
+            series.seconds += seconds
+            series.max_seconds = max(series.max_seconds, seconds)
+            if nbytes:
+                series.nbytes += nbytes
+            position = bisect_left(self.buckets, seconds)
+            if position < len(self.buckets):
+                series.buckets[position] += 1
+        if self.callback is not None:
+            self.callback(kind, name, seconds, nbytes)
+
+    def stats(self, kind=None):
+        """汇总结果
+        :param kind: 只返回这个类型，默认全部返回
+        :return: {(类型, 名称): {'count', 'seconds', 'mean_seconds', 'max_seconds', 'bytes'}}
+        """
+        with self._lock:
+            return {key: {'count': series.count, 'seconds': series.seconds,
+                          'mean_seconds': series.seconds / series.count, 'max_seconds': series.max_seconds,
+                          'bytes': series.nbytes}
+                    for key, series in sorted(self._series.items()) if kind is None or key[0] == kind}
+
+    def reset(self):
+        """清空记录"""
+        with self._lock:
+            self._series.clear()
+
+    def summary(self):
+        """文本表格，每行为一个阶段或方法"""
+        lines = [f'{"":<8}{"name":<44}{"count":>8}{"total ms":>12}{"mean ms":>10}{"max ms":>10}{"bytes":>12}']
+        for (kind, name), row in self.stats().items():
+            lines.append(f'{kind:<8}{name:<44}{row["count"]:>8}{row["seconds"] * 1000:12.3f}'
+                         f'{row["mean_seconds"] * 1000:10.3f}{row["max_seconds"] * 1000:10.3f}{row["bytes"]:>12}')
+        return '\n'.join(lines)
+
+    def to_openmetrics(self, prefix='pycovid'):
+        """导出为OpenMetrics文本格式，Prometheus可以直接抓取
+        每个类型有两个指标：{prefix}_{kind}_seconds(直方图)和{prefix}_{kind}_bytes(计数器)
+        """
+        with self._lock:
+            items = sorted((key, series.count, series.seconds, series.nbytes, list(series.buckets))
+                           for key, series in self._series.items())
+        lines = []
+        for kind in KINDS:
+            rows = [(name, count, seconds, nbytes, buckets)
+                    for (row_kind, name), count, seconds, nbytes, buckets in items if row_kind == kind]
+            if not rows:
+                continue
+            metric = f'{prefix}_{kind}_seconds'
+            lines += [f'# TYPE {metric} histogram', f'# UNIT {metric} seconds',
+                      f'# HELP {metric} Duration of PyCovid {kind} calls.']
+            for name, count, seconds, _, buckets in rows:
+                label = f'name="{_escape(name)}"'
+                cumulative = 0
+                for bound, hits in zip(self.buckets, buckets):
+                    cumulative += hits
+                    lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f'{metric}_count{{{label}}} {count}')
+                lines.append(f'{metric}_sum{{{label}}} {seconds!r}')
+            metric = f'{prefix}_{kind}_bytes'
+            lines += [f'# TYPE {metric} counter', f'# UNIT {metric} bytes',
+                      f'# HELP {metric} Bytes processed or returned by PyCovid {kind} calls.']
+            lines += [f'{metric}_total{{name="{_escape(name)}"}} {nbytes}' for name, _, _, nbytes, _ in rows]
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'nbytes', 'start')
+
+    def __init__(self, metrics, name, nbytes):
+        self.metrics = metrics
+        self.name = name
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics.record('stage', self.name, time.perf_counter() - self.start, self.nbytes)
+
+
+class _NoTimer:
+    __slots__ = ('nbytes',)         # 和_Timer一样可以在阶段结束前设置字节数
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def stage(name, nbytes=None):
+    """给一个阶段计时，用法：with stage('extract', len(html)): ...，关闭时什么都不做
+    字节数在开始时不知道的话，可以在with中设置：with stage('fetch') as timer: timer.nbytes = ...
+    """
+    metrics = _active
+    if metrics is None:
+        return _NO_TIMER
+    return _Timer(metrics, name, nbytes)
+
+
+def _result_size(result):
+    """查询结果的字节数，只统计return_to_json返回的json"""
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    if isinstance(result, str):
+        return len(result.encode('utf-8'))
+    return None
+
+
+def _timed(func, name):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        metrics = _active
+        if metrics is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        metrics.record('query', name, time.perf_counter() - start, _result_size(result))
+        return result
+    return timed
+
+
+def register(cls, methods, prefix):
+    """登记需要计时的查询方法，开启时才会被替换
+    :param cls: 类
+    :param methods: 方法名列表
+    :param prefix: 记录的名称前缀，例如'covid'，记录为'covid.world_covid'
+    """
+    for method in methods:
+        _registered[(cls, method)] = f'{prefix}.{method}'
+    if _active is not None:
+        _install()
+
+
+def _install():
+    for (cls, method), name in _registered.items():
+        if (cls, method) not in _originals:
+            _originals[(cls, method)] = cls.__dict__[method]
+            setattr(cls, method, _timed(cls.__dict__[method], name))
+
+
+def _uninstall():
+    for (cls, method), original in _originals.items():
+        setattr(cls, method, original)
+    _originals.clear()
+
+
+def enable(metrics=None, callback=None):
+    """开启计时，所有线程中的PyCovid都会被记录
+    :param metrics: 使用的Metrics，默认新建一个
+    :param callback: 新建Metrics时的callback，参数为(kind, name, seconds, nbytes)
+    :return: 正在使用的Metrics
+    """
+    global _active
+    if metrics is None:
+        metrics = Metrics(callback=callback)
+    elif callback is not None:
+        raise ValueError('参数metrics和callback不能同时使用，请直接设置Metrics的callback')
+    _active = metrics
+    _install()
+    return metrics
+
+
+def disable():
+    """关闭计时，恢复原来的查询方法，返回关闭前的Metrics"""
+    global _active
+    metrics, _active = _active, None
+    _uninstall()
+    return metrics
+
+
+def get_metrics():
+    """正在使用的Metrics，没有开启时为None"""
+    return _active
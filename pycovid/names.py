@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+from functools import lru_cache     # 城市名只需要处理一次
+from types import MappingProxyType  # 只读字典
+
+# 国家的中文名: 英文名
+_COUNTRIES_NAME = {
+    "法国": "France",
+    "德国": "Germany",
+    "韩国": "Korea",
+    "英国": "United Kingdom",
+    "西班牙": "Spain",
+    "意大利": "Italy",
+    "巴西": "Brazil",
+    "土耳其": "Turkey",
+    "荷兰": "Netherlands",
+    "俄罗斯": "Russia",
+    "日本": "Japan",
+    "比利时": "Belgium",
+    "中国": "China",
+    "奥地利": "Austria",
+    "瑞士": "Switzerland",
+    "希腊": "Greece",
+    "伊朗": "Iran",
+    "丹麦": "Denmark",
+    "墨西哥": "Mexico",
+    "瑞典": "Sweden",
+    "斯洛伐克": "Slovakia",
+    "智利": "Chile",
+    "塞尔维亚": "Serbia",
+    "伊拉克": "Iraq",
+    "美国": "United States",
+    "爱尔兰": "Ireland",
+    "乌克兰": "Ukraine",
+    "哈萨克斯坦": "Kazakhstan",
+    "秘鲁": "Peru",
+    "格鲁吉亚": "Georgia",
+    "斯洛文尼亚": "Slovenia",
+    "罗马尼亚": "Romanian",
+    "约旦": "Jordan",
+    "黎巴嫩": "Lebanon",
+    "葡萄牙": "Portugal",
+    "波多黎各": "Puerto Rico",
+    "危地马拉": "Guatemala",
+    "立陶宛": "Lithuania",
+    "蒙古": "Mongolia",
+    "阿塞拜疆": "Azerbaijan",
+    "澳大利亚": "Australia",
+    "克罗地亚": "Croatia",
+    "多米尼加": "dominica",
+    "玻利维亚": "Bolivia",
+    "巴拿马": "Panama",
+    "孟加拉国": "Bangladesh",
+    "捷克": "Czech Republic",
+    "塞浦路斯": "Cyprus",
+    "留尼旺": "Reunion",
+    "印度": "India",
+    "加拿大": "Canada",
+    "保加利亚": "Bulgaria",
+    "摩洛哥": "Morocco",
+    "拉脱维亚": "Latvia",
+    "巴勒斯坦": "Palestine",
+    "乌拉圭": "Uruguay",
+    "巴基斯坦": "Pakistan",
+    "沙特阿拉伯": "Saudi Arabia",
+    "以色列": "Israel",
+    "利比亚": "Libya",
+    "毛里求斯": "Mauritius",
+    "亚美尼亚": "Armenia",
+    "阿联酋": "U.A.E",
+    "马提尼克": "Martinique",
+    "巴拉圭": "Paraguay",
+    "埃及": "Egypt",
+    "爱沙尼亚": "Estonia",
+    "新西兰": "New Zealand",
+    "瓜德罗普岛": "Guadeloupe",
+    "委内瑞拉": "Venezuela",
+    "马来西亚": "Malaysia",
+    "博茨瓦纳": "Botswana",
+    "摩尔多瓦": "Moldova",
+    "卡塔尔": "Qatar",
+    "阿根廷": "Argentina",
+    "巴林": "Bahrain",
+    "埃塞俄比亚": "Ethiopia",
+    "阿尔及利亚": "Algeria",
+    "文莱": "Brunei",
+    "特立尼达和多巴哥": "Trinidad and Tobago",
+    "阿曼": "Oman",
+    "缅甸": "Myanmar",
+    "法属圭亚那": "French Guiana",
+    "牙买加": "Jamaica",
+    "黑山": "Montenegro",
+    "哥斯达黎加": "Costa Rica",
+    "古巴": "Cuba",
+    "白俄罗斯": "Belarus",
+    "莫桑比克": "Mozambique",
+    "阿尔巴尼亚": "Albania",
+    "巴巴多斯": "Barbados",
+    "芬兰": "Finland",
+    "肯尼亚": "Kenya",
+    "斯威士兰": "Eswatini",
+    "斯里兰卡": "Sri Lanka",
+    "贝宁": "Benin",
+    "刚果（金）": "Democratic Republic of the Congo",
+    "不丹": "Bhutan",
+    "阿富汗": "Afghanistan",
+    "苏里南": "Suriname",
+    "新喀里多尼亚": "New Caledonia",
+    "哥伦比亚": "Colombia",
+    "伯利兹": "Belize",
+    "尼日利亚": "Nigeria",
+    "圭亚那": "Guyana",
+    "泽西岛": "Jersey",
+    "乌兹别克斯坦": "Uzbekistan",
+    "布隆迪共和国": "Burundi",
+    "加纳": "Ghana",
+    "纳米比亚": "Namibia",
+    "厄瓜多尔": "Ecuador",
+    "库拉索岛": "Curacao",
+    "卢旺达": "Rwanda",
+    "马约特": "Mayotte",
+    "喀麦隆": "Cameroon",
+    "安哥拉": "Angola",
+    "坦桑尼亚": "Tanzania",
+    "萨尔瓦多": "El Salvador",
+    "关岛": "Guam",
+    "马尔代夫": "Maldives",
+    "阿鲁巴": "Aruba",
+    "叙利亚": "Syria",
+    "开曼群岛": "Cayman Islands",
+    "根西岛": "Guernsey",
+    "巴哈马": "Bahamas",
+    "莱索托": "Lesotho",
+    "科特迪瓦": "Côte d’Ivoire",
+    "苏丹": "Sudan",
+    "马拉维": "Malawi",
+    "越南": "Vietnam",
+    "毛里塔尼亚": "Mauritania",
+    "吉尔吉斯斯坦": "Kyrgyzstan",
+    "佛得角": "Cape Verde",
+    "塞舌尔": "Seychelles",
+    "马恩岛": "Isle of Man",
+    "马达加斯加": "Madagascar",
+    "泰国": "Thailand",
+    "海地": "Haiti",
+    "加蓬": "Gabon",
+    "挪威": "Norway",
+    "卢森堡": "Luxembourg",
+    "索马里": "Somalia",
+    "马里": "Mali",
+    "刚果（布）": "Congo (Brazzaville)",
+    "新加坡": "Singapore",
+    "印度尼西亚": "Indonesia",
+    "多米尼克": "Dominica",
+    "赞比亚共和国": "Zambia",
+    "百慕大": "Bermuda",
+    "美属维尔京群岛": "United States Virgin Islands",
+    "多哥": "Togo",
+    "斐济": "Fiji",
+    "尼加拉瓜": "Nicaragua",
+    "塞内加尔": "Senegal",
+    "格林那达": "Grenada",
+    "北马里亚纳群岛联邦": "Commonwealth of the Northern Mariana Islands",
+    "突尼斯": "Tunisia",
+    "摩纳哥": "Monaco",
+    "匈牙利": "Hungary",
+    "圣马丁岛": "Saint Martin",
+    "也门共和国": "Yemen",
+    "格陵兰": "Greenland",
+    "圣文森特和格林纳丁斯": "Saint Vincent and the Grenadines",
+    "冰岛": "Iceland",
+    "波兰": "Poland",
+    "中非共和国": "Central African Republic",
+    "几内亚": "Guinea",
+    "马耳他": "Malta",
+    "安提瓜和巴布达": "Antigua and Barbuda",
+    "布基纳法索": "Burkina Faso",
+    "荷属圣马丁": "St. Maarten, The Netherlands",
+    "南苏丹": "South Sudan",
+    "科威特": "Kuwait",
+    "圣其茨和尼维斯": "Saint-Žić and Nevis",
+    "安道尔": "Andorra",
+    "列支敦士登": "Liechtenstein",
+    "科摩罗": "Comoros",
+    "圣巴泰勒米岛": "Saint Barthelemy Island",
+    "赤道几内亚": "Equatorial Guinea",
+    "东帝汶": "Timor-Leste",
+    "圣马力诺": "San Marino",
+    "英属维尔京群岛": "British Virgin Islands",
+    "巴布亚新几内亚": "Papua New Guinea",
+    "乌干达": "Uganda",
+    "特克斯和凯科斯群岛": "Turks and Caicos Islands",
+    "圣卢西亚": "Saint Lucia",
+    "安圭拉": "Anguilla",
+    "吉布提": "Djibouti",
+    "圣多美和普林西比": "Sao Tome and Principe",
+    "法罗群岛": "Faroe Islands",
+    "塞拉利昂": "Sierra Leone",
+    "洪都拉斯": "Honduras",
+    "厄立特里亚": "Eritrea",
+    "直布罗陀": "Gibraltar",
+    "几内亚比绍": "Guinea-Bissau",
+    "尼日尔": "Niger",
+    "津巴布韦": "Zimbabwe",
+    "圣皮埃尔和密克隆群岛": "Saint Pierre and Miquelon",
+    "波黑": "Bosnia",
+    "乍得": "Chad",
+    "冈比亚": "Gambia",
+    "福克兰群岛": "Falkland Islands",
+    "利比里亚": "Liberia",
+    "北马其顿": "North Macedonia",
+    "蒙特塞拉特": "Montserrat",
+    "尼泊尔": "Nepal",
+    "老挝": "Laos",
+    "法属波利尼西亚": "French Polynesia",
+    "塔吉克斯坦": "Tajikistan",
+    "荷兰加勒比地区": "Netherlands Caribbean",
+    "柬埔寨": "Cambodia",
+    "梵蒂冈": "Vatican City",
+    "菲律宾": "Philippines",
+    "南非": "South Africa"
+}
+COUNTRIES_NAME = MappingProxyType(_COUNTRIES_NAME)
+# 国家的英文名: 中文名
+COUNTRIES_NAME_ZH = MappingProxyType({en_us: zh_cn for zh_cn, en_us in _COUNTRIES_NAME.items()})
+# 这些地区不是国家，所以忽略。
+IGNORE_COUNTRIES = frozenset(['钻石公主号邮轮'])
+# 这些地区不是城市，所以忽略。
+IGNORE_CITIES = frozenset(['待明确地区', '境外输入', '外地来沪', '境外来沪', '境外输入人员', '外地来津', '外地来京', '省十里丰监狱',
+                           '省级（湖北输入）'])
+# 港澳台的数据只能通过cn_covid()获取
+SPECIAL_REGIONS = frozenset(['香港', '澳门', '台湾'])
+# 丁香园使用的城市简称: 城市全称
+CITY_ALIASES = MappingProxyType({'大兴安岭': '大兴安岭地区'})
+# 这些城市的名称后面不需要加"市"
+CITY_NAMES = frozenset([
+    "锡林郭勒盟",
+    "阿拉善盟",
+    "兴安盟",
+    "甘孜州",
+    "凉山州",
+    "阿坝州",
+    "德宏州",
+    "红河州",
+    "大理州",
+    "文山州",
+    "楚雄州",
+    "赣江新区",
+    "恩施州",
+    "神农架林区",
+    "雄安新区",
+    "喀什地区",
+    "伊犁州",
+    "兵团第四师",
+    "昌吉州",
+    "兵团第九师",
+    "巴州（巴音郭楞蒙古自治州）",
+    "兵团第十二师",
+    "兵团第七师",
+    "阿克苏地区",
+    "黔南州",
+    "黔东南州",
+    "黔西南州",
+    "海北州",
+])
+
+
+def normalize_name(name):
+    """统一名称的写法：去掉多余的空格，全角括号转为半角，英文不区分大小写"""
+    return ' '.join(name.replace('（', '(').replace('）', ')').split()).casefold()
+
+
+# 规范化以后的中文名或英文名: 中文名，名称重复时保留第一个
+_COUNTRY_ALIASES = {}
+for _zh_cn, _en_us in _COUNTRIES_NAME.items():
+    _COUNTRY_ALIASES.setdefault(normalize_name(_zh_cn), _zh_cn)
+    _COUNTRY_ALIASES.setdefault(normalize_name(_en_us), _zh_cn)
+COUNTRY_ALIASES = MappingProxyType(_COUNTRY_ALIASES)
+del _zh_cn, _en_us
+
+
+def country_name_zh(name):
+    """根据国家的中文名或英文名获取中文名，不区分大小写，例如'japan'、'Japan'和'日本'都返回'日本'
+    :param name: 国家名
+    :return: 国家的中文名，如果找不到则返回None
+    """
+    return COUNTRY_ALIASES.get(normalize_name(name))
+
+
+@lru_cache(maxsize=None)
+def city_display_name(city_name):
+    """把丁香园的城市简称转为全称，例如'广州'转为'广州市'，'大兴安岭'转为'大兴安岭地区'"""
+    city_name = CITY_ALIASES.get(city_name, city_name)
+    if city_name not in CITY_NAMES:
+        city_name = city_name + '市'
+    return city_name
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import json                         # 读取news.json
+import re                           # 分词
+from bisect import bisect_left, bisect_right, insort    # 按发布时间排序的索引
+from datetime import datetime, timedelta, timezone      # 转换发布时间
+
+# 参与全文检索的字段
+FIELDS = ('title', 'summary', 'infoSource')
+# 丁香园的发布时间字符串是北京时间
+CHINA_TZ = timezone(timedelta(hours=8))
+
+_CJK = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+_WORD = re.compile(r'[0-9a-z]+')
+_EMPTY = frozenset()
+
+
+def tokenize(text):
+    """分词：连续的中文按二元组(bigram)切分，单独的汉字保留为一个词，英文和数字按单词切分，英文不区分大小写"""
+    text = text.lower()
+    tokens = set()
+    for run in _CJK.findall(text):
+        if len(run) == 1:
+            tokens.add(run)
+        else:
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.update(_WORD.findall(text))
+    return tokens
+
+
+def _index_tokens(text):
+    """建立索引时额外保留每个汉字，查询单个汉字时也可以命中"""
+    tokens = tokenize(text)
+    for run in _CJK.findall(text):
+        tokens.update(run)
+    return tokens
+
+
+def news_key(news):
+    """新闻的唯一标识，和pycovid.store中相同"""
+    return str(news.get('id') or news.get('sourceUrl') or news['title'])
+
+
+def pub_timestamp(news):
+    """新闻的发布时间(毫秒时间戳)，优先使用pubDate，news.json中只有pubTime字符串"""
+    if news.get('pubDate') is not None:
+        return int(news['pubDate'])
+    text = news.get('pubDateStr') or news.get('pubTime')
+    if text:
+        try:
+            return to_timestamp(text)
+        except ValueError:
+            pass
+    return 0
+
+
+def pub_time_str(news):
+    """新闻的发布时间字符串，格式和news.json的pubTime相同，例如'2022-07-11 09:04:55'
+    网页中的pubDateStr是相对时间("1小时前")，归档中的旧新闻需要使用pubDate
+    """
+    if news.get('pubDate') is not None:
+        return datetime.fromtimestamp(int(news['pubDate']) / 1000, CHINA_TZ).strftime('%Y-%m-%d %H:%M:%S')
+    return news.get('pubTime') or news.get('pubDateStr')
+
+
+def to_timestamp(value):
+    """把时间转换为毫秒时间戳
+    :param value: 毫秒时间戳、datetime(没有时区时按北京时间)或者'2022-07-11 09:04:55'格式的字符串
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=CHINA_TZ)
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+class NewsIndex:
+    """新闻的倒排索引和发布时间索引，可以不断加入新的新闻
+    用法：
+        index = NewsIndex.from_covid(covid)
+        index.update(new_covid.n_data)          # 或者Poller事件中的event['diff']['news']
+        index.search('新增 本土', source='央视新闻app', start='2022-07-01')
+    """
+
+    def __init__(self, items=()):
+        """
+        :param items: 新闻列表，格式和PyCovid().n_data或news.json相同
+        """
+        self._items = []            # 文档编号: 新闻
+        self._texts = []            # 文档编号: {字段: 小写的文本}
+        self._times = []            # 文档编号: 发布时间
+        self._keys = {}             # news_key(): 文档编号
+        self._postings = {}         # 词: {文档编号}
+        self._sources = {}          # 来源: {文档编号}
+        self._by_time = []          # [(发布时间, 文档编号)]，按发布时间排序
+        self.update(items)
+
+    @classmethod
+    def from_file(cls, path):
+        """从news.json格式的文件创建"""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_covid(cls, covid):
+        """从PyCovid的新闻创建"""
+        return cls(covid.n_data)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, news):
+        return news_key(news) in self._keys
+
+    def add(self, news):
+        """加入一条新闻，已经存在的新闻内容变化时会更新索引
+        :return: 是否加入或更新了
+        """
+        key = news_key(news)
+        doc = self._keys.get(key)
+        if doc is not None:
+            if self._items[doc] == news:
+                return False
+            self._unindex(doc)
+            self._items[doc] = news
+        else:
+            doc = self._keys[key] = len(self._items)
+            self._items.append(news)
+            self._texts.append(None)
+            self._times.append(0)
+        self._index(doc)
+        return True
+
+    def update(self, items):
+        """加入多条新闻
+        :return: 加入或更新的条数
+        """
+        return sum(self.add(news) for news in items)
+
+    def _index(self, doc):
+        news = self._items[doc]
+        texts = {field: str(news.get(field) or '').lower() for field in FIELDS}
+        self._texts[doc] = texts
+        for token in set().union(*(_index_tokens(text) for text in texts.values())):
+            self._postings.setdefault(token, set()).add(doc)
+        self._sources.setdefault(news.get('infoSource'), set()).add(doc)
+        self._times[doc] = pub_timestamp(news)
+        insort(self._by_time, (self._times[doc], doc))
+
+    def _unindex(self, doc):
+        for token in set().union(*(_index_tokens(text) for text in self._texts[doc].values())):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.discard(doc)
+                if not postings:
+                    del self._postings[token]
+        self._sources.get(self._items[doc].get('infoSource'), set()).discard(doc)
+        position = bisect_left(self._by_time, (self._times[doc], doc))
+        del self._by_time[position]
+
+    def sources(self):
+        """全部来源和每个来源的新闻数量"""
+        return {source: len(docs) for source, docs in self._sources.items() if docs}
+
+    def search(self, keyword=None, source=None, start=None, end=None, fields=FIELDS, limit=None,
+               newest_first=True):
+        """查询新闻，所有条件同时满足
+        :param keyword: 关键词，用空格分隔的多个关键词需要同时出现，英文不区分大小写
+        :param source: 来源(infoSource)，可以是一个字符串或者多个来源的列表
+        :param start: 最早的发布时间(包含)，可以是毫秒时间戳、datetime或者'2022-07-11 09:04:55'格式的字符串
+        :param end: 最晚的发布时间(包含)，格式和start相同
+        :param fields: 关键词出现的字段，默认为title、summary、infoSource
+        :param limit: 最多返回的条数，默认全部返回
+        :param newest_first: 是否按发布时间从新到旧排列，默认为True
+        :return: 新闻列表，是加入时的原始数据，请不要直接修改
+        """
+        candidates = None
+        terms = keyword.lower().split() if keyword else []
+        if terms:
+            # 从最短的倒排列表开始求交集
+            tokens = {token for term in terms for token in tokenize(term) or (term,)}
+            postings = sorted((self._postings.get(token, _EMPTY) for token in tokens), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+            if not candidates:
+                return []
+        if source is not None:
+            sources = [source] if isinstance(source, str) else source
+            docs = set().union(*(self._sources.get(name, _EMPTY) for name in sources))
+            candidates = docs if candidates is None else candidates & docs
+        if start is not None or end is not None:
+            low = to_timestamp(start) if start is not None else float('-inf')
+            high = to_timestamp(end) if end is not None else float('inf')
+            if candidates is None:
+                left = bisect_left(self._by_time, (low,))
+                right = bisect_right(self._by_time, (high, float('inf')))
+                candidates = {doc for _, doc in self._by_time[left:right]}
+            else:
+                candidates = {doc for doc in candidates if low <= self._times[doc] <= high}
+
+        def matches(doc):
+            # 二元组可能来自不相邻的位置，最后检查关键词是否真的出现在指定的字段中
+            texts = self._texts[doc]
+            return all(any(term in texts[field] for field in fields) for term in terms)
+
+        if limit is not None and (candidates is None or len(candidates) * 8 > len(self._by_time)):
+            # 结果很多时按时间顺序遍历，找到limit条就停止，不需要排序全部结果
+            order = reversed(self._by_time) if newest_first else iter(self._by_time)
+            docs = []
+            for _, doc in order:
+                if len(docs) >= limit:
+                    break
+                if (candidates is None or doc in candidates) and matches(doc):
+                    docs.append(doc)
+        else:
+            if candidates is None:
+                candidates = range(len(self._items))
+            docs = sorted((doc for doc in candidates if matches(doc)), key=lambda doc: (self._times[doc], doc),
+                          reverse=newest_first)
+            if limit is not None:
+                docs = docs[:limit]
+        return [self._items[doc] for doc in docs]
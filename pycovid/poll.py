@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import hashlib                      # 判断网页内容是否变化
+import json                         # SSE推送的数据
+import queue                        # 每个SSE连接一个队列
+import random                       # 刷新间隔的随机抖动
+import threading                    # 后台刷新
+import time                         # 刷新时间
+import traceback                    # on_error出错时输出到stderr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer    # 本地SSE服务
+from pycovid.diff import SnapshotDiffer    # 只推送变化的数据
+from pycovid.fetch import Fetcher   # 轮询器独占的连接池
+
+
+class Poller:
+    """在后台定时刷新疫情数据，网页内容变化时才会解析，并把变化推送给所有订阅者
+    多个使用者共用一次下载和解析，订阅方式可以是回调函数、asyncio.Queue或者本地的SSE(Server-Sent Events)服务
+    每次推送的事件是一个字典：
+        covid: 新的PyCovid，可以直接调用查询方法
+        diff: 和上一次的差异，格式和pycovid.diff.SnapshotDiffer.update()相同，第一次推送时包含全部数据
+        digest: 网页内容的sha1
+        taken_at: 刷新时间(Unix时间戳)
+    用法：
+        with Poller(interval=300, use_it_anyway=True) as poller:
+            poller.subscribe(print)
+            ...
+    """
+
+    def __init__(self, interval=300, jitter=0.1, backoff=2, max_interval=3600, fetcher=None, covid_class=None,
+                 on_error=None, **kwargs):
+        """
+        :param interval: 刷新间隔(秒)，默认为300
+        :param jitter: 随机抖动的比例，实际间隔在interval * (1 ± jitter)之间，默认为0.1
+        :param backoff: 连续失败时间隔的增长倍数，默认为2
+        :param max_interval: 失败后的最大间隔(秒)，默认为3600
+        :param fetcher: 下载器，默认创建一个独占的Fetcher，停止时关闭
+        :param covid_class: 创建快照使用的类，默认为pycovid.covid.PyCovid，也可以使用pycovid.covid_en.PyCovid
+        :param on_error: 刷新失败时调用的函数，参数为异常，on_error本身抛出的异常会输出到stderr，不会停止刷新
+        :param kwargs: 和PyCovid.__init__相同的参数，例如use_it_anyway=True
+        """
+        if covid_class is None:
+            from pycovid.covid import PyCovid as covid_class
+        # 提前检查参数，和PyCovid.__init__抛出相同的异常
+        self.url = covid_class._from_scripts({}, **kwargs).url
+        self.interval = interval
+        self.jitter = jitter
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.on_error = on_error
+        self._owns_fetcher = fetcher is None
+        self.fetcher = fetcher or Fetcher()
+        self._covid_class = covid_class
+        self._kwargs = kwargs
+        self._differ = SnapshotDiffer()
+        self._digest = None
+        self.latest = None          # 最近一次推送的事件
+        self.failures = 0           # 连续失败的次数
+        self.last_error = None
+        self._callbacks = []
+        self._queues = []
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()     # 手动调用poll()和后台刷新不会同时进行
+        self._stop = threading.Event()
+        self._thread = None
+        self._servers = []
+
+    def poll(self):
+        """立即刷新一次，可以在后台刷新的同时调用，两者会依次进行
+        :return: 网页内容变化时返回推送的事件，否则返回None
+        """
+        with self._poll_lock:
+            page = self.fetcher.fetch(self.url)
+            digest = hashlib.sha1(page.content).hexdigest()
+            if digest == self._digest:
+                return None
+            covid = self._covid_class._from_scripts(page.scripts, **self._kwargs)
+            covid.page = page
+            covid.response = page.response
+            event = {'covid': covid, 'diff': self._differ.update(covid), 'digest': digest, 'taken_at': time.time()}
+            self._digest = digest
+            self.latest = event
+            self._publish(event)
+            return event
+
+    def _publish(self, event):
+        with self._lock:
+            callbacks = list(self._callbacks)
+            queues = list(self._queues)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                self._report(e)
+        for loop, async_queue in queues:
+            try:
+                loop.call_soon_threadsafe(_put_latest, async_queue, event)
+            except RuntimeError:    # 事件循环已经关闭
+                self.remove_queue(async_queue)
+
+    def _report(self, error):
+        self.last_error = error
+        if self.on_error is not None:
+            try:
+                self.on_error(error)
+            except Exception:
+                traceback.print_exc()   # 不能让刷新线程停止
+
+    def subscribe(self, callback):
+        """添加回调函数，网页内容变化时在刷新线程中调用callback(event)
+        :return: callback，可以作为装饰器使用
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """删除回调函数"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def queue(self, maxsize=0):
+        """创建一个接收事件的asyncio.Queue，必须在事件循环中调用
+        队列满时丢弃最旧的事件
+        :param maxsize: 队列的最大长度，默认不限制
+        """
+        import asyncio
+        async_queue = asyncio.Queue(maxsize)
+        with self._lock:
+            self._queues.append((asyncio.get_running_loop(), async_queue))
+        return async_queue
+
+    def remove_queue(self, async_queue):
+        """不再向队列推送事件"""
+        with self._lock:
+            self._queues = [(loop, q) for loop, q in self._queues if q is not async_queue]
+
+    def next_delay(self):
+        """距离下一次刷新的秒数，连续失败时按backoff增长"""
+        delay = self.interval
+        if self.failures:
+            delay = min(self.interval * self.backoff ** self.failures, self.max_interval)
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def run(self):
+        """在当前线程中循环刷新，直到调用stop()"""
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self.failures = 0
+            except Exception as e:
+                self.failures += 1
+                self._report(e)
+            self._stop.wait(self.next_delay())
+
+    def start(self):
+        """在后台线程中开始刷新"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='pycovid-poller', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """停止刷新，关闭SSE服务和独占的连接池"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers.clear()
+        if self._owns_fetcher:
+            self.fetcher.close()
+
+    def serve(self, host='127.0.0.1', port=8000, heartbeat=15):
+        """在后台线程中启动本地SSE服务
+        GET /events 推送每次变化的digest、taken_at和diff
+        GET /latest 返回最近一次变化
+        :param host: 监听地址，默认只监听本机
+        :param port: 端口，设置为0时自动选择，实际端口为server.server_address[1]
+        :param heartbeat: 没有变化时发送心跳的间隔(秒)，防止连接被代理关闭
+        :return: ThreadingHTTPServer
+        """
+        server = ThreadingHTTPServer((host, port), _handler(self, heartbeat))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='pycovid-sse', daemon=True).start()
+        self._servers.append(server)
+        return server
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def _put_latest(async_queue, event):
+    if async_queue.full():
+        async_queue.get_nowait()
+    async_queue.put_nowait(event)
+
+
+def event_to_json(event):
+    """把事件转换为json，不包含PyCovid对象"""
+    return json.dumps({'digest': event['digest'], 'taken_at': event['taken_at'], 'diff': event['diff']},
+                      ensure_ascii=False)
+
+
+def _handler(poller, heartbeat):
+    class SSEHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/latest':
+                if poller.latest is None:
+                    self.send_error(404, 'no snapshot yet')
+                    return
+                body = event_to_json(poller.latest).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.path == '/events':
+                self._stream()
+            else:
+                self.send_error(404)
+
+        def _stream(self):
+            events = queue.Queue()
+            poller.subscribe(events.put)
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                while not poller._stop.is_set():
+                    try:
+                        event = events.get(timeout=heartbeat)
+                    except queue.Empty:
+                        self.wfile.write(b': heartbeat\n\n')
+                    else:
+                        self.wfile.write(f'event: change\ndata: {event_to_json(event)}\n\n'.encode('utf-8'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                poller.unsubscribe(events.put)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SSEHandler
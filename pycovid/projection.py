@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+from collections import namedtuple  # 按需生成的行类型
+from functools import lru_cache     # 每种字段组合只生成一次
+from pycovid.names import COUNTRIES_NAME, city_display_name    # 名称转换
+
+ROW_TYPES = ('dict', 'tuple', 'namedtuple', 'record')
+
+
+# 中文名到英文名，没有对应的英文名时为''
+_NAME_EN = (COUNTRIES_NAME.get, '')
+
+# 每种数据的全部字段: (输出的字段名, 原始数据中的路径, 转换)，输出时保持这里的顺序
+# 转换可以是函数，或者(函数, 第二个参数)，例如(dict.get, 默认值)
+COUNT_FIELDS = (
+    ('currentConfirmed', ('currentConfirmedCount',), None),
+    ('confirmed', ('confirmedCount',), None),
+    ('cured', ('curedCount',), None),
+    ('dead', ('deadCount',), None),
+)
+INCR_FIELDS = (
+    ('confirmedIncr', ('incrVo', 'confirmedIncr'), None),
+    ('curedIncr', ('incrVo', 'curedIncr'), None),
+    ('deadIncr', ('incrVo', 'deadIncr'), None),
+)
+PROVINCE_FIELDS = (('provinceName', ('provinceShortName',), None),) + COUNT_FIELDS
+CITY_FIELDS = (('cityName', ('cityName',), city_display_name),) + COUNT_FIELDS
+COUNTRY_FIELDS = (
+    ('countryNameEn', ('provinceName',), _NAME_EN),
+    ('countryNameCn', ('provinceName',), None),
+) + COUNT_FIELDS + INCR_FIELDS
+COUNTRY_EN_FIELDS = (('countryName', ('provinceName',), _NAME_EN),) + COUNT_FIELDS + INCR_FIELDS
+
+
+@lru_cache(maxsize=None)
+def compile_projection(fields, row_type='dict', type_name='Row', record=None):
+    """把字段列表编译为一个函数，把一条原始数据转换为一行结果，转换时不再判断需要哪些字段
+    :param fields: ((输出的字段名, 原始数据中的路径, 转换), ...)，转换可以为None、函数或者(函数, 第二个参数)
+    :param row_type: 'dict'、'tuple'、'namedtuple'或'record'，默认为dict
+    :param type_name: namedtuple的类型名
+    :param record: row_type='record'时使用的pycovid.records.Record子类
+    :return: 函数，参数为一条原始数据
+    """
+    if row_type not in ROW_TYPES:
+        raise ValueError(f'row_type只能是{"、".join(ROW_TYPES)}')
+    namespace = {}
+    values = []
+    for i, (name, path, convert) in enumerate(fields):
+        value = 'row' + ''.join(f'[{key!r}]' for key in path)
+        if isinstance(convert, tuple):
+            namespace[f'_convert{i}'], namespace[f'_arg{i}'] = convert
+            value = f'_convert{i}({value}, _arg{i})'
+        elif convert is not None:
+            namespace[f'_convert{i}'] = convert
+            value = f'_convert{i}({value})'
+        values.append(value)
+    names = [name for name, _, _ in fields]
+    row_class = None
+    if row_type == 'record':
+        if record is None:
+            raise ValueError("row_type='record'时需要提供record")
+        # 不经过__init__，直接设置需要的字段
+        namespace['_new'], namespace['_record'] = object.__new__, record
+        assignments = ''.join(f'    obj.{name} = {value}\n' for name, value in zip(names, values))
+        source = f'def project(row):\n    obj = _new(_record)\n{assignments}    return obj\n'
+        row_class = record
+    else:
+        if row_type == 'dict':
+            body = '{' + ', '.join(f'{name!r}: {value}' for name, value in zip(names, values)) + '}'
+            row_class = dict
+        elif row_type == 'tuple':
+            body = '(' + ''.join(f'{value}, ' for value in values) + ')'
+            row_class = tuple
+        else:
+            row_class = namespace['_row_type'] = namedtuple(type_name, names)
+            body = '_row_type(' + ', '.join(values) + ')'
+        source = f'def project(row):\n    return {body}\n'
+    # 字段名和路径都来自上面的常量，生成的代码只包含下标、属性赋值和函数调用
+    exec(source, namespace)
+    project = namespace['project']
+    project.fields = tuple(names)
+    project.row_type = row_class
+    return project
+
+
+def projection(fields, include, row_type='dict', type_name='Row', record=None):
+    """按参数选择字段并编译，相同的参数组合直接返回缓存的函数
+    :param fields: 全部字段，例如PROVINCE_FIELDS
+    :param include: 需要的字段名，不在fields中的字段会被忽略，名称字段需要显式包含
+    :param row_type: 'dict'、'tuple'、'namedtuple'或'record'
+    :param type_name: namedtuple的类型名
+    :param record: row_type='record'时使用的pycovid.records.Record子类
+    """
+    include = set(include)
+    return compile_projection(tuple(field for field in fields if field[0] in include), row_type, type_name, record)
+
+
+def count_names(current=True, confirmed=True, cured=True, dead=True, confirmed_incr=False, cured_incr=False,
+                dead_incr=False):
+    """把查询方法的参数转换为字段名"""
+    flags = (
+        ('currentConfirmed', current), ('confirmed', confirmed), ('cured', cured), ('dead', dead),
+        ('confirmedIncr', confirmed_incr), ('curedIncr', cured_incr), ('deadIncr', dead_incr),
+    )
+    return [name for name, flag in flags if flag]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+_MISSING = object()
+
+
+class Record:
+    """使用__slots__保存的一行数据，没有实例字典，比同样内容的dict占用更少的内存
+    没有获取的字段不会被设置，to_dict()只包含设置了的字段，和对应的查询方法返回的dict相同
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_dict(cls, data):
+        """从查询方法返回的dict创建"""
+        return cls(**data)
+
+    def to_dict(self):
+        """转换为dict，字段的顺序和查询方法返回的dict相同"""
+        data = {}
+        for name in self.__slots__:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                data[name] = value
+        return data
+
+    def to_json(self):
+        """转换为json，格式由pycovid.serializer.set_serializer()设置"""
+        from pycovid.serializer import get_serializer
+        return get_serializer().dumps(self.to_dict())
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={value!r}' for name, value in self.to_dict().items())
+        return f'{type(self).__name__}({fields})'
+
+
+class Province(Record):
+    """cn_covid()中的一个省份"""
+    __slots__ = ('provinceName', 'currentConfirmed', 'confirmed', 'cured', 'dead')
+
+
+class City(Record):
+    """province_covid()中的一个城市"""
+    __slots__ = ('cityName', 'currentConfirmed', 'confirmed', 'cured', 'dead')
+
+
+class Country(Record):
+    """world_covid()中的一个国家，covid_en中的国家名称是countryName"""
+    __slots__ = ('countryName', 'countryNameEn', 'countryNameCn', 'currentConfirmed', 'confirmed', 'cured', 'dead',
+                 'confirmedIncr', 'curedIncr', 'deadIncr')
+
+
+class DangerArea(Record):
+    """find_danger_areas()中的一个风险地区"""
+    __slots__ = ('provinceName', 'cityName', 'areaName', 'dangerLevel')
+
+
+class NewsItem(Record):
+    """news_timeline()中的一条新闻"""
+    __slots__ = ('title', 'publishedTime', 'source', 'url', 'summary')
+
+
+def to_dicts(records):
+    """把Record的列表转换为dict的列表"""
+    return [record.to_dict() for record in records]
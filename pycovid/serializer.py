@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import json                         # 默认的json库
+import threading                    # 替换共用的序列化器
+
+
+def json_default(obj):
+    """json和orjson不支持的类型，例如pycovid.records中的Record，可以作为json.dumps()的default参数"""
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+class Serializer:
+    """把查询结果转换为json，return_to_json=True时使用
+    默认和原来的json.dumps(data, indent=4, ensure_ascii=False)输出完全相同
+    安装了orjson时，紧凑格式(indent=None)和indent=2使用orjson，其他缩进使用标准库
+    """
+
+    def __init__(self, indent=4, backend='auto', as_bytes=False):
+        """
+        :param indent: 缩进的空格数，None表示紧凑格式(没有空格和换行)，默认为4
+        :param backend: 'orjson'、'json'或'auto'，默认在安装了orjson时使用orjson
+        :param as_bytes: 是否返回utf-8编码的bytes，可以直接写入socket，默认返回str
+        """
+        if backend == 'orjson' and indent not in (None, 2):
+            raise ValueError('orjson只支持indent=None或indent=2')
+        # orjson只在可以使用时才导入，默认的indent=4不需要导入
+        orjson = None if backend == 'json' or indent not in (None, 2) else _orjson()
+        if orjson is None and backend == 'orjson':
+            raise ImportError('没有安装orjson，请运行pip install orjson，或者设置backend="json"')
+        self.indent = indent
+        self.as_bytes = as_bytes
+        self._orjson = orjson
+        self._option = 0 if orjson is None or indent is None else orjson.OPT_INDENT_2
+        # 紧凑格式和orjson的输出相同，不包含空格
+        self._separators = (',', ':') if indent is None else None
+
+    @property
+    def backend(self):
+        return 'orjson' if self._orjson is not None else 'json'
+
+    def dumps(self, data):
+        """转换为json
+        :return: str，as_bytes=True时为bytes
+        """
+        if self._orjson is not None:
+            try:
+                text = self._orjson.dumps(data, default=json_default, option=self._option)
+            except TypeError:    # 超出64位的整数等orjson不支持的数据
+                pass
+            else:
+                return text if self.as_bytes else text.decode('utf-8')
+        text = json.dumps(data, indent=self.indent, separators=self._separators, ensure_ascii=False, default=json_default)
+        return text.encode('utf-8') if self.as_bytes else text
+
+
+DEFAULT_SERIALIZER = Serializer()
+_serializer = DEFAULT_SERIALIZER
+_serializer_lock = threading.Lock()
+
+
+def get_serializer():
+    """获取查询方法共用的序列化器"""
+    return _serializer
+
+
+def set_serializer(serializer):
+    """替换查询方法共用的序列化器，例如set_serializer(Serializer(indent=None, as_bytes=True))
+    :param serializer: Serializer或者任何有dumps(data)方法的对象，设置为None时恢复默认
+    """
+    global _serializer
+    with _serializer_lock:
+        _serializer = serializer or DEFAULT_SERIALIZER
+
+
+def dumps(data, indent=4, backend='auto', as_bytes=False):
+    """使用指定的参数转换一次，参数和Serializer相同"""
+    return Serializer(indent=indent, backend=backend, as_bytes=as_bytes).dumps(data)
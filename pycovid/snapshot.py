@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import abc                          # 子类必须实现_setup()
+import mmap                         # 映射大文件
+import os                           # 读取本地文件
+from pycovid.extract import extract_scripts    # 提取网页中的数据
+
+# PyCovid的数据属性和网页中script id的对应关系
+DATASETS = {
+    'c_data': 'getAreaStat',
+    'w_data': 'getListByCountryTypeService2true',
+    'n_data': 'getTimelineService1',
+}
+# 预先提取的json文件名和网页中script id的对应关系，例如仓库中的news.json
+JSON_ALIASES = {
+    **DATASETS,
+    'news': 'getTimelineService1',
+}
+# PyCovid使用的script id，从文件创建时只提取这些数据
+DATASET_IDS = tuple(DATASETS.values())
+
+
+class SnapshotLoader(abc.ABC):
+    """从本地保存的网页或json文件创建PyCovid，不访问网络
+    子类需要实现_setup()，用来完成和__init__相同的参数检查，没有实现时定义子类就会抛出TypeError
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if getattr(cls._setup, '__isabstractmethod__', False):
+            raise TypeError(f'{cls.__name__}需要实现_setup()')
+
+    @abc.abstractmethod
+    def _setup(self, **kwargs):
+        """检查参数，和__init__相同"""
+
+    @classmethod
+    def _from_scripts(cls, scripts, **kwargs):
+        covid = cls.__new__(cls)
+        covid._setup(**kwargs)
+        covid.page = None
+        covid.response = None
+        covid.scripts = scripts
+        return covid
+
+    @classmethod
+    def from_html(cls, html, **kwargs):
+        """从网页源码创建
+        :param html: 保存的网页源码
+        :param kwargs: 和__init__相同的参数，例如use_it_anyway=True
+        """
+        return cls._from_scripts(extract_scripts(html), **kwargs)
+
+    @classmethod
+    def from_bytes(cls, data, **kwargs):
+        """从utf-8编码的网页源码创建，数据保持为bytes，解析时不需要先解码整个网页
+        :param data: 保存的网页源码(bytes、bytearray或memoryview)
+        :param kwargs: 和__init__相同的参数，例如use_it_anyway=True
+        """
+        return cls._from_scripts(extract_scripts(bytes(data)), **kwargs)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """从保存的网页文件创建，文件会被映射到内存中扫描，只复制DATASET_IDS中的数据
+        :param path: 网页文件的路径
+        :param kwargs: 和__init__相同的参数，例如use_it_anyway=True
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls._from_scripts({}, **kwargs)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as page:
+                scripts = extract_scripts(page, ids=DATASET_IDS)
+        return cls._from_scripts(scripts, **kwargs)
+
+    @classmethod
+    def from_json_dir(cls, directory, **kwargs):
+        """从预先提取的json文件所在的目录创建
+        文件名可以是script id(例如getAreaStat.json)，也可以是c_data.json、w_data.json、n_data.json或news.json
+        :param directory: json文件所在的目录
+        :param kwargs: 和__init__相同的参数，例如use_it_anyway=True
+        """
+        scripts = {}
+        for filename in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(filename)
+            if ext != '.json':
+                continue
+            with open(os.path.join(directory, filename), 'rb') as f:
+                scripts[JSON_ALIASES.get(name, name)] = f.read()
+        return cls._from_scripts(scripts, **kwargs)
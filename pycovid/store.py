@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import json                         # 保存新闻和原始数据
+import sqlite3                      # 本地数据库
+import threading                    # 多线程共享同一个数据库连接
+import time                         # 快照时间
+import zlib                         # 压缩原始数据
+from datetime import datetime       # 支持datetime格式的时间
+from pycovid.names import COUNTRIES_NAME, IGNORE_CITIES, IGNORE_COUNTRIES    # 名称对照表
+from pycovid.snapshot import JSON_ALIASES    # 数据集对应的script id
+
+# 保存的计数字段，和查询方法返回的字段名相同
+FIELDS = ('currentConfirmed', 'confirmed', 'cured', 'dead', 'confirmedIncr', 'curedIncr', 'deadIncr')
+_COLUMNS = ('current_confirmed', 'confirmed', 'cured', 'dead', 'confirmed_incr', 'cured_incr', 'dead_incr')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    taken_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at);
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    alias TEXT,
+    UNIQUE (kind, parent, name)
+);
+CREATE INDEX IF NOT EXISTS entities_alias ON entities (kind, alias);
+CREATE TABLE IF NOT EXISTS counters (
+    entity_id INTEGER NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    keyframe INTEGER NOT NULL,
+    current_confirmed INTEGER, confirmed INTEGER, cured INTEGER, dead INTEGER,
+    confirmed_incr INTEGER, cured_incr INTEGER, dead_incr INTEGER,
+    PRIMARY KEY (entity_id, snapshot_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS counters_keyframes ON counters (entity_id, snapshot_id) WHERE keyframe = 1;
+CREATE TABLE IF NOT EXISTS latest (
+    entity_id INTEGER PRIMARY KEY,
+    since_keyframe INTEGER NOT NULL,
+    current_confirmed INTEGER, confirmed INTEGER, cured INTEGER, dead INTEGER,
+    confirmed_incr INTEGER, cured_incr INTEGER, dead_incr INTEGER
+);
+CREATE TABLE IF NOT EXISTS news (
+    key TEXT PRIMARY KEY,
+    pub_date INTEGER,
+    snapshot_id INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS news_pub_date ON news (pub_date);
+CREATE TABLE IF NOT EXISTS raw (
+    snapshot_id INTEGER NOT NULL,
+    script_id TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (snapshot_id, script_id)
+);
+'''
+
+
+def _timestamp(value):
+    """把datetime转换为时间戳"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def _counts(row, incr=False):
+    values = [row['currentConfirmedCount'], row['confirmedCount'], row['curedCount'], row['deadCount']]
+    if incr:
+        incr_vo = row.get('incrVo') or {}
+        values += [incr_vo.get('confirmedIncr'), incr_vo.get('curedIncr'), incr_vo.get('deadIncr')]
+    else:
+        values += [None, None, None]
+    return tuple(values)
+
+
+class SnapshotStore:
+    """保存历史快照的SQLite数据库
+    每个省份、城市、国家的计数只在变化时保存和上一次的差值，每隔keyframe_interval次保存一次完整的值，
+    查询某段时间的数据时只需要读取最近的完整值和之后的差值
+    可以在多个线程中使用(例如Poller的回调)，所有读写都通过同一个连接依次进行；
+    多个进程也可以写入同一个数据库文件，每次保存都在写锁中重新读取最新的计数
+    """
+
+    def __init__(self, path=':memory:', keyframe_interval=32, keep_raw=False):
+        """
+        :param path: 数据库文件路径，默认保存在内存中
+        :param keyframe_interval: 每个地区每保存多少次差值保存一次完整的值，默认为32
+        :param keep_raw: 是否同时保存压缩后的原始数据，默认不保存
+        """
+        self.keyframe_interval = keyframe_interval
+        self.keep_raw = keep_raw
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock:
+            self.db.executescript(_SCHEMA)
+            self._load_state()
+
+    def _load_state(self):
+        """读取每个地区的id和最新的计数，保存时用来计算差值"""
+        self._entities = {(kind, parent, name): entity_id for entity_id, kind, parent, name
+                          in self.db.execute('SELECT id, kind, parent, name FROM entities')}
+        self._latest = {row[0]: (tuple(row[2:]), row[1]) for row in self.db.execute('SELECT * FROM latest')}
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, covid, taken_at=None):
+        """保存PyCovid的c_data、w_data和n_data
+        :param covid: PyCovid，covid_en中的PyCovid只有w_data
+        :param taken_at: 快照时间，可以是时间戳或datetime，默认为当前时间
+        :return: 快照id
+        """
+        data = {}
+        for name in ('c_data', 'w_data', 'n_data'):
+            script_id = JSON_ALIASES[name]
+            if name in vars(covid) or (hasattr(type(covid), name) and script_id in covid.scripts):
+                data[name] = getattr(covid, name)
+        raw = None
+        if self.keep_raw:
+            raw = {script_id: covid.scripts[script_id] for script_id in set(JSON_ALIASES.values())
+                   if script_id in covid.scripts}
+        return self.record_data(taken_at=taken_at, raw=raw, **data)
+
+    def record_data(self, c_data=None, w_data=None, n_data=None, taken_at=None, raw=None):
+        """保存原始数据
+        :param c_data: 国内各省份的原始数据
+        :param w_data: 各国家的原始数据
+        :param n_data: 新闻
+        :param taken_at: 快照时间，可以是时间戳或datetime，默认为当前时间，不能早于上一个快照
+        :param raw: 字典，{script id: 未解析的json}，keep_raw为True时保存
+        :return: 快照id
+        """
+        with self._lock:
+            try:
+                with self.db:
+                    # 先取得数据库的写锁，再读取最新的计数和时间，多个进程写入同一个文件时差值也是正确的
+                    self.db.execute('BEGIN IMMEDIATE')
+                    self._load_state()
+                    # 在锁中取当前时间，多个线程或进程同时保存时快照时间不会倒退
+                    taken_at = time.time() if taken_at is None else _timestamp(taken_at)
+                    last = self.db.execute('SELECT max(taken_at) FROM snapshots').fetchone()[0]
+                    if last is not None and taken_at < last:
+                        raise ValueError('快照时间不能早于上一个快照')
+                    snapshot_id = self.db.execute('INSERT INTO snapshots (taken_at) VALUES (?)', (taken_at,)).lastrowid
+                    for province in c_data or ():
+                        short_name = province['provinceShortName']
+                        self._write(snapshot_id, ('province', '', short_name), province['provinceName'], _counts(province))
+                        for city in province['cities']:
+                            if city['cityName'] not in IGNORE_CITIES:
+                                self._write(snapshot_id, ('city', short_name, city['cityName']), None, _counts(city))
+                    for country in w_data or ():
+                        name_zh = country['provinceName']
+                        if name_zh not in IGNORE_COUNTRIES:
+                            self._write(snapshot_id, ('country', '', name_zh), COUNTRIES_NAME.get(name_zh),
+                                        _counts(country, incr=True))
+                    for news in n_data or ():
+                        key = str(news.get('id') or news.get('sourceUrl') or news['title'])
+                        self.db.execute('INSERT OR IGNORE INTO news VALUES (?, ?, ?, ?)',
+                                        (key, news.get('pubDate'), snapshot_id, json.dumps(news, ensure_ascii=False)))
+                    if self.keep_raw and raw:
+                        for script_id, payload in raw.items():
+                            if isinstance(payload, str):
+                                payload = payload.encode('utf-8')
+                            self.db.execute('INSERT INTO raw VALUES (?, ?, ?)',
+                                            (snapshot_id, script_id, zlib.compress(payload)))
+            except BaseException:
+                # 数据库已经回滚，内存中的计数也需要恢复
+                self._load_state()
+                raise
+            return snapshot_id
+
+    def _write(self, snapshot_id, key, alias, values):
+        """计数没有变化时不保存，否则保存和上一次的差值，每隔keyframe_interval次保存一次完整的值"""
+        entity_id = self._entities.get(key)
+        if entity_id is None:
+            entity_id = self.db.execute('INSERT INTO entities (kind, parent, name, alias) VALUES (?, ?, ?, ?)',
+                                        (*key, alias)).lastrowid
+            self._entities[key] = entity_id
+        previous = self._latest.get(entity_id)
+        if previous is not None and previous[0] == values:
+            return
+        # 某个字段从无到有(或者从有到无)时也需要保存完整的值
+        if (previous is None or previous[1] + 1 >= self.keyframe_interval
+                or any((v is None) != (p is None) for v, p in zip(values, previous[0]))):
+            keyframe, since, stored = 1, 0, values
+        else:
+            keyframe, since = 0, previous[1] + 1
+            stored = tuple(None if v is None or p is None else v - p for v, p in zip(values, previous[0]))
+        self.db.execute(f'INSERT INTO counters VALUES (?, ?, ?, {", ".join("?" * len(_COLUMNS))})',
+                        (entity_id, snapshot_id, keyframe, *stored))
+        self.db.execute(f'INSERT OR REPLACE INTO latest VALUES (?, ?, {", ".join("?" * len(_COLUMNS))})',
+                        (entity_id, since, *values))
+        self._latest[entity_id] = (values, since)
+
+    def snapshots(self, start=None, end=None):
+        """获取某段时间内的快照
+        :return: 列表，[(快照id, 快照时间), ...]
+        """
+        with self._lock:
+            return self.db.execute('SELECT id, taken_at FROM snapshots WHERE taken_at BETWEEN ? AND ? ORDER BY id',
+                                   (_timestamp(start) if start is not None else float('-inf'),
+                                    _timestamp(end) if end is not None else float('inf'))).fetchall()
+
+    def _find_entity(self, name, kind=None, province=None):
+        if kind == 'city' or province is not None:
+            parent = self.db.execute("SELECT name FROM entities WHERE kind = 'province' AND (name = ? OR alias = ?)",
+                                     (province, province)).fetchone()
+            if parent is None:
+                raise KeyError(f'没有找到{province}的数据。')
+            row = self.db.execute("SELECT id FROM entities WHERE kind = 'city' AND parent = ? AND name = ?",
+                                  (parent[0], name)).fetchone()
+        else:
+            row = None
+            for entity_kind in ([kind] if kind else ['province', 'country']):
+                row = self.db.execute('SELECT id FROM entities WHERE kind = ? AND name = ? UNION ALL '
+                                      'SELECT id FROM entities WHERE kind = ? AND alias = ? LIMIT 1',
+                                      (entity_kind, name, entity_kind, name)).fetchone()
+                if row is not None:
+                    break
+        if row is None:
+            raise KeyError(f'没有找到{name}的数据。')
+        return row[0]
+
+    def series(self, name, field='confirmed', start=None, end=None, kind=None, province=None):
+        """查询某个地区在某段时间内每个快照的数据，例如series('北京', 'confirmed', t1, t2)
+        :param name: 省份、城市或国家的名称，省份可以是简称或全称，国家可以是中文名或英文名
+        :param field: 字段名，可以是currentConfirmed、confirmed、cured、dead、confirmedIncr、curedIncr、deadIncr
+        :param start: 开始时间(包含)，可以是时间戳或datetime，默认不限制
+        :param end: 结束时间(包含)，可以是时间戳或datetime，默认不限制
+        :param kind: 'province'、'city'或'country'，默认先查找省份再查找国家
+        :param province: 查询城市时城市所在的省份
+        :return: 列表，[(快照时间, 数值), ...]，地区还没有出现时的快照不会返回
+        """
+        if field not in FIELDS:
+            raise ValueError(f'field只能是{"、".join(FIELDS)}')
+        column = _COLUMNS[FIELDS.index(field)]
+        with self._lock:
+            entity_id = self._find_entity(name, kind, province)
+            snapshots = self.snapshots(start, end)
+            if not snapshots:
+                return []
+            first_id, last_id = snapshots[0][0], snapshots[-1][0]
+            keyframe = self.db.execute('SELECT max(snapshot_id) FROM counters WHERE entity_id = ? AND keyframe = 1 '
+                                       'AND snapshot_id <= ?', (entity_id, first_id)).fetchone()[0]
+            rows = self.db.execute(f'SELECT snapshot_id, keyframe, {column} FROM counters WHERE entity_id = ? '
+                                   'AND snapshot_id BETWEEN ? AND ? ORDER BY snapshot_id',
+                                   (entity_id, keyframe or first_id, last_id)).fetchall()
+        result = []
+        value = None
+        position = 0
+        for snapshot_id, taken_at in snapshots:
+            while position < len(rows) and rows[position][0] <= snapshot_id:
+                _, is_keyframe, stored = rows[position]
+                if is_keyframe or value is None or stored is None:
+                    value = stored
+                else:
+                    value += stored
+                position += 1
+            if position:
+                result.append((taken_at, value))
+        return result
+
+    def news(self, start=None, end=None):
+        """按发布时间查询保存的新闻
+        :param start: 开始时间(包含)，可以是时间戳或datetime，默认不限制
+        :param end: 结束时间(包含)，可以是时间戳或datetime，默认不限制
+        :return: 列表，按发布时间排序的原始新闻数据
+        """
+        # 丁香园的pubDate以毫秒为单位
+        start = _timestamp(start) * 1000 if start is not None else float('-inf')
+        end = _timestamp(end) * 1000 if end is not None else float('inf')
+        with self._lock:
+            rows = self.db.execute('SELECT data FROM news WHERE pub_date BETWEEN ? AND ? ORDER BY pub_date',
+                                   (start, end)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def raw(self, snapshot_id, name):
+        """读取保存的原始数据，需要keep_raw=True
+        :param snapshot_id: 快照id
+        :param name: c_data、w_data、n_data或者script id
+        """
+        with self._lock:
+            row = self.db.execute('SELECT data FROM raw WHERE snapshot_id = ? AND script_id = ?',
+                                  (snapshot_id, JSON_ALIASES.get(name, name))).fetchone()
+        if row is None:
+            raise KeyError(f'没有保存快照{snapshot_id}的{name}。')
+        return json.loads(zlib.decompress(row[0]))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import json                         # 逐条转换为json
+from pycovid.serializer import json_default    # row_type='record'时的数据
+
+
+def write_jsonl(records, fp, ensure_ascii=False):
+    """把数据逐条写入文件，每行一条json(JSON Lines)，不会在内存中保存全部数据
+    例如：write_jsonl(PyCovid().iter_world_covid(), f)
+    :param records: 可迭代的数据，例如PyCovid().iter_world_covid()，也可以是row_type='record'的数据
+    :param fp: 以文本模式打开的文件或者任何有write()方法的对象
+    :param ensure_ascii: 是否把非ASCII字符转义，默认不转义
+    :return: 写入的数据条数
+    """
+    count = 0
+    for record in records:
+        fp.write(json.dumps(record, ensure_ascii=ensure_ascii, default=json_default))
+        fp.write('\n')
+        count += 1
+    return count
+
+
+def write_json_array(records, fp, indent=4, ensure_ascii=False):
+    """把数据逐条写入文件，组成一个json数组，不会在内存中保存全部数据
+    indent=4时写入的内容和return_to_json=True返回的字符串相同
+    :param records: 可迭代的数据，例如PyCovid().iter_world_covid()
+    :param fp: 以文本模式打开的文件或者任何有write()方法的对象
+    :param indent: 缩进的空格数，None表示不换行不缩进，默认为4
+    :param ensure_ascii: 是否把非ASCII字符转义，默认不转义
+    :return: 写入的数据条数
+    """
+    if indent is None:
+        separator, prefix, newline = ', ', '', ''
+    else:
+        prefix = ' ' * indent
+        separator, newline = ',\n' + prefix, '\n'
+    count = 0
+    for record in records:
+        item = json.dumps(record, indent=indent, ensure_ascii=ensure_ascii, default=json_default)
+        if indent is not None:
+            item = item.replace('\n', '\n' + prefix)
+        fp.write(separator if count else '[' + newline + prefix)
+        fp.write(item)
+        count += 1
+    fp.write(newline + ']' if count else '[]')
+    return count
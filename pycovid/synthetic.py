@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""生成和丁香园网页格式相同的模拟网页，用来测试大量数据时的速度和内存，不需要访问网络
+相同的参数和seed生成的网页完全相同，例如：
+    from pycovid.synthetic import generate_page
+    page = generate_page(cities=10000, countries=5000, danger_areas=100000, seed=1)
+    covid = PyCovid.from_bytes(page, ignore_region=True, use_it_anyway=True)
+命令行：python -m pycovid.synthetic --shape large -o large.html
+"""
+import argparse                     # 命令行参数
+import json                         # 生成网页中的数据
+import random                       # 可以重复的随机数
+import sys                          # 输出到标准输出
+from pycovid.names import COUNTRIES_NAME, IGNORE_COUNTRIES, SPECIAL_REGIONS    # 名称对照表
+from pycovid.snapshot import JSON_ALIASES    # 数据对应的script id
+
+# 网页中script的顺序和丁香园相同
+SCRIPT_IDS = ('getStatisticsService', 'getIndexRumorList', 'getIndexRecommendListundefined', 'getWikiList',
+              'getAreaStat', 'getTimelineService1', 'getTimelineService2', 'fetchRecentStatV2',
+              'getListByCountryTypeService1', 'getListByCountryTypeService2true')
+# 预设的数据规模，'fixture'的各项行数和benchmarks/data/pneumonia.html相同(内容不同，那个网页是手工构造的样例)
+SHAPES = {
+    'fixture': {'provinces': 34, 'cities': 124, 'countries': 215, 'danger_areas': 315, 'news': 5},
+    '10x': {'provinces': 340, 'cities': 1240, 'countries': 2150, 'danger_areas': 3150, 'news': 50},
+    '100x': {'provinces': 3400, 'cities': 12400, 'countries': 21500, 'danger_areas': 31500, 'news': 500},
+    'large': {'provinces': 34, 'cities': 10000, 'countries': 5000, 'danger_areas': 100000, 'news': 1000},
+}
+
+# (全称, 简称)，港澳台没有城市数据
+_PROVINCES = (
+    ('台湾', '台湾'), ('香港', '香港'), ('澳门', '澳门'), ('上海市', '上海'), ('广东省', '广东'), ('北京市', '北京'),
+    ('安徽省', '安徽'), ('江苏省', '江苏'), ('福建省', '福建'), ('四川省', '四川'), ('内蒙古自治区', '内蒙古'),
+    ('天津市', '天津'), ('湖北省', '湖北'), ('新疆维吾尔自治区', '新疆'), ('云南省', '云南'), ('贵州省', '贵州'),
+    ('黑龙江省', '黑龙江'), ('浙江省', '浙江'), ('山东省', '山东'), ('辽宁省', '辽宁'), ('河北省', '河北'),
+    ('江西省', '江西'), ('陕西省', '陕西'), ('海南省', '海南'), ('甘肃省', '甘肃'), ('青海省', '青海'),
+    ('河南省', '河南'), ('湖南省', '湖南'), ('广西壮族自治区', '广西'), ('重庆市', '重庆'), ('吉林省', '吉林'),
+    ('山西省', '山西'), ('宁夏回族自治区', '宁夏'), ('西藏自治区', '西藏'),
+)
+_NAME_CHARS = '安宁平阳山江海东西南北新华德兴长清河昌泰丰乐宜武兰定远嘉云开庆'
+_CITY_SUFFIXES = ('', '区', '州', '新区')
+_STREETS = ('花园路', '解放路', '人民路', '建设街道', '中山路', '东风小区', '和平里社区', '新华街道')
+_CONTINENTS = ('亚洲', '欧洲', '北美洲', '南美洲', '非洲', '大洋洲')
+_SOURCES = ('央视新闻app', '人民日报', '新华社', '国家卫健委')
+_COUNT_KEYS = ('currentConfirmedCount', 'confirmedCount', 'suspectedCount', 'curedCount', 'deadCount')
+
+
+def _counts(rng, scale):
+    confirmed = rng.randint(scale, scale * 20)
+    dead = rng.randint(0, confirmed // 50)
+    cured = rng.randint(0, confirmed - dead)
+    return dict(zip(_COUNT_KEYS, (confirmed - cured - dead, confirmed, 0, cured, dead)))
+
+
+def _province_names(count):
+    names = list(_PROVINCES[:count])
+    names += [(f'模拟省{i}', f'模拟省{i}') for i in range(len(names), count)]
+    return names
+
+
+def _country_names(count):
+    names = [name for name in COUNTRIES_NAME if name not in IGNORE_COUNTRIES][:count]
+    if len(names) < count:
+        names += sorted(IGNORE_COUNTRIES)[:count - len(names)]
+    names += [f'模拟国家{i}' for i in range(len(names), count)]
+    return names
+
+
+def _city_name(rng, used):
+    while True:
+        name = ''.join(rng.sample(_NAME_CHARS, 2)) + rng.choice(_CITY_SUFFIXES)
+        if name not in used:
+            used.add(name)
+            return name
+        if len(used) > len(_NAME_CHARS) ** 2:
+            name = f'{name}{len(used)}'
+            used.add(name)
+            return name
+
+
+def _area_stat(rng, provinces, cities, danger_areas):
+    names = _province_names(provinces)
+    with_cities = [i for i, (_, short) in enumerate(names) if short not in SPECIAL_REGIONS] or list(range(provinces))
+    # 城市随机分配到省份，每个省份的城市名称不重复，偶尔包含"境外输入"
+    city_rows = {i: [] for i in range(provinces)}
+    used = {i: set() for i in range(provinces)}
+    for _ in range(cities):
+        i = rng.choice(with_cities)
+        name = '境外输入' if '境外输入' not in used[i] and rng.random() < 0.05 else _city_name(rng, used[i])
+        used[i].add(name)
+        city_rows[i].append({'cityName': name, **_counts(rng, 10), 'highDangerCount': 0, 'midDangerCount': 0})
+    all_cities = [(i, city) for i in range(provinces) for city in city_rows[i]]
+    areas = {i: [] for i in range(provinces)}
+    for _ in range(danger_areas if all_cities else 0):
+        i, city = rng.choice(all_cities)
+        level = 1 if rng.random() < 0.3 else 2
+        city['highDangerCount' if level == 1 else 'midDangerCount'] += 1
+        areas[i].append({'provinceShortName': names[i][1], 'cityName': city['cityName'],
+                         'areaName': f'{names[i][0]}{city["cityName"]}{rng.choice(_STREETS)}{rng.randint(1, 999)}号',
+                         'dangerLevel': level})
+
+    data = []
+    location = 110000
+    for i, (full, short) in enumerate(names):
+        location += 10000
+        rows = city_rows[i]
+        for j, city in enumerate(rows):
+            city['locationId'] = location + j + 1
+            city['currentConfirmedCountStr'] = str(city['currentConfirmedCount'])
+        counts = _counts(rng, 100)
+        if rows:
+            counts = {key: sum(city[key] for city in rows) for key in _COUNT_KEYS}
+        data.append({
+            'provinceName': full, 'provinceShortName': short, **counts, 'comment': '', 'locationId': location,
+            'statisticsData': f'https://file1.dxycdn.com/2020/0223/{location}/statistics.json',
+            'highDangerCount': sum(city['highDangerCount'] for city in rows),
+            'midDangerCount': sum(city['midDangerCount'] for city in rows),
+            'detectOrgCount': rng.randint(10, 300), 'vaccinationOrgCount': rng.randint(10, 800),
+            'cities': rows, 'dangerAreas': areas[i],
+        })
+    return data
+
+
+def _world(rng, countries):
+    data = []
+    for rank, name in enumerate(_country_names(countries)):
+        counts = _counts(rng, 1000)
+        data.append({
+            'id': 10000 + rank, 'createTime': 1579537899000, 'modifyTime': 1657500000000, 'tags': '',
+            'countryType': 2, 'continents': rng.choice(_CONTINENTS), 'provinceId': str(rank), 'provinceName': name,
+            'provinceShortName': '', 'cityName': '', **counts, 'confirmedCountRank': rank + 1,
+            'deadCountRank': rank + 1, 'deadRate': f'{counts["deadCount"] * 100 / counts["confirmedCount"]:.2f}',
+            'deadRateRank': rank + 1, 'comment': '', 'sort': 0, 'operator': 'fengxin', 'locationId': 950000 + rank,
+            'countryShortCode': f'C{rank:03d}', 'countryFullName': COUNTRIES_NAME.get(name, ''),
+            'statisticsData': f'https://file1.dxycdn.com/2020/0315/{rank}/statistics.json',
+            'incrVo': {'currentConfirmedIncr': rng.randint(-50, 50), 'confirmedIncr': rng.randint(0, 500),
+                       'curedIncr': rng.randint(0, 300), 'deadIncr': rng.randint(0, 10)},
+            'showRank': True, 'yesterdayConfirmedCount': 2147383647, 'yesterdayLocalConfirmedCount': 2147383647,
+            'yesterdayOtherConfirmedCount': 2147383647, 'highDanger': '', 'midDanger': '', 'highInDesc': '',
+            'lowInDesc': '', 'outDesc': '',
+        })
+    return data
+
+
+def _news(rng, count, provinces):
+    names = _province_names(provinces)
+    data = []
+    for i in range(count):
+        full, short = rng.choice(names)
+        local, imported = rng.randint(0, 500), rng.randint(0, 100)
+        data.append({
+            'id': 232000 + i, 'pubDate': 1657501495000 - i * 3600000, 'pubDateStr': f'{i + 1}小时前',
+            'title': f'{short}昨日新增本土 {local}+{imported} 例',
+            'summary': f'{full}卫健委通报，0—24时新增本土确诊病例{local}例，新增境外输入病例{imported}例。',
+            'infoSource': rng.choice(_SOURCES), 'sourceUrl': f'https://example.com/news/{232000 + i}',
+            'provinceId': '', 'createTime': 1657501500000, 'modifyTime': 1657501500000, 'dataInfoState': 0,
+            'adoptType': 1,
+        })
+    return data
+
+
+def generate_data(provinces=34, cities=124, countries=215, danger_areas=315, news=5, seed=0):
+    """生成网页中的全部数据
+    :param provinces: 省份数量，前34个为真实的省份名称
+    :param cities: 城市总数，随机分配到港澳台以外的省份
+    :param countries: 国家数量，先使用pycovid.names中的国家名称，不够时使用'模拟国家N'
+    :param danger_areas: 中高风险地区总数，随机分配到各个城市
+    :param news: 新闻数量
+    :param seed: 随机数种子
+    :return: 字典，{script id: 数据}
+    """
+    rng = random.Random(seed)
+    area_stat = _area_stat(rng, provinces, cities, danger_areas)
+    world = _world(rng, countries)
+    timeline = _news(rng, news, provinces)
+    statistics = {'id': 1, 'createTime': 1579537899000, 'modifyTime': 1657500000000, 'summary': '', 'deleted': False,
+                  'countRemark': '', 'generalRemark': '', 'abroadRemark': '', 'marquee': [],
+                  **{key: sum(p[key] for p in area_stat) for key in _COUNT_KEYS}}
+    return {
+        'getStatisticsService': statistics,
+        'getIndexRumorList': [],
+        'getIndexRecommendListundefined': [],
+        'getWikiList': {'code': 'success', 'result': []},
+        JSON_ALIASES['c_data']: area_stat,
+        JSON_ALIASES['n_data']: timeline,
+        'getTimelineService2': timeline[:2],
+        'fetchRecentStatV2': [],
+        'getListByCountryTypeService1': [],
+        JSON_ALIASES['w_data']: world,
+    }
+
+
+def script_tag(script_id, payload):
+    """和丁香园完全相同的格式：<script id="X">try { window.X = 数据}catch(e){}</script>"""
+    text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return f'<script id="{script_id}">try {{ window.{script_id} = {text}}}catch(e){{}}</script>'
+
+
+def render_page(data):
+    """把generate_data()的结果转换为网页源码"""
+    head = ''.join(script_tag(script_id, data[script_id]) for script_id in SCRIPT_IDS[:4] if script_id in data)
+    body = ''.join(script_tag(script_id, data[script_id]) for script_id in SCRIPT_IDS[4:] if script_id in data)
+    return ('<!DOCTYPE html><html><head><meta charset="utf-8"><title>疫情实时大数据报告</title>'
+            '<script src="https://assets.dxycdn.com/gitrepo/ncov-mobile/dist/vendor.js"></script>'
+            f'{head}</head><body><div id="root"></div>{body}</body></html>')
+
+
+def generate_page(shape=None, seed=0, as_bytes=True, **sizes):
+    """生成模拟网页
+    :param shape: SHAPES中预设的规模，sizes中的参数会覆盖预设的值
+    :param seed: 随机数种子
+    :param as_bytes: 是否返回utf-8编码的bytes，默认为True，可以直接传给PyCovid.from_bytes()
+    :param sizes: generate_data()的参数，例如cities=10000
+    """
+    if shape is not None:
+        if shape not in SHAPES:
+            raise ValueError(f'shape只能是{"、".join(SHAPES)}')
+        sizes = {**SHAPES[shape], **sizes}
+    page = render_page(generate_data(seed=seed, **sizes))
+    return page.encode('utf-8') if as_bytes else page
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pycovid.synthetic', description='生成模拟的丁香园网页')
+    parser.add_argument('--shape', choices=tuple(SHAPES), default='fixture', help='预设的规模，默认为%(default)s')
+    for name in SHAPES['fixture']:
+        parser.add_argument(f'--{name.replace("_", "-")}', type=int, dest=name, help=f'{name}的数量，覆盖预设的值')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子，默认为%(default)s')
+    parser.add_argument('-o', '--output', default='-', help='输出的文件，默认输出到标准输出')
+    args = parser.parse_args(argv)
+
+    sizes = {name: getattr(args, name) for name in SHAPES['fixture'] if getattr(args, name) is not None}
+    page = generate_page(args.shape, args.seed, **sizes)
+    if args.output == '-':
+        sys.stdout.buffer.write(page)
+    else:
+        with open(args.output, 'wb') as f:
+            f.write(page)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
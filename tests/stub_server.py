@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+"""测试下载器使用的本机网页服务器，和benchmarks/bench_suite.py中的_PageServer相同，可以设置返回的状态"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass                        # 测试超时时客户端会提前断开连接
+
+
+class StubServer:
+    """在127.0.0.1的随机端口提供网页
+    etag: 设置后返回ETag，请求的If-None-Match相同时返回304
+    failures: 前几次请求返回的状态码，例如[503, 503]
+    delay: 每次请求返回前等待的秒数
+    """
+
+    def __init__(self, page, etag=None):
+        self.page = page
+        self.etag = etag
+        self.failures = []
+        self.delay = 0
+        self.requests = []          # 每次请求的headers
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(dict(self.headers))
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.failures:
+                    self.send_response(stub.failures.pop(0))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if stub.etag is not None and self.headers.get('If-None-Match') == stub.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(stub.page)))
+                if stub.etag is not None:
+                    self.send_header('ETag', stub.etag)
+                self.end_headers()
+                self.wfile.write(stub.page)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _Server(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
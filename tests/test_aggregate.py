@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import unittest
+
+from pycovid import aggregate
+from pycovid.covid import PyCovid
+from pycovid.synthetic import generate_page
+
+
+class AggregatorTest(unittest.TestCase):
+
+    def setUp(self):
+        covid = PyCovid.from_bytes(generate_page('fixture', seed=1), ignore_region=True, use_it_anyway=True)
+        self.aggregate = covid.aggregate
+
+    def test_list_range(self):
+        """范围写成列表时和元组相同"""
+        expected = self.aggregate.rows(where={'confirmed': (1000, None)})
+        self.assertTrue(expected)
+        self.assertEqual(self.aggregate.rows(where={'confirmed': [1000, None]}), expected)
+        with self.assertRaises(ValueError):
+            self.aggregate.rows(where={'confirmed': [1000]})
+
+    def test_unhashable_condition_is_not_cached(self):
+        """不能hash的条件仍然可以使用，只是不缓存结果"""
+        where = {'confirmed': [0, None], 'continent': {'name': '亚洲'}}
+        self.assertEqual(self.aggregate.rows(where=where), [])
+        self.assertEqual(self.aggregate.totals(where=where)['count'], 0)
+        self.assertEqual(self.aggregate._results, {})
+
+    def test_per_capita_is_memoized(self):
+        population = {row['countryNameCn']: 1000000 for row in self.aggregate.rows()}
+        first = self.aggregate.per_capita(population)
+        self.assertIs(self.aggregate.per_capita(dict(population)), first)
+        population[first[0]['countryNameCn']] = 2000000
+        self.assertIsNot(self.aggregate.per_capita(population), first)
+
+    def test_cache_size(self):
+        for low in range(aggregate.MAX_RESULTS + 10):
+            self.aggregate.rows(where={'confirmed': (low, None)})
+        self.assertEqual(len(self.aggregate._results), aggregate.MAX_RESULTS)
+        self.assertNotIn(('rows', 'world', None, (('confirmed', (0, None)),)), self.aggregate._results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import asyncio
+import importlib.util
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from pycovid.aio import AsyncFetcher, AsyncPyCovid, close_async_fetcher, get_async_fetcher
+from pycovid.covid import PyCovid
+from pycovid.synthetic import generate_page
+from stub_server import StubServer
+
+PAGE = generate_page('fixture', seed=1)
+
+
+@unittest.skipIf(importlib.util.find_spec('aiohttp') is None, '没有安装aiohttp')
+class AsyncFetcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(PAGE, etag='"v1"')
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_conditional_get(self):
+        async def fetch_twice():
+            fetcher = AsyncFetcher(timeout=2, backoff=0)
+            try:
+                return await fetcher.fetch(self.server.url), await fetcher.fetch(self.server.url)
+            finally:
+                await fetcher.close()
+
+        first, second = asyncio.run(fetch_twice())
+        self.assertEqual(self.server.requests[-1].get('If-None-Match'), '"v1"')
+        self.assertFalse(first.not_modified)
+        self.assertTrue(second.not_modified)
+        self.assertIsNot(second, first)
+        self.assertIs(second.content, first.content)
+        self.assertIs(second.scripts, first.scripts)
+
+    def test_retry_on_5xx(self):
+        self.server.failures = [503, 500]
+
+        async def fetch():
+            fetcher = AsyncFetcher(timeout=2, retries=2, backoff=0)
+            try:
+                return await fetcher.fetch(self.server.url)
+            finally:
+                await fetcher.close()
+
+        self.assertEqual(asyncio.run(fetch()).content, PAGE)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_create_with_process_pool(self):
+        """使用进程池时解析的数据也要保存在当前进程的AsyncPyCovid中"""
+        async def create(executor):
+            fetcher = AsyncFetcher(timeout=2)
+            try:
+                return await AsyncPyCovid.create(ignore_region=True, use_it_anyway=True,
+                                                 fetcher=_Redirect(fetcher, self.server.url), executor=executor)
+            finally:
+                await fetcher.close()
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            covid = asyncio.run(create(executor))
+        for name in ('c_data', 'w_data', 'n_data'):
+            self.assertIn(name, vars(covid))
+        expected = PyCovid.from_bytes(PAGE, ignore_region=True, use_it_anyway=True)
+        self.assertEqual(covid.cn_covid(), expected.cn_covid())
+        self.assertEqual(covid.world_covid(), expected.world_covid())
+
+    def test_close_async_fetcher(self):
+        async def use_and_close():
+            fetcher = get_async_fetcher()
+            self.assertIs(get_async_fetcher(), fetcher)
+            await fetcher.fetch(self.server.url)
+            session = fetcher.session
+            await close_async_fetcher()
+            replaced = get_async_fetcher()
+            await close_async_fetcher()
+            return fetcher, session, replaced
+
+        fetcher, session, replaced = asyncio.run(use_and_close())
+        self.assertTrue(session.closed)
+        self.assertIsNone(fetcher.session)
+        self.assertIsNot(replaced, fetcher)
+
+
+class _Redirect:
+    """把AsyncPyCovid的请求转到本机服务器"""
+
+    def __init__(self, fetcher, url):
+        self.fetcher = fetcher
+        self.url = url
+
+    async def fetch(self, url):
+        return await self.fetcher.fetch(self.url)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from pycovid.archive import NewsArchive
+from pycovid.covid import CovidException, PyCovid
+from pycovid.newsindex import CHINA_TZ
+from pycovid.synthetic import generate_page
+
+
+def _covid(page):
+    return PyCovid.from_bytes(page, ignore_region=True, use_it_anyway=True)
+
+
+class NewsArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, 'archive')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repoll_same_page(self):
+        """再次刷新同一个网页时，pubDateStr和modifyTime变化了也不应该重复保存"""
+        items = _covid(generate_page('fixture', seed=1)).n_data
+        with NewsArchive(self.directory) as archive:
+            self.assertEqual(archive.update(items), len(items))
+            repolled = [dict(news, pubDateStr='2小时前', modifyTime=news['modifyTime'] + 3600000) for news in items]
+            self.assertEqual(archive.update(repolled), 0)
+            self.assertEqual(len(archive), len(items))
+        with NewsArchive(self.directory) as archive:
+            self.assertEqual(archive.update(repolled), 0)
+            changed = dict(items[0], summary=items[0]['summary'] + '（更新）')
+            self.assertEqual(archive.update([changed]), 1)
+
+    def test_news_timeline_from_archive(self):
+        """归档中的新闻使用pubDate作为发布时间，而不是保存时的相对时间"""
+        covid = _covid(generate_page('fixture', seed=1))
+        with NewsArchive(self.directory) as archive:
+            archive.update([dict(news, pubDateStr='2小时前') for news in covid.n_data])
+        expected = [dict(item, publishedTime=datetime.fromtimestamp(news['pubDate'] / 1000, CHINA_TZ)
+                         .strftime('%Y-%m-%d %H:%M:%S'))
+                    for item, news in zip(covid.news_timeline(), covid.n_data)]
+        self.assertEqual(covid.news_timeline(archive=self.directory), expected)
+
+    def test_missing_archive_is_not_created(self):
+        covid = _covid(generate_page('fixture', seed=1))
+        with self.assertRaises(CovidException):
+            covid.news_timeline(archive=self.directory)
+        self.assertFalse(os.path.exists(self.directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import time
+import unittest
+
+import requests
+
+from pycovid.covid import PyCovid
+from pycovid.fetch import Fetcher
+from pycovid.synthetic import generate_page
+from stub_server import StubServer
+
+PAGE = generate_page('fixture', seed=1)
+
+
+class FetcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(PAGE, etag='"v1"')
+        self.fetcher = Fetcher(timeout=2, retries=2, backoff=0)
+
+    def tearDown(self):
+        self.fetcher.close()
+        self.server.close()
+
+    def test_conditional_get(self):
+        first = self.fetcher.fetch(self.server.url)
+        self.assertFalse(first.not_modified)
+        self.assertEqual(first.content, PAGE)
+        self.assertEqual(first.etag, '"v1"')
+        second = self.fetcher.fetch(self.server.url)
+        self.assertEqual(self.server.requests[-1].get('If-None-Match'), '"v1"')
+        self.assertTrue(second.not_modified)
+        self.assertFalse(first.not_modified)
+        self.assertIsNot(second, first)
+        self.assertIs(second.content, first.content)
+        self.assertIs(second.scripts, first.scripts)
+
+    def test_changed_page(self):
+        self.fetcher.fetch(self.server.url)
+        self.server.page, self.server.etag = generate_page('fixture', seed=2), '"v2"'
+        page = self.fetcher.fetch(self.server.url)
+        self.assertFalse(page.not_modified)
+        self.assertEqual(page.content, self.server.page)
+
+    def test_unconditional(self):
+        fetcher = Fetcher(conditional=False)
+        try:
+            fetcher.fetch(self.server.url)
+            page = fetcher.fetch(self.server.url)
+        finally:
+            fetcher.close()
+        self.assertNotIn('If-None-Match', self.server.requests[-1])
+        self.assertFalse(page.not_modified)
+
+    def test_revalidated_page_keeps_earlier_covid(self):
+        """304时新的PyCovid不会改变之前的PyCovid使用的Page"""
+        first = PyCovid(ignore_region=True, use_it_anyway=True, fetcher=_Redirect(self.fetcher, self.server.url))
+        second = PyCovid(ignore_region=True, use_it_anyway=True, fetcher=_Redirect(self.fetcher, self.server.url))
+        self.assertFalse(first.page.not_modified)
+        self.assertTrue(second.page.not_modified)
+        self.assertIs(second.scripts, first.scripts)
+        self.assertEqual(second.cn_covid(), first.cn_covid())
+
+    def test_retry_on_5xx(self):
+        self.server.failures = [503, 502]
+        page = self.fetcher.fetch(self.server.url)
+        self.assertEqual(page.content, PAGE)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retries_exhausted(self):
+        self.server.failures = [503] * 5
+        with self.assertRaises(requests.RequestException):
+            self.fetcher.fetch(self.server.url)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_timeout(self):
+        self.server.delay = 1
+        fetcher = Fetcher(timeout=0.2, retries=0)
+        start = time.perf_counter()
+        try:
+            with self.assertRaises(requests.RequestException):
+                fetcher.fetch(self.server.url)
+        finally:
+            fetcher.close()
+        self.assertLess(time.perf_counter() - start, 1)
+
+
+class _Redirect:
+    """把PyCovid的请求转到本机服务器"""
+
+    def __init__(self, fetcher, url):
+        self.fetcher = fetcher
+        self.url = url
+
+    def fetch(self, url):
+        return self.fetcher.fetch(self.url)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import contextlib
+import io
+import threading
+import time
+import unittest
+
+from pycovid.fetch import Page
+from pycovid.poll import Poller
+from pycovid.synthetic import generate_page
+
+OPTIONS = {'ignore_region': True, 'use_it_anyway': True}
+
+
+class _FailingFetcher:
+    def __init__(self):
+        self.calls = 0
+
+    def fetch(self, url):
+        self.calls += 1
+        raise OSError('offline')
+
+
+class _SlowFetcher:
+    """记录同时进行的请求数"""
+
+    def __init__(self):
+        self.pages = [Page('', generate_page('fixture', seed=seed)) for seed in range(4)]
+        self.active = self.most_active = 0
+        self.lock = threading.Lock()
+
+    def fetch(self, url):
+        with self.lock:
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+            page = self.pages.pop(0)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return page
+
+
+class PollerTest(unittest.TestCase):
+
+    def test_on_error_raising_keeps_polling(self):
+        def on_error(error):
+            raise RuntimeError('broken handler')
+
+        fetcher = _FailingFetcher()
+        poller = Poller(interval=0.01, jitter=0, backoff=1, fetcher=fetcher, on_error=on_error, **OPTIONS)
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            poller.start()
+            deadline = time.time() + 2
+            while fetcher.calls < 3 and time.time() < deadline:
+                time.sleep(0.01)
+            alive = poller._thread.is_alive()
+            poller.stop()
+        self.assertTrue(alive)
+        self.assertGreaterEqual(fetcher.calls, 3)
+        self.assertIsInstance(poller.last_error, OSError)
+        self.assertIn('broken handler', stderr.getvalue())
+
+    def test_concurrent_polls_are_serialized(self):
+        fetcher = _SlowFetcher()
+        poller = Poller(fetcher=fetcher, **OPTIONS)
+        events = []
+        threads = [threading.Thread(target=lambda: events.append(poller.poll())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fetcher.most_active, 1)
+        self.assertEqual(len({event['digest'] for event in events}), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
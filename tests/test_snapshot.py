@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import json
+import unittest
+
+from pycovid.snapshot import SnapshotLoader
+
+
+class SnapshotLoaderTest(unittest.TestCase):
+
+    def test_subclass_without_setup(self):
+        """没有实现_setup()的子类在定义时就会出错，而不是在调用from_*()时"""
+        with self.assertRaises(TypeError):
+            class Loader(SnapshotLoader):
+                pass
+
+    def test_subclass_with_setup(self):
+        class Loader(SnapshotLoader):
+            def _setup(self, **kwargs):
+                self.options = kwargs
+
+        loader = Loader.from_html('<script id="getAreaStat">try { window.getAreaStat = [] }catch(e){}</script>',
+                                  use_it_anyway=True)
+        self.assertEqual(loader.options, {'use_it_anyway': True})
+        self.assertEqual(json.loads(loader.scripts['getAreaStat']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import os
+import tempfile
+import unittest
+
+from pycovid.store import SnapshotStore
+
+
+def _province(confirmed):
+    return {'provinceShortName': '湖北', 'provinceName': '湖北省', 'currentConfirmedCount': 0,
+            'confirmedCount': confirmed, 'curedCount': 0, 'deadCount': 0, 'cities': []}
+
+
+class SnapshotStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'history.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_two_writers(self):
+        """两个连接交替写入同一个文件时，差值按数据库中最新的计数计算"""
+        with SnapshotStore(self.path) as first, SnapshotStore(self.path) as second:
+            for taken_at, confirmed in enumerate([10, 15, 30, 31, 50]):
+                store = first if taken_at % 2 == 0 else second
+                store.record_data(c_data=[_province(confirmed)], taken_at=taken_at)
+            self.assertEqual(first.series('湖北'), [(0, 10), (1, 15), (2, 30), (3, 31), (4, 50)])
+            self.assertEqual(second.series('湖北'), first.series('湖北'))
+
+    def test_unknown_field(self):
+        with SnapshotStore() as store:
+            store.record_data(c_data=[_province(10)], taken_at=0)
+            with self.assertRaisesRegex(ValueError, 'confirmedIncr'):
+                store.series('湖北', 'deaths')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# encoding='utf-8'
+import io
+import json
+import unittest
+
+from pycovid.covid import PyCovid
+from pycovid.stream import write_json_array, write_jsonl
+from pycovid.synthetic import generate_page
+
+
+class StreamTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.covid = PyCovid.from_bytes(generate_page('fixture', seed=1), ignore_region=True, use_it_anyway=True)
+
+    def test_jsonl_record_rows(self):
+        """row_type='record'的数据和dict写入的内容相同"""
+        records, dicts = io.StringIO(), io.StringIO()
+        count = write_jsonl(self.covid.iter_world_covid(row_type='record'), records)
+        self.assertEqual(count, write_jsonl(self.covid.iter_world_covid(), dicts))
+        self.assertEqual(records.getvalue(), dicts.getvalue())
+        self.assertEqual(len(records.getvalue().splitlines()), count)
+
+    def test_json_array_record_rows(self):
+        f = io.StringIO()
+        write_json_array(self.covid.iter_province_covid('湖北', row_type='record'), f)
+        self.assertEqual(json.loads(f.getvalue()), self.covid.province_covid('湖北', include_province_name=False))
+        f = io.StringIO()
+        write_json_array(self.covid.iter_cn_covid(row_type='record'), f)
+        self.assertEqual(f.getvalue(), self.covid.cn_covid(return_to_json=True))
+
+
+if __name__ == '__main__':
+    unittest.main()